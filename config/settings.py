@@ -1,6 +1,9 @@
 """Configuration and settings for the application."""
 
-from langchain_ollama import ChatOllama
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from services.llm_backends import build_chat_model
+from services.llm_router import OllamaRouter
 
 import os
 
@@ -12,8 +15,209 @@ LLM_TEMPERATURE = 0.1
 # Docker needs to access host machine's Ollama via host.docker.internal or configured URL
 ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
-local_llm = ChatOllama(
-    model=LLM_MODEL,
-    temperature=LLM_TEMPERATURE,
-    base_url=ollama_base_url
+# Several Ollama hosts can share the load: comma-separated list, defaults to OLLAMA_BASE_URL
+OLLAMA_BASE_URLS = [url.strip() for url in os.getenv("OLLAMA_BASE_URLS", ollama_base_url).split(",") if url.strip()]
+OLLAMA_HEALTH_INTERVAL_SECONDS = float(os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "10"))
+OLLAMA_FAILURE_THRESHOLD = int(os.getenv("OLLAMA_FAILURE_THRESHOLD", "3"))  # Consecutive failures before ejection
+OLLAMA_REQUEST_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_REQUEST_TIMEOUT_SECONDS", "90"))  # HTTP timeout per request, sync and async
+
+ollama_router = OllamaRouter(
+    OLLAMA_BASE_URLS,
+    failure_threshold=OLLAMA_FAILURE_THRESHOLD,
+    probe_interval=OLLAMA_HEALTH_INTERVAL_SECONDS,
+    request_timeout=OLLAMA_REQUEST_TIMEOUT_SECONDS
 )
+
+# LLM Backend
+# "ollama" (default), "fake" (canned replies with simulated latency, for load
+# tests), "record" (Ollama, saving replies to LLM_RECORDINGS_PATH) or
+# "replay" (serves the recorded replies). See services/llm_backends.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0.2"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "40"))
+LLM_RECORDINGS_PATH = os.getenv("LLM_RECORDINGS_PATH", "recordings/llm.jsonl")
+
+_llm_instances = {}
+
+def get_llm(model: str, temperature: float = LLM_TEMPERATURE) -> BaseChatModel:
+    """Returns the shared chat model for this model/temperature pair on the configured backend."""
+    key = (model, temperature)
+    if key not in _llm_instances:
+        _llm_instances[key] = build_chat_model(
+            LLM_BACKEND,
+            model,
+            temperature,
+            router=ollama_router,
+            fake_latency=FAKE_LLM_LATENCY_SECONDS,
+            fake_tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+            recordings_path=LLM_RECORDINGS_PATH
+        )
+    return _llm_instances[key]
+
+local_llm = get_llm(LLM_MODEL, LLM_TEMPERATURE)
+
+# Per-chain model tiers
+# Each chain has a primary model and an optional smaller fallback. When the
+# primary doesn't answer within the chain's latency SLO, the call is retried
+# on the fallback. Configure with <CHAIN>_MODEL, <CHAIN>_FALLBACK_MODEL,
+# <CHAIN>_TEMPERATURE and <CHAIN>_SLO_SECONDS, e.g. FOLLOWUP_MODEL=qwen2.5-coder:0.5b
+def _chain_tier(name: str, slo_seconds: float) -> dict:
+    prefix = name.upper()
+    return {
+        "model": os.getenv(f"{prefix}_MODEL", LLM_MODEL),
+        "fallback_model": os.getenv(f"{prefix}_FALLBACK_MODEL") or None,
+        "temperature": float(os.getenv(f"{prefix}_TEMPERATURE", str(LLM_TEMPERATURE))),
+        "slo_seconds": float(os.getenv(f"{prefix}_SLO_SECONDS", str(slo_seconds))),
+    }
+
+CHAIN_MODELS = {
+    "interview": _chain_tier("interview", 30),
+    "evaluation": _chain_tier("evaluation", 60),
+    "followup": _chain_tier("followup", 20),
+    "combined": _chain_tier("combined", 60),
+    "custom": _chain_tier("custom", 60),
+}
+
+# Evaluation Mode
+# "separate": one call for feedback/score and one for the follow-up question
+# "combined": a single structured call, falling back to "separate" if its output can't be parsed
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "separate")
+
+# LLM Response Cache
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# How long a worker serves an entry from memory before checking the table again (and seeing invalidations)
+LLM_CACHE_MEMORY_TTL_SECONDS = int(os.getenv("LLM_CACHE_MEMORY_TTL_SECONDS", "60"))
+
+# Resume Question Pre-generation
+QUESTION_POOL_SIZE = int(os.getenv("QUESTION_POOL_SIZE", "3"))  # Questions buffered ahead per session
+QUESTION_POOL_MAX_INFLIGHT = int(os.getenv("QUESTION_POOL_MAX_INFLIGHT", "4"))  # Across all sessions
+QUESTION_POOL_IDLE_SECONDS = int(os.getenv("QUESTION_POOL_IDLE_SECONDS", "3600"))
+
+# Idempotency Keys
+# evaluate-answer and submit-audio accept an Idempotency-Key header; retries
+# attach to the running request or get the stored result replayed
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))  # In-progress keys older than this are taken over
+IDEMPOTENCY_SWEEP_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", "3600"))
+
+# Speech-to-Text
+# Whisper runs in STT_WORKERS processes, each with its own model, so
+# transcription never blocks the event loop (see services/transcription_pool.py)
+STT_MODEL_SIZE = os.getenv("STT_MODEL_SIZE", "base")
+STT_WORKERS = int(os.getenv("STT_WORKERS", "1"))  # 0 transcribes in a thread of the web process instead
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0"))  # Per worker; 0 splits the available cores between workers
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "8"))  # Waiting recordings before new uploads get 429
+STT_TIMEOUT_SECONDS = float(os.getenv("STT_TIMEOUT_SECONDS", "120"))  # Queue wait plus transcription
+AUDIO_ARCHIVE_ENABLED = os.getenv("AUDIO_ARCHIVE_ENABLED", "true").lower() == "true"  # Keep a compressed copy of each answer (see Audio Storage)
+STT_VAD_ENABLED = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"  # Cut silence (Silero VAD) before denoising and decoding
+STT_VAD_MIN_SILENCE_MS = int(os.getenv("STT_VAD_MIN_SILENCE_MS", "500"))  # Shorter pauses are kept
+STT_DENOISE_ADAPTIVE = os.getenv("STT_DENOISE_ADAPTIVE", "true").lower() == "true"  # Pick the noise reduction per recording from its SNR; false always runs spectral gating
+STT_DENOISE_SKIP_SNR_DB = float(os.getenv("STT_DENOISE_SKIP_SNR_DB", "25"))  # Cleaner recordings aren't denoised
+STT_DENOISE_SPECTRAL_SNR_DB = float(os.getenv("STT_DENOISE_SPECTRAL_SNR_DB", "12"))  # Noisier ones get spectral gating, the rest a high-pass filter
+STT_HIGHPASS_CUTOFF_HZ = float(os.getenv("STT_HIGHPASS_CUTOFF_HZ", "100"))  # Removes rumble and mains hum
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "en")  # Empty detects it per recording (per batch when batching)
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "8"))  # Recordings decoded together; 1 disables batching
+STT_BATCH_WINDOW_MS = int(os.getenv("STT_BATCH_WINDOW_MS", "50"))  # How long the first recording waits for others to join
+
+# Transcription profiles
+# Rooms pick one (InterviewRoom.transcription_profile); others use STT_PROFILE.
+# "accurate" is beam search with STT_MODEL_SIZE, "fast" greedy decoding with
+# the smaller STT_FAST_MODEL_SIZE. Both run int8 on the CPU.
+STT_PROFILE = os.getenv("STT_PROFILE", "accurate")
+STT_FAST_MODEL_SIZE = os.getenv("STT_FAST_MODEL_SIZE", "tiny")
+
+TRANSCRIPTION_PROFILES = {
+    "accurate": {"model_size": STT_MODEL_SIZE, "beam_size": 5},
+    "fast": {"model_size": STT_FAST_MODEL_SIZE, "beam_size": 1},
+}
+
+# Streaming Transcription
+# WS /interview/audio-stream transcribes answers while they are spoken; each
+# pause of STT_VAD_MIN_SILENCE_MS closes a segment (see services/stream_transcription.py)
+STT_STREAM_CHECK_SECONDS = float(os.getenv("STT_STREAM_CHECK_SECONDS", "1.0"))  # New audio between VAD checks
+STT_STREAM_PARTIALS_ENABLED = os.getenv("STT_STREAM_PARTIALS_ENABLED", "true").lower() == "true"  # Live text of the unfinished segment, while the pool has spare capacity
+STT_STREAM_MAX_SEGMENT_SECONDS = float(os.getenv("STT_STREAM_MAX_SEGMENT_SECONDS", "20"))  # Speech without a pause is cut at this length
+STT_STREAM_MAX_SECONDS = float(os.getenv("STT_STREAM_MAX_SECONDS", "600"))  # Longest answer accepted over one connection
+
+# Audio Storage
+# Recorded answers are transcoded in the background and stored once per content
+# hash, linked from InterviewResponse.audio_sha256 (see services/audio_store.py)
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", "assets/audio/store")
+AUDIO_STORE_CODEC = os.getenv("AUDIO_STORE_CODEC", "opus")  # "opus" (lossy, small) or "flac" (lossless)
+AUDIO_STORE_OPUS_BITRATE = int(os.getenv("AUDIO_STORE_OPUS_BITRATE", "24000"))  # Bits per second, 16 kHz mono speech
+AUDIO_RETENTION_DAYS = float(os.getenv("AUDIO_RETENTION_DAYS", "90"))  # Recordings of older sessions are swept; 0 keeps them forever
+AUDIO_RETENTION_ACTION = os.getenv("AUDIO_RETENTION_ACTION", "delete")  # "delete" or "archive" (move to AUDIO_RETENTION_ARCHIVE_DIR)
+AUDIO_RETENTION_ARCHIVE_DIR = os.getenv("AUDIO_RETENTION_ARCHIVE_DIR", "assets/audio/archive")
+AUDIO_RETENTION_BATCH_SIZE = int(os.getenv("AUDIO_RETENTION_BATCH_SIZE", "500"))  # Rows per sweep transaction
+AUDIO_RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("AUDIO_RETENTION_SWEEP_INTERVAL_SECONDS", "3600"))
+
+# Text-to-Speech
+# GET /interview/tts streams questions as speech from TTS_BACKEND: "edge"
+# (edge-tts, online) or "fake" (local tones, for tests). Results are cached on
+# disk and seeded questions pre-warmed on startup (see services/tts.py)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "edge")
+TTS_VOICE = os.getenv("TTS_VOICE", "en-US-AvaNeural")
+TTS_VOICES = [v.strip() for v in os.getenv("TTS_VOICES", TTS_VOICE).split(",") if v.strip()]  # Voices clients may ask for
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", "1000"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "assets/audio/tts")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "500"))  # Least recently played files are evicted past this
+TTS_PREWARM_ENABLED = os.getenv("TTS_PREWARM_ENABLED", "true").lower() == "true"
+TTS_PREWARM_LIMIT = int(os.getenv("TTS_PREWARM_LIMIT", "500"))  # Questions synthesized on startup, seeded ones first
+TTS_PREWARM_CONCURRENCY = int(os.getenv("TTS_PREWARM_CONCURRENCY", "2"))
+
+# Audio Evaluation Jobs
+# POST /interview/audio-jobs queues recordings for workers that claim them with
+# FOR UPDATE SKIP LOCKED (see services/audio_jobs.py)
+AUDIO_JOB_WORKERS = int(os.getenv("AUDIO_JOB_WORKERS", "1"))  # In the web process; 0 when running scripts/audio_worker.py
+AUDIO_JOB_POLL_SECONDS = float(os.getenv("AUDIO_JOB_POLL_SECONDS", "1"))  # Idle workers check for new jobs this often
+AUDIO_JOB_LEASE_SECONDS = int(os.getenv("AUDIO_JOB_LEASE_SECONDS", "300"))  # Jobs of a silent worker are claimed again after this
+AUDIO_JOB_MAX_ATTEMPTS = int(os.getenv("AUDIO_JOB_MAX_ATTEMPTS", "3"))
+
+# Generated Question Reuse
+# Questions generated for a resume digest similar to the candidate's are
+# served again instead of calling the LLM (see services/question_index.py)
+QUESTION_REUSE_ENABLED = os.getenv("QUESTION_REUSE_ENABLED", "true").lower() == "true"
+QUESTION_REUSE_THRESHOLD = float(os.getenv("QUESTION_REUSE_THRESHOLD", "0.6"))  # Cosine similarity of resume digests
+QUESTION_REUSE_RATE = float(os.getenv("QUESTION_REUSE_RATE", "0.8"))  # Share of lookups allowed to reuse; the rest generate
+QUESTION_INDEX_REFRESH_SECONDS = float(os.getenv("QUESTION_INDEX_REFRESH_SECONDS", "60"))  # Picks up other workers' questions
+
+# Resume Digest
+RESUME_DIGEST_TOKEN_BUDGET = int(os.getenv("RESUME_DIGEST_TOKEN_BUDGET", "600"))
+
+# LLM Admission Scheduler
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))  # Calls running against the model at once
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))  # Waiting calls before new ones are rejected
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "120"))
+
+# LLM Circuit Breaker
+# After LLM_BREAKER_FAILURE_THRESHOLD consecutive failed or timed-out calls,
+# LLM calls fail fast for LLM_BREAKER_COOLDOWN_SECONDS. Meanwhile questions
+# come from the question bank and evaluations are queued for retry.
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "90"))  # Per call, excluding queue wait
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+EVALUATION_RETRY_INTERVAL_SECONDS = float(os.getenv("EVALUATION_RETRY_INTERVAL_SECONDS", "30"))
+EVALUATION_RETRY_MAX_ATTEMPTS = int(os.getenv("EVALUATION_RETRY_MAX_ATTEMPTS", "5"))
+EVALUATION_RETRY_LEASE_SECONDS = float(os.getenv("EVALUATION_RETRY_LEASE_SECONDS", "300"))  # Claimed evaluations whose worker died are retried after this
+
+# Answer Pre-screen
+# Empty, filler-only and explicit "I don't know" answers get a fixed low
+# score and templated feedback without calling the LLM. The length and
+# keyword heuristics misjudge short technical answers, so they are opt-in
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+PRESCREEN_MAX_DONT_KNOW_WORDS = int(os.getenv("PRESCREEN_MAX_DONT_KNOW_WORDS", "8"))  # Longest answer treated as "I don't know"
+PRESCREEN_HEURISTICS = os.getenv("PRESCREEN_HEURISTICS", "false").lower() == "true"  # Also screen "too short" and "off topic"
+PRESCREEN_MIN_CONTENT_WORDS = int(os.getenv("PRESCREEN_MIN_CONTENT_WORDS", "1"))  # Fewer meaningful words is "too short"
+PRESCREEN_OFFTOPIC_MIN_WORDS = int(os.getenv("PRESCREEN_OFFTOPIC_MIN_WORDS", "15"))  # Only longer answers can be off topic
+
+# Token Budgets
+# Chain inputs over their budget keep their start and end plus the sentences
+# most related to the question (see services/token_budget.py)
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "Qwen/Qwen2.5-Coder-3B-Instruct")  # tokenizer.json path or Hugging Face repo id
+LLM_TOKENIZER_TIMEOUT_SECONDS = float(os.getenv("LLM_TOKENIZER_TIMEOUT_SECONDS", "5"))  # Hugging Face requests on the startup load
+ANSWER_TOKEN_BUDGET = int(os.getenv("ANSWER_TOKEN_BUDGET", "800"))
+QUESTION_TOKEN_BUDGET = int(os.getenv("QUESTION_TOKEN_BUDGET", "300"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))  # User context plus resume digest
+CUSTOM_PROMPT_TOKEN_BUDGET = int(os.getenv("CUSTOM_PROMPT_TOKEN_BUDGET", "2000"))
@@ -1,13 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
 from routes.interview import router as interview_router
 from routes.auth import router as auth_router
 from routes.admin import router as admin_router
 from routes.video import router as video_router
 from routes.candidate import router as candidate_router
 from config.database import create_db_and_tables
+from config.settings import ollama_router, LLM_BACKEND, AUDIO_JOB_WORKERS, AUDIO_RETENTION_DAYS, TTS_PREWARM_ENABLED
+from services.llm_scheduler import SchedulerOverloaded, DeadlineExceeded
+from services.circuit_breaker import CircuitOpen
+from services.evaluation_retry import run_evaluation_retries
+from services.audio_jobs import run_audio_worker
+from services.audio_store import run_retention_sweeper
+from services.tts import tts
+from services.transcription_pool import transcription_pool, TranscriptionOverloaded, TranscriptionTimeout
+from services.token_budget import load_tokenizer
+from services.question_index import question_index
+from services.idempotency import idempotency, IdempotencyKeyReused, IdempotencyKeyBusy
 
 
 # Initialize FastAPI app
@@ -27,10 +39,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# LLM backpressure: tell clients when to come back instead of letting requests pile up
+@app.exception_handler(SchedulerOverloaded)
+async def llm_overloaded_handler(request: Request, exc: SchedulerOverloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "The interviewer is busy, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(DeadlineExceeded)
+async def llm_deadline_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The interviewer took too long to respond, please retry."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(CircuitOpen)
+async def llm_unavailable_handler(request: Request, exc: CircuitOpen):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The interviewer is temporarily unavailable, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(TranscriptionOverloaded)
+async def stt_overloaded_handler(request: Request, exc: TranscriptionOverloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many recordings are being transcribed, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(TranscriptionTimeout)
+async def stt_timeout_handler(request: Request, exc: TranscriptionTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Transcription took too long, please retry."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(IdempotencyKeyReused)
+async def idempotency_reused_handler(request: Request, exc: IdempotencyKeyReused):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+@app.exception_handler(IdempotencyKeyBusy)
+async def idempotency_busy_handler(request: Request, exc: IdempotencyKeyBusy):
+    return JSONResponse(
+        status_code=409,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
 
+background_tasks = set()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    transcription_pool.start()
+    # Keep references so the tasks aren't garbage collected
+    # The tokenizer may need downloading and the question index reads the whole
+    # question bank; load both off the event loop
+    coros = [run_evaluation_retries(), idempotency.run_sweeper(), asyncio.to_thread(load_tokenizer, True),
+             asyncio.to_thread(question_index.sync)]
+    # Audio job workers; set AUDIO_JOB_WORKERS=0 when they run as scripts/audio_worker.py
+    coros += [run_audio_worker() for _ in range(AUDIO_JOB_WORKERS)]
+    if AUDIO_RETENTION_DAYS > 0:
+        coros.append(run_retention_sweeper())
+    # Seeded questions are spoken to every candidate; synthesize them before the first one asks
+    if TTS_PREWARM_ENABLED:
+        coros.append(tts.prewarm())
+    if LLM_BACKEND in ("ollama", "record"):
+        coros.append(ollama_router.run_health_checks())
+    for coro in coros:
+        background_tasks.add(asyncio.create_task(coro))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    transcription_pool.shutdown()
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -26,6 +26,7 @@ class InterviewRoom(SQLModel, table=True):
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     max_sessions: Optional[int] = Field(default=None)
+    transcription_profile: Optional[str] = Field(default=None)  # TRANSCRIPTION_PROFILES name; None uses STT_PROFILE
     
     admin: User = Relationship(back_populates="rooms_created")
     sessions: List["InterviewSession"] = Relationship(back_populates="room")
@@ -35,9 +36,17 @@ class Question(SQLModel, table=True):
     content: str
     topic: str
     difficulty: str = Field(default="Medium")
+    resume_digest_id: Optional[str] = Field(default=None, foreign_key="resumedigest.id")  # Resume it was generated for
+    seeded: bool = Field(default=False)  # Part of the default question bank (scripts/seed_questions.py)
     
     responses: List["InterviewResponse"] = Relationship(back_populates="question")
 
+class ResumeDigest(SQLModel, table=True):
+    id: str = Field(primary_key=True)  # sha256 of the extracted resume text
+    digest: str
+    token_count: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class InterviewSession(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     room_id: int = Field(foreign_key="interviewroom.id")
@@ -45,6 +54,7 @@ class InterviewSession(SQLModel, table=True):
     start_time: datetime = Field(default_factory=datetime.utcnow)
     end_time: Optional[datetime] = None
     total_score: Optional[float] = None
+    resume_digest_id: Optional[str] = Field(default=None, foreign_key="resumedigest.id")
     
     room: InterviewRoom = Relationship(back_populates="sessions")
     candidate: User = Relationship(back_populates="sessions")
@@ -57,11 +67,67 @@ class InterviewResponse(SQLModel, table=True):
     answer_text: str
     evaluation_text: str
     score: Optional[float] = None
+    model_name: Optional[str] = None  # Model that produced the evaluation
+    evaluation_status: str = Field(default="done", index=True)  # "done", "pending" (queued for retry) or "failed"
+    evaluation_attempts: int = Field(default=0)
+    evaluation_claimed_at: Optional[datetime] = None  # Retry worker lease on a pending evaluation
+    audio_sha256: Optional[str] = Field(default=None, index=True)  # AudioBlob of the recorded answer, if any
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
     session: InterviewSession = Relationship(back_populates="responses")
     question: Question = Relationship(back_populates="responses")
 
+class LLMCacheEntry(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache_key: str = Field(unique=True, index=True)
+    kind: str
+    model: str
+    prompt_version: str = Field(index=True)
+    payload: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
+class IdempotencyKey(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key: str = Field(unique=True, index=True)  # "<endpoint>:<client key>"
+    request_hash: str
+    status: str = Field(default="in_progress")  # "in_progress" or "done"
+    response: Optional[str] = None  # JSON list of [event, data] replayed to retries
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+class AudioBlob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(unique=True, index=True)  # Of the upload as received; names the stored file
+    path: str
+    codec: str  # "opus" or "flac"
+    size_bytes: int  # Stored, after transcoding
+    original_bytes: int
+    duration_seconds: float
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # Last upload of this content; retention counts from here
+    archived_at: Optional[datetime] = None  # Moved to AUDIO_RETENTION_ARCHIVE_DIR by the retention sweeper
+
+class AudioJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: int = Field(foreign_key="interviewsession.id")
+    question: str
+    topic: str = Field(default="Audio/Dynamic")
+    audio_path: str
+    status: str = Field(default="queued", index=True)  # queued, transcribing, transcribed, evaluated, done or failed
+    attempts: int = Field(default=0)
+    worker_id: Optional[str] = None
+    claimed_at: Optional[datetime] = None  # Lease start, renewed at every stage
+    transcription: Optional[str] = None
+    feedback: Optional[str] = None
+    score: Optional[float] = None
+    follow_up_question: Optional[str] = None
+    evaluation_status: Optional[str] = None
+    response_id: Optional[int] = Field(default=None, foreign_key="interviewresponse.id")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 # Rebuild models to resolve forward references
 User.model_rebuild()
 InterviewRoom.model_rebuild()
@@ -1,5 +1,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 
+# Bump whenever a prompt in this module changes, so cached evaluations made
+# with the old wording are no longer served (see services/llm_cache.py)
+PROMPT_VERSION = "1"
+
 # Answer Evaluation Prompt
 evaluation_prompt = ChatPromptTemplate.from_messages([
     ("system", "You are an expert technical interviewer. Provide constructive feedback on the candidate's answer."),
@@ -16,3 +20,22 @@ followup_prompt = ChatPromptTemplate.from_messages([
     ("user", "Original Question: {question}\nCandidate's Answer: {answer}"),
     ("user", "Output ONLY the follow-up question text.")
 ])
+
+# Combined Evaluation Prompt (feedback, score and follow-up in a single call)
+combined_evaluation_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert technical interviewer. Provide constructive feedback on the candidate's answer and prepare one follow-up question."),
+    ("user", "You must return your response in a valid JSON format with exactly three keys: 'feedback' (string), 'score' (float between 0 and 10) and 'follow_up_question' (string, ONE short question that probes deeper or clarifies their understanding)."),
+    ("user", "Question: {question}\n\nCandidate's Answer: {answer}"),
+    ("user", "Do not include any text outside the JSON object."),
+])
+
+# JSON schema passed to the model as the structured output format
+COMBINED_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "feedback": {"type": "string"},
+        "score": {"type": "number", "minimum": 0, "maximum": 10},
+        "follow_up_question": {"type": "string"},
+    },
+    "required": ["feedback", "score", "follow_up_question"],
+}
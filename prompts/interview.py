@@ -7,8 +7,9 @@ interview_prompt = ChatPromptTemplate.from_messages([
     {context}
     
     Focus Topic: {topic}
+    Difficulty: {difficulty}
     
-    Task: Ask ONE challenging technical question related to the Focus Topic. 
+    Task: Ask ONE technical question of the given Difficulty related to the Focus Topic. 
     If a resume is provided, try to link the question to their experience.
     
     Output ONLY the question text. No introductory filler.
@@ -1,4 +1,5 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
@@ -11,11 +12,22 @@ from pydantic import BaseModel
 import secrets
 from schemas.requests import RoomCreate, RoomUpdate, AdminCreate, UserUpdate
 from schemas.responses import RoomRead, SessionRead, UserRead
+from services import metrics
+from services.llm_cache import llm_cache
+from services.audio import resolve_profile
+from config.settings import TRANSCRIPTION_PROFILES
 
 templates = Jinja2Templates(directory="templates")
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+def _check_transcription_profile(name: str):
+    if name not in TRANSCRIPTION_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Transcription profile must be one of: {', '.join(TRANSCRIPTION_PROFILES)}"
+        )
+
 @router.get("/dashboard", response_class=HTMLResponse)
 async def admin_dashboard(request: Request):
     return templates.TemplateResponse("dashboard_admin.html", {"request": request})
@@ -29,6 +41,8 @@ async def create_room(
     # Validate max_sessions
     if room_data.max_sessions is not None and room_data.max_sessions <= 0:
         raise HTTPException(status_code=400, detail="Max sessions must be a positive number")
+    if room_data.transcription_profile is not None:
+        _check_transcription_profile(room_data.transcription_profile)
 
     # Generate unique room code
     room_code = secrets.token_hex(3).upper()
@@ -39,7 +53,8 @@ async def create_room(
         room_code=room_code,
         password=room_data.password,
         admin_id=current_user.id,
-        max_sessions=room_data.max_sessions if room_data.max_sessions is not None else 30
+        max_sessions=room_data.max_sessions if room_data.max_sessions is not None else 30,
+        transcription_profile=room_data.transcription_profile
     )
     session.add(new_room)
     session.commit()
@@ -50,6 +65,7 @@ async def create_room(
         password=new_room.password,
         is_active=new_room.is_active,
         max_sessions=new_room.max_sessions,
+        transcription_profile=resolve_profile(new_room.transcription_profile),
         active_sessions_count=0
     )
 
@@ -72,6 +88,9 @@ async def update_room(
         room.max_sessions = room_data.max_sessions
     if room_data.is_active is not None:
         room.is_active = room_data.is_active
+    if room_data.transcription_profile is not None:
+        _check_transcription_profile(room_data.transcription_profile)
+        room.transcription_profile = room_data.transcription_profile
         
     session.add(room)
     session.commit()
@@ -87,6 +106,7 @@ async def update_room(
         password=room.password,
         is_active=room.is_active,
         max_sessions=room.max_sessions,
+        transcription_profile=resolve_profile(room.transcription_profile),
         active_sessions_count=active_count
     )
 
@@ -136,6 +156,7 @@ async def list_rooms(
             password=r.password,
             is_active=r.is_active,
             max_sessions=r.max_sessions,
+            transcription_profile=resolve_profile(r.transcription_profile),
             active_sessions_count=len([s for s in r.sessions if s.end_time is None])
         ))
     return result
@@ -162,6 +183,29 @@ async def get_all_interview_history(
         })
     return result
 
+@router.get("/metrics")
+async def get_metrics(current_user: User = Depends(get_admin_user)):
+    """In-process counters and histograms (LLM usage, latency, caches)"""
+    return metrics.snapshot()
+
+@router.get("/llm-cache")
+async def get_llm_cache_stats(current_user: User = Depends(get_admin_user)):
+    return llm_cache.stats()
+
+@router.delete("/llm-cache")
+async def invalidate_llm_cache(
+    prompt_version: Optional[str] = None,
+    stale_only: bool = False,
+    current_user: User = Depends(get_admin_user)
+):
+    """Invalidate cached evaluations, e.g. after changing prompts/evaluation.py.
+
+    Without parameters everything is removed; `stale_only` keeps entries for
+    the current PROMPT_VERSION; `prompt_version` removes just that version.
+    """
+    deleted = await asyncio.to_thread(llm_cache.invalidate, prompt_version=prompt_version, stale_only=stale_only)
+    return {"message": "LLM cache invalidated", "deleted": deleted}
+
 # --- User Management Endpoints ---
 
 @router.post("/users", response_model=UserRead)
@@ -1,22 +1,28 @@
 """Interview routes."""
 
+import asyncio
 import json
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 from datetime import datetime
-from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Request, UploadFile, File, Form, Header, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlmodel import Session, select
-from config.database import get_session
-from models.db_models import Question, InterviewResponse, InterviewSession, User
+from config.database import get_session, engine
+from models.db_models import Question, InterviewResponse, InterviewSession, User, ResumeDigest, AudioJob
 from schemas.requests import AnswerRequest
 from auth.dependencies import get_current_user
-from services import interview_service, resume_service
-from services.audio import AudioService
-import uuid
-import os
-
-audio_service = AudioService()
+from services import interview_service, resume_service, audio_jobs
+from services.audio_store import store_recording
+from services.transcription_pool import transcription_pool, TranscriptionOverloaded
+from services.stream_transcription import StreamingTranscription, StreamTooLong
+from services.tts import tts, question_token, valid_question_token
+from services.question_pool import question_pool
+from services.question_index import question_index
+from services.llm_scheduler import SchedulerOverloaded, DeadlineExceeded
+from services.circuit_breaker import CircuitOpen
+from services.idempotency import idempotency, request_hash, IdempotencyKeyReused, IdempotencyKeyBusy
+from config.settings import EVALUATION_MODE, TTS_MAX_CHARS, TTS_VOICES
 
 
 # Initialize templates
@@ -25,134 +31,541 @@ templates = Jinja2Templates(directory="templates")
 # Create router
 router = APIRouter(prefix="/interview", tags=["Interview"])
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _save_response(session_id: int, question: str, answer: str, result: dict, topic: str,
+                   audio_sha256: Optional[str] = None):
+    with Session(engine) as session_db:
+        interview_service.save_interview_response(session_db, session_id, question, answer, result, topic=topic,
+                                                  audio_sha256=audio_sha256)
+
+def _defer_evaluation(session_id: int, question: str, answer: str, topic: str,
+                      audio_sha256: Optional[str] = None) -> dict:
+    with Session(engine) as session_db:
+        return interview_service.defer_evaluation(session_db, session_id, question, answer, topic=topic,
+                                                  audio_sha256=audio_sha256)
+
+def _transcription_profile(session_id: int) -> Optional[str]:
+    with Session(engine) as session_db:
+        return interview_service.session_transcription_profile(session_db, session_id)
+
+async def _evaluation_events(session_id: int, question: str, answer: str, topic: str,
+                             audio_sha256: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """Streams evaluation events and stores the response once the final result is known.
+
+    Uses its own DB session, in a thread, because the request-scoped one
+    may already be closed while the response body is still streaming.
+    """
+    try:
+        async for event, data in interview_service.astream_evaluation(question, answer, mode=EVALUATION_MODE):
+            if event == "result":
+                await asyncio.to_thread(_save_response, session_id, question, answer, data, topic, audio_sha256)
+                yield "result", data
+            else:
+                yield event, {"text": data}
+    except CircuitOpen:
+        # The model is down: keep the answer for the retry queue and let the interview go on
+        result = await asyncio.to_thread(_defer_evaluation, session_id, question, answer, topic, audio_sha256)
+        yield "result", result
+    except (SchedulerOverloaded, DeadlineExceeded) as e:
+        yield "error", {"detail": str(e), "retry_after": e.retry_after}
+    except Exception as e:
+        print(f"Streaming evaluation error: {e}")
+        yield "error", {"detail": "Evaluation failed"}
+
+async def _audio_evaluation_events(session_id: int, question: str, content: bytes, topic: str) -> AsyncIterator[Tuple[str, dict]]:
+    audio_sha256 = await store_recording(content)
+    transcribed_text = await _transcribe_audio(session_id, content)
+    yield "transcription", {"text": transcribed_text}
+    async for event in _evaluation_events(session_id, question, transcribed_text, topic, audio_sha256):
+        yield event
+
+async def _sse_response(events: AsyncIterator[Tuple[str, dict]], wait_for_first: bool = False) -> StreamingResponse:
+    """Relays events as Server-Sent Events.
+
+    With wait_for_first, errors raised before the first event (a failed
+    transcription) are returned as plain HTTP errors instead of in the stream.
+    """
+    first = []
+    if wait_for_first:
+        try:
+            first.append(await events.__anext__())
+        except StopAsyncIteration:
+            pass
+
+    async def body():
+        try:
+            for event, data in first:
+                yield _sse(event, data)
+            async for event, data in events:
+                yield _sse(event, data)
+        except (IdempotencyKeyReused, IdempotencyKeyBusy) as e:
+            yield _sse("error", {"detail": str(e)})
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def _evaluate_and_store(session_id: int, question: str, answer: str, topic: str,
+                              transcription: Optional[str] = None,
+                              audio_sha256: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """Evaluates and stores an answer; yields the endpoint's JSON response as one 'result' event."""
+    try:
+        evaluation_result = await interview_service.aevaluate_answer(question, answer, mode=EVALUATION_MODE)
+    except CircuitOpen:
+        # Model unavailable: save for the retry queue
+        evaluation_result = await asyncio.to_thread(_defer_evaluation, session_id, question, answer, topic, audio_sha256)
+    else:
+        # Use helper to find or create question and store the response
+        await asyncio.to_thread(_save_response, session_id, question, answer, evaluation_result, topic, audio_sha256)
+
+    response = {
+        "feedback": evaluation_result["feedback"],
+        "score": evaluation_result["score"],
+        "follow_up_question": evaluation_result["follow_up_question"],
+        "evaluation_status": evaluation_result.get("evaluation_status", "done")
+    }
+    if transcription is not None:
+        response = {"transcription": transcription, **response}
+    yield "result", response
+
+async def _transcribe_audio(session_id: int, content: bytes) -> str:
+    # The upload is decoded, denoised and transcribed in memory by the
+    # transcription workers; callers store the compressed copy in the background
+    profile = await asyncio.to_thread(_transcription_profile, session_id)
+    transcribed_text = await transcription_pool.transcribe(content, profile=profile)
+    
+    if not transcribed_text:
+        raise HTTPException(status_code=400, detail="Could not transcribe audio")
+    return transcribed_text
+
 @router.get("/", response_class=HTMLResponse)
 async def get_home(request: Request):
     """Serve the main interview page"""
     return templates.TemplateResponse("interview.html", {"request": request})
 
+def _speakable(session_id: int, text: str, signed: bool) -> Optional[str]:
+    """Why text may not be spoken to the session, or None if it may."""
+    with Session(engine) as session_db:
+        interview_session = session_db.get(InterviewSession, session_id)
+        if interview_session is None or interview_session.end_time is not None:
+            return "Session not found or already finished"
+        # Any caller can store a question (see /evaluate-answer), so unsigned text must be a seeded one
+        seeded = select(Question.id).where(Question.content == text, Question.seeded.is_(True)).limit(1)
+        if not signed and session_db.exec(seeded).first() is None:
+            return "Only the questions of this session can be spoken"
+    return None
+
+@router.get("/tts")
+async def question_speech(
+    session_id: int = Query(...),
+    text: str = Query(..., min_length=1, max_length=TTS_MAX_CHARS),
+    token: Optional[str] = Query(None),
+    voice: Optional[str] = Query(None)
+):
+    """Speak a question of an ongoing session: audio streamed as it is synthesized, or from the cache.
+
+    text must be a seeded question, or one sent with the tts_token that
+    /general-questions or /generate-resume-question returned for this
+    session. Seeded questions
+    are usually cached already (see services/tts.py). The X-TTS-Cache
+    header says whether the audio came from the cache.
+    """
+    rejected = await asyncio.to_thread(_speakable, session_id, text, valid_question_token(session_id, text, token))
+    if rejected is not None:
+        raise HTTPException(status_code=403, detail=rejected)
+    if voice is not None and voice not in TTS_VOICES:
+        raise HTTPException(status_code=400, detail=f"Unknown voice, expected one of {', '.join(TTS_VOICES)}")
+    chunks, cached = await tts.stream(text, voice)
+    # Wait for the first chunk, so a synthesizer that is down gives a plain 503
+    try:
+        first = await chunks.__anext__()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Speech synthesis is unavailable, please retry shortly.")
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    headers = {"Cache-Control": "public, max-age=86400", "X-TTS-Cache": "hit" if cached else "miss"}
+    return StreamingResponse(body(), media_type=tts.media_type, headers=headers)
+
 @router.get("/general-questions")
-async def get_general_questions(session: Session = Depends(get_session)):
-    """Return the general coding questions from DB"""
+async def get_general_questions(session_id: Optional[int] = Query(None), session: Session = Depends(get_session)):
+    """Return the general coding questions from DB; with session_id, each carries the tts_token to speak it."""
     questions = session.exec(select(Question)).all()
     # Serialize for frontend
-    return {"questions": [q.dict() for q in questions]}
+    serialized = [q.dict() for q in questions]
+    if session_id is not None:
+        for question in serialized:
+            question["tts_token"] = question_token(session_id, question["content"])
+    return {"questions": serialized}
 
 @router.post("/evaluate-answer")
 async def evaluate_answer(
     request: AnswerRequest, 
     session_id: int, # Pass session_id from frontend query param or body
+    idempotency_key: Optional[str] = Header(None),
     session_db: Session = Depends(get_session)
 ):
-    """Evaluate answer and store result in DB"""
+    """Evaluate answer and store result in DB.
+
+    Retries with the same Idempotency-Key header attach to the running
+    request or get its stored result, without evaluating or storing twice.
+    """
     
     # Verify session
     interview_session = session_db.get(InterviewSession, session_id)
     if not interview_session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    evaluation_result = interview_service.evaluate_answer_content(request.question, request.answer)
-    follow_up = interview_service.generate_followup_question(request.question, request.answer)
-    
-    # Use helper to find or create question
-    db_question = interview_service.get_or_create_question(
-        session_db, 
-        request.question, 
-        topic="Dynamic/Resume"
-    )
-
-    new_response = InterviewResponse(
-        session_id=session_id,
-        question_id=db_question.id,
-        answer_text=request.answer,
-        evaluation_text=evaluation_result["feedback"],
-        score=evaluation_result["score"]
+    events = idempotency.execute(
+        "evaluate-answer", idempotency_key, request_hash(session_id, request.question, request.answer),
+        lambda: _evaluate_and_store(session_id, request.question, request.answer, topic="Dynamic/Resume")
     )
-    
-    session_db.add(new_response)
-    session_db.commit()
-    
-    return {
-        "feedback": evaluation_result["feedback"], 
-        "score": evaluation_result["score"],
-        "follow_up_question": follow_up
-    }
+    return await idempotency.result(events)
 
 @router.post("/submit-audio")
 async def submit_audio(
     session_id: int = Form(...),
     question: str = Form(...),
     audio: UploadFile = File(...),
-    session_db: Session = Depends(get_session)
+    idempotency_key: Optional[str] = Header(None)
 ):
-    # 1. Save Audio
-    os.makedirs("assets/audio/responses", exist_ok=True)
-    audio_filename = f"resp_{session_id}_{uuid.uuid4().hex[:8]}.wav"
-    audio_path = f"assets/audio/responses/{audio_filename}"
-    
+    """Transcribe, evaluate and store a recorded answer.
+
+    Retries with the same Idempotency-Key header don't re-run Whisper or the LLM.
+    """
     content = await audio.read()
-    audio_service.save_audio_blob(content, audio_path)
-    
-    # 2. Transcribe
-    # Clean first?
-    audio_service.cleanup_audio(audio_path)
-    transcribed_text = audio_service.speech_to_text(audio_path)
-    
-    if not transcribed_text:
-        raise HTTPException(status_code=400, detail="Could not transcribe audio")
-        
-    # 3. Evaluate (Reuse existing logic)
-    # 3. Evaluate (Reuse existing logic)
-    evaluation_result = interview_service.evaluate_answer_content(question, transcribed_text)
-    follow_up = interview_service.generate_followup_question(question, transcribed_text)
-    
-    # 4. Save to DB using helper
-    db_question = interview_service.get_or_create_question(
-        session_db, 
-        question, 
-        topic="Audio/Dynamic"
+
+    async def produce():
+        # 1. Save Audio and 2. Transcribe
+        audio_sha256 = await store_recording(content)
+        transcribed_text = await _transcribe_audio(session_id, content)
+        # 3. Evaluate and 4. Save to DB (Reuse existing logic)
+        async for event in _evaluate_and_store(session_id, question, transcribed_text, topic="Audio/Dynamic",
+                                               transcription=transcribed_text, audio_sha256=audio_sha256):
+            yield event
+
+    events = idempotency.execute("submit-audio", idempotency_key, request_hash(session_id, question, content), produce)
+    return await idempotency.result(events)
+
+@router.post("/evaluate-answer/stream")
+async def evaluate_answer_stream(
+    request: AnswerRequest,
+    session_id: int,
+    idempotency_key: Optional[str] = Header(None),
+    session_db: Session = Depends(get_session)
+):
+    """Stream feedback tokens as Server-Sent Events.
+
+    Events: 'token' ({"text"}) while the feedback is generated, then one
+    'result' ({"feedback", "score", "follow_up_question"}) after the
+    response has been stored, or 'error'. A retry with the same
+    Idempotency-Key receives the events of the original request instead.
+    """
+    interview_session = session_db.get(InterviewSession, session_id)
+    if not interview_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    events = idempotency.execute(
+        "evaluate-answer/stream", idempotency_key, request_hash(session_id, request.question, request.answer),
+        lambda: _evaluation_events(session_id, request.question, request.answer, topic="Dynamic/Resume")
     )
+    return await _sse_response(events)
 
-    new_response = InterviewResponse(
-        session_id=session_id,
-        question_id=db_question.id,
-        answer_text=transcribed_text, # Store text
-        evaluation_text=evaluation_result["feedback"],
-        score=evaluation_result["score"]
+@router.post("/submit-audio/stream")
+async def submit_audio_stream(
+    session_id: int = Form(...),
+    question: str = Form(...),
+    audio: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None),
+    session_db: Session = Depends(get_session)
+):
+    """Transcribe the answer, then stream its evaluation as Server-Sent Events.
+
+    Same events as /evaluate-answer/stream, preceded by 'transcription' ({"text"}).
+    """
+    interview_session = session_db.get(InterviewSession, session_id)
+    if not interview_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    content = await audio.read()
+    events = idempotency.execute(
+        "submit-audio/stream", idempotency_key, request_hash(session_id, question, content),
+        lambda: _audio_evaluation_events(session_id, question, content, topic="Audio/Dynamic")
     )
-    
-    session_db.add(new_response)
-    session_db.commit()
-    
-    return {
-        "transcription": transcribed_text,
-        "feedback": evaluation_result["feedback"],
-        "score": evaluation_result["score"],
-        "follow_up_question": follow_up
-    }
+    return await _sse_response(events, wait_for_first=True)
+
+def _stream_session(session_id: int) -> Tuple[bool, Optional[str]]:
+    """Whether the session exists, and its transcription profile."""
+    with Session(engine) as session_db:
+        if not session_db.get(InterviewSession, session_id):
+            return False, None
+        return True, interview_service.session_transcription_profile(session_db, session_id)
+
+async def _close_with_error(websocket: WebSocket, code: int, detail: str, **data):
+    await websocket.send_json({"event": "error", "data": {"detail": detail, **data}})
+    await websocket.close(code=code)
+
+async def _receive_answer(websocket: WebSocket, stream: StreamingTranscription) -> Optional[str]:
+    """Feeds audio messages to the stream until {"type": "end"}; returns a protocol error, if any."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes"):
+            stream.feed(message["bytes"])
+        elif message.get("text"):
+            try:
+                control = json.loads(message["text"])
+            except ValueError:
+                control = None
+            if not isinstance(control, dict):
+                return "Text messages must be JSON objects"
+            if control.get("type") == "end":
+                return None
+
+async def _finish_stream(stream: StreamingTranscription, session_id: int, question: str):
+    """Transcribes the rest of the answer, stores the recording and queues the evaluation events."""
+    try:
+        transcribed_text = await stream.finish()
+    except Exception as e:
+        print(f"Streaming transcription error: {e}")
+        transcribed_text = ""
+    # Building the WAV, hashing and transcoding it all stay off the event loop
+    recording = await asyncio.to_thread(stream.recording)
+    audio_sha256 = await store_recording(recording) if recording else None
+    if not transcribed_text:
+        await stream.events.put(("error", {"detail": "Could not transcribe audio"}))
+        return
+    await stream.events.put(("transcription", {"text": transcribed_text}))
+    async for event in _evaluation_events(session_id, question, transcribed_text, topic="Audio/Dynamic",
+                                          audio_sha256=audio_sha256):
+        await stream.events.put(event)
+
+@router.websocket("/audio-stream")
+async def audio_stream(websocket: WebSocket):
+    """Transcribe an answer while it is spoken, then stream its evaluation.
+
+    The client sends a JSON message {"session_id", "question"}, then binary
+    messages of 16 kHz mono 16-bit little-endian PCM as the candidate speaks,
+    then {"type": "end"}. The server sends JSON messages {"event", "data"}:
+    'partial' ({"index", "text"}) previews of the segment being spoken and
+    'segment' ({"index", "text"}) once a pause closes it, then the events of
+    /submit-audio/stream ('transcription', 'token', 'result' or 'error').
+    Text messages that aren't JSON objects end the connection with an
+    'error' and close code 1003; while the transcription pool is full, the
+    stream is refused with an 'error' carrying retry_after and close code
+    1013.
+    """
+    await websocket.accept()
+    try:
+        start = await websocket.receive_json()
+        session_id, question = int(start["session_id"]), start["question"]
+    except WebSocketDisconnect:
+        return
+    except (KeyError, TypeError, ValueError):
+        await _close_with_error(websocket, 1003, "Expected {\"session_id\", \"question\"} first")
+        return
+    found, profile = await asyncio.to_thread(_stream_session, session_id)
+    if not found:
+        await _close_with_error(websocket, 1008, "Session not found")
+        return
+
+    try:
+        stream = StreamingTranscription(profile)
+    except TranscriptionOverloaded as e:
+        await _close_with_error(websocket, 1013, f"Transcription is busy, retry in {e.retry_after} seconds",
+                                retry_after=e.retry_after)
+        return
+
+    async def relay():
+        while True:
+            item = await stream.events.get()
+            if item is None:
+                return
+            event, data = item
+            await websocket.send_json({"event": event, "data": data})
+
+    sender = asyncio.create_task(relay())
+    try:
+        close_code = 1000
+        try:
+            protocol_error = await _receive_answer(websocket, stream)
+            if protocol_error is None:
+                await _finish_stream(stream, session_id, question)
+            else:
+                await stream.events.put(("error", {"detail": protocol_error}))
+                close_code = 1003
+        except StreamTooLong as e:
+            await stream.events.put(("error", {"detail": str(e)}))
+            close_code = 1009
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            print(f"Audio stream error: {e}")
+            await stream.events.put(("error", {"detail": "Evaluation failed"}))
+            close_code = 1011
+        # Deliver what is queued, then close
+        await stream.events.put(None)
+        await sender
+        await websocket.close(code=close_code)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # However the connection ended, no transcription work or relay task outlives it
+        stream.cancel()
+        sender.cancel()
+
+@router.post("/audio-jobs", status_code=202)
+async def create_audio_job(
+    session_id: int = Form(...),
+    question: str = Form(...),
+    audio: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None),
+    session_db: Session = Depends(get_session)
+):
+    """Queue a recorded answer for evaluation by the audio workers and return its job id right away.
+
+    Follow the job with GET /interview/audio-jobs/{job_id} or its /events stream.
+    """
+    interview_session = session_db.get(InterviewSession, session_id)
+    if not interview_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    content = await audio.read()
+
+    async def produce():
+        job = await asyncio.to_thread(audio_jobs.enqueue, session_id, question, content)
+        yield "result", audio_jobs.job_state(job)
+
+    events = idempotency.execute("audio-jobs", idempotency_key, request_hash(session_id, question, content), produce)
+    return await idempotency.result(events)
+
+@router.get("/audio-jobs/{job_id}")
+async def get_audio_job(job_id: int, session_db: Session = Depends(get_session)):
+    """Current status of an audio job, with the transcription, feedback and follow-up once available."""
+    job = session_db.get(AudioJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return audio_jobs.job_state(job)
+
+@router.get("/audio-jobs/{job_id}/events")
+async def audio_job_events(job_id: int, session_db: Session = Depends(get_session)):
+    """Stream an audio job's progress as Server-Sent Events.
+
+    One event per stage, named after the job status ('transcribing',
+    'transcribed', 'evaluated', then 'done' or 'failed'), carrying the same
+    data as GET /interview/audio-jobs/{job_id}. The stream ends with the job.
+    """
+    if not session_db.get(AudioJob, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_state = None
+        while True:
+            job = await asyncio.to_thread(audio_jobs.get_job, job_id)
+            state = audio_jobs.job_state(job)
+            if state != last_state:
+                yield job.status, state
+                last_state = state
+            if job.status in audio_jobs.FINAL_STATUSES:
+                return
+            await asyncio.sleep(audio_jobs.EVENTS_POLL_SECONDS)
+
+    return await _sse_response(events())
 
 
 @router.post("/generate-resume-question")
 async def generate_resume_question(
     context: Optional[str] = Form(None),
-    resume_text: Optional[str] = Form(None)
+    resume_text: Optional[str] = Form(None),
+    digest_id: Optional[str] = Form(None),
+    session_id: Optional[int] = Form(None),
+    difficulty: Optional[str] = Form(None),
+    session_db: Session = Depends(get_session)
 ):
-    """Generate a question based on resume and a random topic"""
+    """Generate a question based on resume and a random topic.
+
+    The resume is referenced by the digest_id returned from /process-resume
+    (or the session's stored digest). Raw resume_text is still accepted and
+    digested on the fly, so the prompt stays bounded either way.
+
+    With a session_id, questions pre-generated in the background are served
+    first and the buffer is refilled; generation only happens inline when
+    the buffer is empty. If the LLM is unavailable a question-bank question
+    is returned, matching difficulty when given.
+
+    Questions previously generated for a similar resume are served without
+    calling the LLM (see services/question_index.py). With a session_id the
+    response includes a tts_token for /interview/tts.
+    """
     # Ensure strings for the service
     context = context or ""
-    resume_text = resume_text or ""
-    return interview_service.generate_resume_question_content(context, resume_text)
+    digest_id, resume_digest = _resolve_resume_digest(session_db, digest_id, session_id, resume_text)
+
+    if session_id is not None:
+        question_pool.start(session_id, context, resume_digest, digest_id)
+        pooled = question_pool.pop(session_id)
+        if pooled is not None:
+            return {**pooled, "tts_token": question_token(session_id, pooled["question"])}
+
+    result = await interview_service.agenerate_resume_question_content(
+        context, resume_digest, difficulty=difficulty, digest_id=digest_id, session_id=session_id
+    )
+    if session_id is not None:
+        # Lets /interview/tts speak the question although it may not be stored
+        result = {**result, "tts_token": question_token(session_id, result["question"])}
+    return result
+
+def _resolve_resume_digest(session_db: Session, digest_id: Optional[str], session_id: Optional[int], resume_text: Optional[str]) -> Tuple[Optional[str], str]:
+    """Returns (digest id, digest text), or (None, "") without a resume."""
+    if digest_id is None and session_id is not None:
+        interview_session = session_db.get(InterviewSession, session_id)
+        if interview_session:
+            digest_id = interview_session.resume_digest_id
+    if digest_id is not None:
+        digest = session_db.get(ResumeDigest, digest_id)
+        if not digest:
+            raise HTTPException(status_code=404, detail="Resume digest not found")
+        return digest.id, digest.digest
+    if resume_text:
+        digest = resume_service.get_or_create_digest(session_db, resume_text)
+        return digest.id, digest.digest
+    return None, ""
 
 @router.post("/process-resume")
-async def process_resume(resume: UploadFile = File(...)):
-    """Extract text from PDF resume"""
+async def process_resume(
+    resume: UploadFile = File(...),
+    session_id: Optional[int] = Form(None),
+    context: Optional[str] = Form(None),
+    session_db: Session = Depends(get_session)
+):
+    """Extract text from PDF resume, store its digest and start pre-generating questions"""
     extracted_text = await resume_service.extract_text_from_pdf(resume)
-    return {"text": extracted_text}
+    if not extracted_text.strip():
+        return {"text": extracted_text, "digest_id": None}
+
+    digest = resume_service.get_or_create_digest(session_db, extracted_text)
+    if session_id is not None:
+        interview_session = session_db.get(InterviewSession, session_id)
+        if interview_session:
+            interview_session.resume_digest_id = digest.id
+            session_db.add(interview_session)
+            session_db.commit()
+        question_pool.start(session_id, context or "", digest.digest, digest.id)
+    return {"text": extracted_text, "digest_id": digest.id}
 
 @router.post("/ask-custom-prompt")
 async def ask_custom_prompt(request: dict):
     """Answer custom prompt from user"""
     prompt = request.get("prompt", "")
-    response_content = interview_service.get_custom_response(prompt)
+    response_content = await interview_service.aget_custom_response(prompt)
     return {"response": response_content}
 
 @router.post("/finish")
@@ -175,5 +588,7 @@ async def finish_interview(
     session_db.add(interview_session)
     session_db.commit()
     session_db.refresh(interview_session)
+    question_pool.stop(session_id)
+    question_index.forget_session(session_id)
     
     return {"message": "Interview finished", "total_score": total_score}
\ No newline at end of file
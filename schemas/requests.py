@@ -28,12 +28,14 @@ class UserCreate(BaseModel):
 class RoomCreate(BaseModel):
     password: str
     max_sessions: Optional[int] = 30
+    transcription_profile: Optional[str] = None
 
 
 class RoomUpdate(BaseModel):
     password: Optional[str] = None
     max_sessions: Optional[int] = None
     is_active: Optional[bool] = None
+    transcription_profile: Optional[str] = None
 
 # Interview Requests
 class AnswerRequest(BaseModel):
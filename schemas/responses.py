@@ -15,6 +15,7 @@ class RoomRead(BaseModel):
     password: str
     is_active: bool
     max_sessions: Optional[int]
+    transcription_profile: str
     active_sessions_count: int = 0
 
 class SessionRead(BaseModel):
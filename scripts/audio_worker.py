@@ -0,0 +1,38 @@
+"""Standalone worker process for queued audio evaluation jobs.
+
+Runs --concurrency workers that claim jobs from the audiojob table (see
+services/audio_jobs.py). Start as many processes as the STT and LLM capacity
+allows, on any host that shares the database and the assets/audio
+directory, and set AUDIO_JOB_WORKERS=0 on the web tier:
+
+    python scripts/audio_worker.py --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# Recordings are stored relative to the app's working directory
+os.chdir(ROOT)
+
+from services.audio_jobs import run_audio_worker
+from services.token_budget import load_tokenizer
+
+
+async def main(concurrency: int):
+    await asyncio.to_thread(load_tokenizer)
+    print(f"Audio worker started with {concurrency} worker(s)")
+    await asyncio.gather(*(run_audio_worker() for _ in range(concurrency)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs processed at once by this process")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.concurrency))
+    except KeyboardInterrupt:
+        pass
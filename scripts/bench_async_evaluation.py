@@ -0,0 +1,143 @@
+"""Benchmark sequential blocking evaluation vs concurrent async evaluation.
+
+Uses a fake chat model with a fixed latency so the numbers only reflect how
+the handlers schedule the two LLM calls, not the model itself. The LLM
+admission scheduler is sized so every call of every candidate can run at
+once (--max-concurrency to cap it); calls it rejects are counted, not fatal.
+
+    python scripts/bench_async_evaluation.py --candidates 20 --latency 0.5
+    python scripts/bench_async_evaluation.py --candidates 20 --max-concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, List, Optional
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from services import interview_service
+from services.llm_scheduler import llm_scheduler, SchedulerOverloaded
+from prompts.evaluation import evaluation_prompt, followup_prompt
+
+
+class FixedLatencyChatModel(BaseChatModel):
+    """Chat model that sleeps for a fixed time and returns a canned answer."""
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "fixed-latency-fake"
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        text = " ".join(str(m.content) for m in messages)
+        if "JSON" in text:
+            content = json.dumps({"feedback": "Solid answer.", "score": 7.0})
+        else:
+            content = "How would this change under heavy load?"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+async def handler_before(question: str, answer: str):
+    # What the route used to do: two blocking invokes inside an async handler
+    evaluation = interview_service.evaluate_answer_content(question, answer)
+    follow_up = interview_service.generate_followup_question(question, answer)
+    return evaluation, follow_up
+
+
+async def handler_after(question: str, answer: str):
+    try:
+        return await interview_service.aevaluate_answer_with_followup(question, answer)
+    except SchedulerOverloaded:
+        # What the route turns into a 429
+        return None
+
+
+async def run_scenario(handler, candidates: int) -> dict:
+    latencies = []
+    rejected = 0
+    max_loop_lag = 0.0
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        # Measures how long the event loop is unable to serve anything else
+        nonlocal max_loop_lag
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            max_loop_lag = max(max_loop_lag, time.perf_counter() - expected)
+
+    async def candidate(i: int, submitted: float):
+        # Latency is measured from submission, so time spent waiting behind
+        # a blocked event loop counts against the request
+        nonlocal rejected
+        if await handler(f"Question {i}", "My answer") is None:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - submitted)
+
+    monitor = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(candidate(i, wall_start) for i in range(candidates)))
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    await monitor
+
+    latencies.sort()
+    return {
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall,
+        "p50_s": statistics.median(latencies) if latencies else float("nan"),
+        "p95_s": latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan"),
+        "max_s": latencies[-1] if latencies else float("nan"),
+        "max_loop_lag_s": max_loop_lag,
+        "rejected": rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="LLM calls admitted at once; 0 admits all of them (two per candidate)")
+    args = parser.parse_args()
+
+    # The fake model has no capacity limit: by default nothing should queue or be rejected
+    calls = 2 * args.candidates
+    llm_scheduler.max_concurrency = args.max_concurrency or calls
+    llm_scheduler.max_queue = calls
+
+    fake_llm = FixedLatencyChatModel(latency=args.latency)
+    interview_service.evaluation_chain = evaluation_prompt | fake_llm
+    interview_service.followup_chain = followup_prompt | fake_llm
+
+    print(f"{args.candidates} concurrent candidates, fake LLM latency {args.latency:.2f}s per call\n")
+    print(f"{'Mode':<8} {'Wall(s)':>8} {'Req/s':>8} {'p50(s)':>8} {'p95(s)':>8} {'Max(s)':>8} {'LoopLag(s)':>11} {'Rejected':>9}")
+    print("-" * 76)
+    for name, handler in [("before", handler_before), ("after", handler_after)]:
+        r = asyncio.run(run_scenario(handler, args.candidates))
+        print(f"{name:<8} {r['wall_s']:>8.2f} {r['throughput_rps']:>8.2f} {r['p50_s']:>8.2f} "
+              f"{r['p95_s']:>8.2f} {r['max_s']:>8.2f} {r['max_loop_lag_s']:>11.2f} {r['rejected']:>9}")
+
+
+if __name__ == "__main__":
+    main()
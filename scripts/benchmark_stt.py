@@ -0,0 +1,209 @@
+"""Benchmark transcription profiles on answers surrounded by silence.
+
+Transcribes each recording through the same in-memory pipeline as
+submit-audio (decode, VAD trim, noise reduction, Whisper) once per
+transcription profile, with and without VAD, and reports the real-time
+factor: transcription seconds per second of recording, lower is faster.
+
+The default recordings are synthetic: speech-like syllable bursts with
+leading, trailing and mid-answer silence over light background noise. They
+measure speed, not accuracy; pass real answers with --wav to compare text.
+
+    python scripts/benchmark_stt.py --recordings 3 --speech-seconds 10 --silence-seconds 8
+    python scripts/benchmark_stt.py --wav answer1.wav --wav answer2.wav --profiles fast
+
+With --batching, --concurrency recordings are submitted at once through the
+transcription pool, one at a time (STT_BATCH_SIZE=1) and micro-batched, and
+aggregate throughput and per-request latency are compared:
+
+    python scripts/benchmark_stt.py --batching --concurrency 8 --rounds 3 --workers 1
+
+With --denoise, synthetic recordings with clean, moderate and heavy
+background noise are cleaned up with each noise reduction tier, reporting
+CPU time per minute of audio and the tier STT_DENOISE_ADAPTIVE would pick:
+
+    python scripts/benchmark_stt.py --denoise --speech-seconds 40 --silence-seconds 20
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import TRANSCRIPTION_PROFILES, STT_BATCH_SIZE, STT_BATCH_WINDOW_MS
+from services.audio import AudioService, STT_SAMPLE_RATE, DENOISE_TIERS
+from services.transcription_pool import TranscriptionPool
+
+
+# Background noise levels for --denoise (standard deviation, full scale = 1)
+NOISE_LEVELS = {"clean": 0.002, "moderate": 0.015, "noisy": 0.06}
+
+
+def synthetic_recording(speech_seconds: float, silence_seconds: float, seed: int, noise: float = 0.005) -> bytes:
+    """WAV of silence, speech-like bursts with a pause in the middle, then silence, over background noise."""
+    rng = np.random.default_rng(seed)
+    sr = STT_SAMPLE_RATE
+
+    def speech(seconds):
+        t = np.arange(int(seconds * sr)) / sr
+        pitch = rng.uniform(110, 220)
+        envelope = (np.sin(2 * np.pi * rng.uniform(3, 5) * t) > 0).astype(np.float32)
+        voice = sum(np.sin(2 * np.pi * pitch * (i + 1) * t) / (i + 1) for i in range(5))
+        return 0.15 * envelope * voice
+
+    def silence(seconds):
+        return np.zeros(int(seconds * sr))
+
+    signal = np.concatenate([
+        silence(silence_seconds / 2), speech(speech_seconds / 2),
+        silence(2.0), speech(speech_seconds / 2), silence(silence_seconds / 2)
+    ])
+    signal = signal + noise * rng.standard_normal(len(signal))
+    buffer = io.BytesIO()
+    sf.write(buffer, np.clip(signal, -1, 1), sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def run(service: AudioService, recordings: List[bytes], profile: str, vad: bool) -> dict:
+    rtfs, speech_ratios, texts = [], [], []
+    for blob in recordings:
+        start = time.perf_counter()
+        text, audio_seconds, speech_seconds, _ = service.transcribe_blob(blob, profile=profile, vad=vad)
+        elapsed = time.perf_counter() - start
+        rtfs.append(elapsed / audio_seconds)
+        speech_ratios.append(speech_seconds / audio_seconds)
+        texts.append(text)
+    rtfs.sort()
+    return {
+        "rtf_mean": statistics.mean(rtfs),
+        "rtf_p95": rtfs[min(len(rtfs) - 1, int(0.95 * len(rtfs)))],
+        "kept": statistics.mean(speech_ratios),
+        "texts": texts,
+    }
+
+
+async def run_concurrent(recordings: List[bytes], profile: str, args, batch_size: int) -> dict:
+    pool = TranscriptionPool(workers=args.workers, max_queue=args.concurrency, timeout=3600,
+                             cpu_threads=args.threads, batch_size=batch_size,
+                             batch_window=STT_BATCH_WINDOW_MS / 1000)
+    # Worker start-up and model load are not what we measure
+    await pool.transcribe(recordings[0], profile=profile)
+
+    latencies = []
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        async def submit(blob):
+            submitted = time.perf_counter()
+            await pool.transcribe(blob, profile=profile)
+            latencies.append(time.perf_counter() - submitted)
+
+        batch = [recordings[i % len(recordings)] for i in range(args.concurrency)]
+        audio_seconds += sum(sf.info(io.BytesIO(blob)).duration for blob in batch)
+        await asyncio.gather(*(submit(blob) for blob in batch))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "audio_per_second": audio_seconds / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def compare_batching(recordings: List[bytes], profiles: List[str], args):
+    batch_size = max(STT_BATCH_SIZE, 2)
+    print(f"{args.concurrency} concurrent recording(s) x {args.rounds} round(s), {args.workers} worker(s)\n")
+    print(f"{'profile':<10} {'mode':<16} {'rec/s':>7} {'audio s/s':>10} {'p50 s':>7} {'p95 s':>7}")
+    for profile in profiles:
+        for label, size in (("one at a time", 1), (f"batches of {batch_size}", batch_size)):
+            result = asyncio.run(run_concurrent(recordings, profile, args, size))
+            print(f"{profile:<10} {label:<16} {result['throughput']:>7.2f} {result['audio_per_second']:>10.1f} "
+                  f"{result['p50']:>7.2f} {result['p95']:>7.2f}")
+
+
+def compare_denoise(args):
+    service = AudioService()
+    print(f"{args.speech_seconds + args.silence_seconds + 2:.0f} s recordings, CPU seconds per minute of audio\n")
+    print(f"{'noise':<10} {'snr dB':>7} {'adaptive':>9} " + " ".join(f"{tier:>9}" for tier in DENOISE_TIERS))
+    for seed, (label, noise) in enumerate(NOISE_LEVELS.items()):
+        audio = service.decode_blob(synthetic_recording(args.speech_seconds, args.silence_seconds, seed, noise))
+        minutes = len(audio) / STT_SAMPLE_RATE / 60
+        snr = service.estimate_snr(audio)
+        costs = []
+        for tier in DENOISE_TIERS:
+            start = time.process_time()
+            for _ in range(args.rounds):
+                service.denoise(audio, tier=tier)
+            costs.append((time.process_time() - start) / args.rounds / minutes)
+        print(f"{label:<10} {snr:>7.1f} {service.denoise_tier(snr):>9} " + " ".join(f"{cost:>9.3f}" for cost in costs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", type=int, default=3, help="Synthetic recordings to generate")
+    parser.add_argument("--speech-seconds", type=float, default=10.0)
+    parser.add_argument("--silence-seconds", type=float, default=8.0, help="Split between start and end")
+    parser.add_argument("--wav", action="append", default=[], help="Use these recordings instead (repeatable)")
+    parser.add_argument("--profiles", default=",".join(TRANSCRIPTION_PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for Whisper; 0 lets CTranslate2 decide")
+    parser.add_argument("--show-text", action="store_true", help="Print the transcriptions")
+    parser.add_argument("--batching", action="store_true", help="Compare micro-batched and one-at-a-time transcription")
+    parser.add_argument("--concurrency", type=int, default=8, help="With --batching: recordings submitted at once")
+    parser.add_argument("--rounds", type=int, default=3, help="With --batching: times the concurrent burst is repeated")
+    parser.add_argument("--workers", type=int, default=1, help="With --batching: transcription processes; 0 uses a thread")
+    parser.add_argument("--denoise", action="store_true", help="Compare the CPU cost of the noise reduction tiers")
+    args = parser.parse_args()
+
+    if args.denoise:
+        compare_denoise(args)
+        return
+
+    if args.wav:
+        recordings = []
+        for path in args.wav:
+            with open(path, "rb") as f:
+                recordings.append(f.read())
+    else:
+        recordings = [synthetic_recording(args.speech_seconds, args.silence_seconds, seed)
+                      for seed in range(args.recordings)]
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in TRANSCRIPTION_PROFILES]
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(unknown)}")
+
+    if args.batching:
+        compare_batching(recordings, profiles, args)
+        return
+
+    service = AudioService(cpu_threads=args.threads)
+    for profile in profiles:
+        # Model load and first-call overhead are not what we measure
+        service.transcribe_blob(recordings[0], profile=profile)
+
+    print(f"{len(recordings)} recording(s)\n")
+    print(f"{'profile':<10} {'model':<10} {'beam':>4} {'vad':>4} {'kept':>6} {'rtf mean':>9} {'rtf p95':>8}")
+    for profile in profiles:
+        settings = TRANSCRIPTION_PROFILES[profile]
+        for vad in (False, True):
+            result = run(service, recordings, profile, vad)
+            print(f"{profile:<10} {settings['model_size']:<10} {settings['beam_size']:>4} {'on' if vad else 'off':>4} "
+                  f"{result['kept']:>6.0%} {result['rtf_mean']:>9.3f} {result['rtf_p95']:>8.3f}")
+            if args.show_text:
+                for text in result["texts"]:
+                    print(f"    {text!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ def migrate_questions():
         questions = data if isinstance(data, list) else data.get('questions', [])
 
     with Session(engine) as session:
-        count = 0
+        count = marked = 0
         for q_data in questions:
             # Check if exists
             stmt = select(Question).where(Question.content == q_data['question'])
@@ -34,13 +34,19 @@ def migrate_questions():
                 new_q = Question(
                     content=q_data['question'],
                     topic=q_data.get('topic', 'General'),
-                    difficulty=q_data.get('difficulty', 'Medium')
+                    difficulty=q_data.get('difficulty', 'Medium'),
+                    seeded=True
                 )
                 session.add(new_q)
                 count += 1
+            elif not existing.seeded:
+                # The question bank is seeded content, however the row got there first
+                existing.seeded = True
+                session.add(existing)
+                marked += 1
         
         session.commit()
-        print(f"Migrated {count} new questions.")
+        print(f"Migrated {count} new questions and marked {marked} existing ones as seeded.")
 
 if __name__ == "__main__":
     migrate_questions()
@@ -0,0 +1,105 @@
+"""Minimal HTTP server imitating the Ollama API, for testing without a model.
+
+Implements GET /api/tags, GET /api/version and POST /api/chat (streaming and
+non-streaming). Replies are canned, with a configurable latency and failure
+rate, so several instances can stand in for a pool of Ollama hosts:
+
+    python scripts/ollama_stub.py --port 11501 --latency 0.2
+    python scripts/ollama_stub.py --port 11502 --fail-rate 1.0
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _reply_for(messages) -> str:
+    text = " ".join(m.get("content", "") for m in messages)
+    if "follow_up_question" in text:
+        return json.dumps({"feedback": "Clear explanation.", "score": 7, "follow_up_question": "How would you test it?"})
+    if "JSON" in text:
+        return json.dumps({"feedback": "Clear explanation with a good example.", "score": 7})
+    return "How would you design a rate limiter for a public API?"
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    # Set per server in make_stub_server
+    latency = 0.0
+    fail_rate = 0.0
+    model = "qwen2.5-coder:3b"
+    name = "stub"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json(200, {"models": [{"name": self.model, "model": self.model}]})
+        elif self.path == "/api/version":
+            self._json(200, {"version": "0.0.0-stub"})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._json(404, {"error": "not found"})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.requests_served += 1
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self._json(500, {"error": "stub failure"})
+            return
+
+        content = _reply_for(request.get("messages", []))
+        base = {"model": request.get("model", self.model), "created_at": datetime.now(timezone.utc).isoformat()}
+        final = {**base, "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop",
+                 "total_duration": int(self.latency * 1e9), "prompt_eval_count": 50, "eval_count": len(content.split())}
+
+        if not request.get("stream", True):
+            final["message"]["content"] = content
+            self._json(200, final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for word in content.split(" "):
+            chunk = {**base, "message": {"role": "assistant", "content": word + " "}, "done": False}
+            self.wfile.write((json.dumps(chunk) + "\n").encode())
+        self.wfile.write((json.dumps(final) + "\n").encode())
+
+
+def make_stub_server(port: int, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    handler = type("Handler", (OllamaStubHandler,), {"latency": latency, "fail_rate": fail_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.requests_served = 0
+    return server
+
+
+def start_stub_server(port: int, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Starts a stub in a daemon thread and returns it; call shutdown() to stop."""
+    server = make_stub_server(port, latency, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama API server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering /api/chat")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of /api/chat calls answered with HTTP 500")
+    args = parser.parse_args()
+    print(f"Ollama stub listening on http://127.0.0.1:{args.port}")
+    make_stub_server(args.port, args.latency, args.fail_rate).serve_forever()
@@ -0,0 +1,214 @@
+"""Re-score stored interview responses after a prompt or model change.
+
+Only feedback and scores are recomputed: answers go through the local
+pre-screen and then the evaluation chain alone, never the follow-up chain.
+
+Streams InterviewResponse rows in id order with a server-side cursor,
+evaluates each batch at bounded concurrency, writes the new feedback and
+scores with one bulk UPDATE per batch and finally recomputes every finished
+session's total_score with a single aggregate UPDATE.
+
+Progress is checkpointed after each batch, so an interrupted run continues
+where it stopped:
+
+    python scripts/rescore_responses.py --batch-size 100 --concurrency 4
+    python scripts/rescore_responses.py --restart --no-cache
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Iterator, Optional
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import update, func
+from sqlmodel import Session, select
+
+from config.database import engine
+from config.settings import LLM_MAX_CONCURRENCY
+from models.db_models import InterviewResponse, InterviewSession, Question
+from services import interview_service
+from services.circuit_breaker import CircuitOpen
+from services.llm_cache import llm_cache
+from services.prescreen import prescreen_answer
+from services.token_budget import load_tokenizer
+
+DEFAULT_CHECKPOINT = "rescore_checkpoint.json"
+
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"last_id": 0, "rescored": 0, "failed_ids": [], "done": False}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+async def evaluate(question: str, answer: str) -> dict:
+    """Feedback and score of an answer, without generating a follow-up question."""
+    screened = prescreen_answer(question, answer)
+    if screened is not None:
+        return screened
+    # Answers evaluated by the app in separate mode have the evaluation chain's result cached
+    cached = await llm_cache.aget("answer:separate", question, answer)
+    if cached is not None:
+        return cached
+    usage = {"tokens": 0}
+    result = await interview_service.aevaluate_answer_content(question, answer, usage)
+    return {**result, "model": usage.get("models", {}).get("evaluation")}
+
+
+async def rescore_batch(rows: list, semaphore: asyncio.Semaphore) -> tuple:
+    """Evaluates a batch; returns (update parameters, failed response ids)."""
+    async def one(row):
+        async with semaphore:
+            try:
+                result = await evaluate(row.question, row.answer_text)
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                print(f"Error re-scoring response {row.id}: {e}")
+                return row.id, None
+            return row.id, result
+
+    updates, failed = [], []
+    for response_id, result in await asyncio.gather(*(one(row) for row in rows)):
+        if result is None:
+            failed.append(response_id)
+            continue
+        updates.append({
+            "id": response_id,
+            "evaluation_text": result["feedback"],
+            "score": result["score"],
+            "model_name": result.get("model"),
+            "evaluation_status": "done",
+        })
+    return updates, failed
+
+
+def _rows_statement(after_id: int):
+    return (
+        select(InterviewResponse.id, InterviewResponse.answer_text, Question.content.label("question"))
+        .join(Question, Question.id == InterviewResponse.question_id)
+        .where(InterviewResponse.id > after_id)
+        .order_by(InterviewResponse.id)
+    )
+
+
+def iter_batches(after_id: int, batch_size: int, limit: Optional[int]) -> Iterator[list]:
+    """Yields batches of (id, answer_text, question) rows in id order.
+
+    Postgres streams them through one server-side cursor. SQLite has no
+    server-side cursors and an open read would block the score writes, so
+    there each batch is its own keyset query.
+    """
+    if engine.dialect.supports_server_side_cursors:
+        statement = _rows_statement(after_id).execution_options(stream_results=True, yield_per=batch_size)
+        if limit is not None:
+            statement = statement.limit(limit)
+        # Writes go through their own session while this cursor stays open
+        with Session(engine) as read_session:
+            yield from read_session.exec(statement).partitions(batch_size)
+        return
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        with Session(engine) as read_session:
+            batch = read_session.exec(_rows_statement(after_id).limit(size)).all()
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1].id
+        if remaining is not None:
+            remaining -= len(batch)
+
+
+def recompute_session_totals() -> int:
+    """One UPDATE ... SET total_score = (SELECT SUM(score) ...) over all finished sessions."""
+    total = (
+        select(func.coalesce(func.sum(InterviewResponse.score), 0.0))
+        .where(InterviewResponse.session_id == InterviewSession.id)
+        .scalar_subquery()
+    )
+    with Session(engine) as session:
+        result = session.exec(
+            update(InterviewSession)
+            .where(InterviewSession.end_time.is_not(None))
+            .values(total_score=total)
+        )
+        session.commit()
+        return result.rowcount
+
+
+async def rescore(batch_size: int, concurrency: int, checkpoint_path: str, limit: Optional[int]):
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint["done"]:
+        print(f"Checkpoint {checkpoint_path} is already complete; pass --restart to re-score again")
+        return
+
+    # Load the tokenizer up front so it doesn't count against the first batch
+    load_tokenizer()
+    semaphore = asyncio.Semaphore(concurrency)
+    print(f"Re-scoring from response id > {checkpoint['last_id']} (batch={batch_size}, concurrency={concurrency})")
+    start = time.perf_counter()
+    rows_this_run = 0
+    for batch in iter_batches(checkpoint["last_id"], batch_size, limit):
+        try:
+            updates, failed = await rescore_batch(batch, semaphore)
+        except CircuitOpen:
+            # Leave the checkpoint before this batch so a later run picks it up again
+            print(f"LLM unavailable, stopping after id {checkpoint['last_id']}; run again to resume")
+            return
+        if updates:
+            with Session(engine) as write_session:
+                write_session.execute(update(InterviewResponse), updates)
+                write_session.commit()
+
+        rows_this_run += len(batch)
+        checkpoint["last_id"] = batch[-1].id
+        checkpoint["rescored"] += len(updates)
+        checkpoint["failed_ids"].extend(failed)
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = time.perf_counter() - start
+        print(f"  up to id {checkpoint['last_id']}: {rows_this_run} rows, {len(failed)} failed in batch, "
+              f"{rows_this_run / elapsed:.1f} rows/s")
+
+    sessions = recompute_session_totals()
+    checkpoint["done"] = limit is None
+    save_checkpoint(checkpoint_path, checkpoint)
+
+    elapsed = time.perf_counter() - start
+    rate = rows_this_run / elapsed if elapsed else 0.0
+    print(f"Done: {rows_this_run} rows in {elapsed:.1f}s ({rate:.1f} rows/s), "
+          f"{checkpoint['rescored']} re-scored in total, {len(checkpoint['failed_ids'])} failed, "
+          f"{sessions} session totals recomputed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=LLM_MAX_CONCURRENCY, help="Evaluations in flight at once")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--limit", type=int, default=None, help="Only re-score this many rows (leaves the checkpoint resumable)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the first response")
+    parser.add_argument("--no-cache", action="store_true", help="Don't serve evaluations from the LLM cache")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    if args.no_cache:
+        llm_cache.enabled = False
+    asyncio.run(rescore(args.batch_size, args.concurrency, args.checkpoint, args.limit))
@@ -2,28 +2,30 @@ from sqlmodel import Session, select
 from config.database import engine, create_db_and_tables
 from models.db_models import Question
 
+DEFAULT_QUESTIONS = [
+    Question(content="Explain the difference between a process and a thread.", topic="Operating Systems", difficulty="Medium"),
+    Question(content="What is ACID in database systems? Explain each property.", topic="Databases", difficulty="Medium"),
+    Question(content="Describe the concept of RESTful APIs.", topic="Web Development", difficulty="Easy"),
+    Question(content="How does garbage collection work in Python (or your preferred language)?", topic="Programming Languages", difficulty="Hard"),
+    Question(content="Explain the time complexity of QuickSort in the worst usage.", topic="Algorithms", difficulty="Medium")
+]
+
 def seed_questions():
+    """Adds the default questions, marked as seeded; existing copies are only marked."""
     with Session(engine) as session:
-        # Check if questions exist
-        existing = session.exec(select(Question)).first()
-        if existing:
-            print("Questions already exist in the database.")
-            return
+        added = marked = 0
+        for default in DEFAULT_QUESTIONS:
+            existing = session.exec(select(Question).where(Question.content == default.content)).first()
+            if existing is None:
+                session.add(Question(content=default.content, topic=default.topic, difficulty=default.difficulty, seeded=True))
+                added += 1
+            elif not existing.seeded:
+                existing.seeded = True
+                session.add(existing)
+                marked += 1
 
-        print("Seeding default questions...")
-        questions = [
-            Question(content="Explain the difference between a process and a thread.", topic="Operating Systems", difficulty="Medium"),
-            Question(content="What is ACID in database systems? Explain each property.", topic="Databases", difficulty="Medium"),
-            Question(content="Describe the concept of RESTful APIs.", topic="Web Development", difficulty="Easy"),
-            Question(content="How does garbage collection work in Python (or your preferred language)?", topic="Programming Languages", difficulty="Hard"),
-            Question(content="Explain the time complexity of QuickSort in the worst usage.", topic="Algorithms", difficulty="Medium")
-        ]
-        
-        for q in questions:
-            session.add(q)
-        
         session.commit()
-        print(f"Successfully added {len(questions)} questions.")
+        print(f"Successfully added {added} questions and marked {marked} existing ones as seeded.")
 
 if __name__ == "__main__":
     create_db_and_tables()
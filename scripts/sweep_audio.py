@@ -0,0 +1,37 @@
+"""Delete or archive the recordings of old interview sessions now.
+
+Runs the same retention sweep as the app's background task (see
+services/audio_store.py), for cron jobs or one-off clean-ups with other
+settings than the running app:
+
+    python scripts/sweep_audio.py --days 30
+    python scripts/sweep_audio.py --days 180 --action archive --batch-size 1000
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import AUDIO_RETENTION_DAYS, AUDIO_RETENTION_ACTION, AUDIO_RETENTION_BATCH_SIZE
+from services.audio_store import sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=AUDIO_RETENTION_DAYS,
+                        help="Keep recordings used by sessions started within this many days")
+    parser.add_argument("--action", choices=("delete", "archive"), default=AUDIO_RETENTION_ACTION)
+    parser.add_argument("--batch-size", type=int, default=AUDIO_RETENTION_BATCH_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+    if args.days <= 0:
+        parser.error("--days must be positive")
+
+    result = sweep(days=args.days, action=args.action, batch_size=args.batch_size)
+    print(f"{args.action.capitalize()}d {result['recordings']} recording(s) in {result['batches']} batch(es) "
+          f"and {result['legacy_files']} legacy file(s); {result['bytes_reclaimed'] / 1e6:.1f} MB reclaimed")
+
+
+if __name__ == "__main__":
+    main()
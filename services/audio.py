@@ -1,13 +1,26 @@
+import bisect
+import io
 import os
 import asyncio
+import time
 import edge_tts
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+    from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
 except ImportError:
     WhisperModel = None
+    BatchedInferencePipeline = None
+    decode_audio = None
+    get_speech_timestamps = None
 
 import numpy as np
 
+from config.settings import (
+    STT_MODEL_SIZE, STT_VAD_ENABLED, STT_VAD_MIN_SILENCE_MS, STT_PROFILE, TRANSCRIPTION_PROFILES,
+    STT_LANGUAGE, STT_DENOISE_ADAPTIVE, STT_DENOISE_SKIP_SNR_DB, STT_DENOISE_SPECTRAL_SNR_DB, STT_HIGHPASS_CUTOFF_HZ,
+    STT_BATCH_SIZE
+)
+
 try:
     import torch
 except ImportError:
@@ -34,32 +47,61 @@ try:
 except ImportError:
     nr = None
 
+# Whisper expects 16 kHz mono float32
+STT_SAMPLE_RATE = 16000
+
+# Whisper decodes 30 s windows; recordings are cut into pieces no longer than this
+WHISPER_WINDOW_SECONDS = 30
+
+# Noise reduction tiers, cheapest first (see AudioService.denoise)
+DENOISE_TIERS = ("none", "highpass", "spectral")
+
+# CPU seconds of spectral gating per second of audio, until measured
+DEFAULT_SPECTRAL_COST = 0.004
+
+
+def resolve_profile(name):
+    """Transcription profile to use for name; unknown or unset names get STT_PROFILE."""
+    return name if name in TRANSCRIPTION_PROFILES else STT_PROFILE
+
 
 class AudioService:
-    def __init__(self, stt_model_size="base"):
+    def __init__(self, stt_model_size="base", cpu_threads=0):
         print(f"Initializing AudioService (Lazy Loading enabled)...")
         self.stt_model_size = stt_model_size
+        self.cpu_threads = cpu_threads  # 0 lets CTranslate2 decide
         self.female_voice = "en-US-AvaNeural"
         
-        self._stt_model = None
+        self._stt_models = {}
+        self._batched_pipelines = {}
+        self._highpass = None
+        self._spectral_cost = DEFAULT_SPECTRAL_COST
 
     @property
     def stt_model(self):
-        if self._stt_model is None:
+        return self.get_stt_model(self.stt_model_size)
+
+    def get_stt_model(self, model_size):
+        """Whisper model of the given size; each size is loaded once, on first use."""
+        if model_size not in self._stt_models:
             if WhisperModel is None:
                 print("Audio dependencies (Whisper) missing. STT disabled.")
                 return None
-            print(f"Loading Whisper Model ({self.stt_model_size})...")
-            self._stt_model = WhisperModel(
-                self.stt_model_size,
+            print(f"Loading Whisper Model ({model_size})...")
+            self._stt_models[model_size] = WhisperModel(
+                model_size,
                 device="cpu",
-                compute_type="int8"
+                compute_type="int8",
+                cpu_threads=self.cpu_threads
             )
-        return self._stt_model
+        return self._stt_models[model_size]
 
     async def text_to_speech(self, text, output_path):
-        communicate = edge_tts.Communicate(text, self.female_voice)
-        await communicate.save(output_path)
+        """Writes text as speech to output_path, through the TTS cache (services/tts.py)."""
+        # Imported here: transcription worker processes load this module and never speak
+        from services.tts import tts
+        audio = await tts.synthesize(text, self.female_voice)
+        self.save_audio_blob(audio, output_path)
         return output_path
 
     # ---------- WINDOWS SAFE AUDIO ----------
@@ -86,23 +128,34 @@ class AudioService:
     def cleanup_audio(self, audio_path):
         try:
             audio, sr = self.load_audio(audio_path)
-            if nr is None:
-                print("Audio dependencies (noisereduce) missing. Skipping cleanup.")
-                return audio_path
-            
-            reduced = nr.reduce_noise(y=audio, sr=sr, prop_decrease=0.8)
-            self.save_audio(reduced, sr, audio_path)
+            reduced, info = self.denoise(audio, sr)
+            if info["tier"] != "none":
+                self.save_audio(reduced, sr, audio_path)
             return audio_path
         except Exception as e:
             print(f"Audio Cleanup Error: {e}")
             return audio_path
 
-    def speech_to_text(self, audio_path):
-        if not os.path.exists(audio_path):
+    def _decoding_options(self, profile):
+        if profile is None:
+            return self.stt_model_size, 5
+        settings = TRANSCRIPTION_PROFILES[resolve_profile(profile)]
+        return settings["model_size"], settings["beam_size"]
+
+    def speech_to_text(self, audio, profile=None):
+        """Transcribes a file path or a 16 kHz float32 array.
+
+        profile names an entry of TRANSCRIPTION_PROFILES; without one this
+        service's model is used with beam search.
+        """
+        if isinstance(audio, str) and not os.path.exists(audio):
             return ""
 
+        model_size, beam_size = self._decoding_options(profile)
         try:
-            segments, _ = self.stt_model.transcribe(audio_path, beam_size=5)
+            segments, _ = self.get_stt_model(model_size).transcribe(
+                audio, beam_size=beam_size, language=STT_LANGUAGE or None
+            )
             text = " ".join(seg.text for seg in segments).strip()
             print(f"Transcribed: {text}")
             return text
@@ -110,8 +163,231 @@ class AudioService:
             print(f"STT Error: {e}")
             return ""
 
+    def speech_to_text_batch(self, recordings, profile=None):
+        """Transcribes several recordings in one batched Whisper pass.
+
+        Each recording is a list of 16 kHz pieces of at most
+        WHISPER_WINDOW_SECONDS (see prepare_audio). The pieces are laid end to
+        end and decoded together by BatchedInferencePipeline, one piece per
+        batch slot and at most STT_BATCH_SIZE pieces per forward pass, so long
+        answers don't grow the pass; segments are mapped back to their
+        recording by offset.
+        Returns one text per recording, "" for those without pieces.
+        """
+        if BatchedInferencePipeline is None or sum(1 for pieces in recordings if pieces) < 2:
+            return [self.speech_to_text(np.concatenate(pieces), profile) if pieces else "" for pieces in recordings]
+
+        model_size, beam_size = self._decoding_options(profile)
+        clips, owners, starts, offset = [], [], [], 0.0
+        for index, pieces in enumerate(recordings):
+            for piece in pieces:
+                duration = len(piece) / STT_SAMPLE_RATE
+                clips.append({"start": offset, "end": offset + duration})
+                owners.append(index)
+                starts.append(offset)
+                offset += duration
+        audio = np.concatenate([piece for pieces in recordings for piece in pieces])
+
+        texts = [[] for _ in recordings]
+        try:
+            if model_size not in self._batched_pipelines:
+                self._batched_pipelines[model_size] = BatchedInferencePipeline(self.get_stt_model(model_size))
+            segments, _ = self._batched_pipelines[model_size].transcribe(
+                audio, clip_timestamps=clips, batch_size=min(len(clips), max(STT_BATCH_SIZE, 1)), beam_size=beam_size,
+                language=STT_LANGUAGE or None
+            )
+            for seg in segments:
+                # Segment times are rounded to the millisecond
+                clip = max(bisect.bisect_right(starts, seg.start + 0.001) - 1, 0)
+                texts[owners[clip]].append(seg.text)
+        except Exception as e:
+            print(f"STT Error: {e}")
+            return ["" for _ in recordings]
+        texts = [" ".join(parts).strip() for parts in texts]
+        print(f"Transcribed batch of {len(recordings)}: {texts}")
+        return texts
+
+    # ---------- IN-MEMORY PIPELINE ----------
+    def decode_blob(self, blob, target_sr=STT_SAMPLE_RATE):
+        """Decodes an uploaded recording into a mono float32 array at target_sr.
+
+        WAV/FLAC/OGG are read by soundfile; anything else (e.g. the WebM
+        MediaRecorder produces) goes through PyAV, which faster-whisper ships with.
+        Audio that is already a decoded array at target_sr is returned as is.
+        """
+        if isinstance(blob, np.ndarray):
+            return blob
+        if sf is not None:
+            try:
+                audio, sr = sf.read(io.BytesIO(blob), dtype="float32")
+                if audio.ndim > 1:
+                    audio = audio.mean(axis=1)
+                if sr != target_sr and resampy is not None:
+                    audio = resampy.resample(audio, sr, target_sr)
+                    sr = target_sr
+                if sr == target_sr:
+                    return audio.astype(np.float32, copy=False)
+            except Exception:
+                pass
+        if decode_audio is None:
+            raise ValueError("Unsupported audio format")
+        return decode_audio(io.BytesIO(blob), sampling_rate=target_sr)
+
+    # ---------- ADAPTIVE NOISE REDUCTION ----------
+    def estimate_snr(self, audio, sr=STT_SAMPLE_RATE):
+        """Rough signal-to-noise ratio in dB: loudness of the loud 20 ms frames
+        (speech) over the quiet ones (noise floor). Cheap enough to run on every recording."""
+        frame = sr // 50
+        frames = len(audio) // frame
+        if frames < 10:
+            return float("inf")
+        rms = np.sqrt(np.mean(np.square(audio[:frames * frame].reshape(frames, frame)), axis=1)) + 1e-10
+        noise, speech = np.percentile(rms, [10, 95])
+        return float(20 * np.log10(speech / noise))
+
+    def denoise_tier(self, snr):
+        """'none' for clean recordings, 'highpass' for some noise, 'spectral' gating for noisy ones."""
+        if not STT_DENOISE_ADAPTIVE:
+            return "spectral"
+        if snr >= STT_DENOISE_SKIP_SNR_DB:
+            return "none"
+        if snr >= STT_DENOISE_SPECTRAL_SNR_DB:
+            return "highpass"
+        return "spectral"
+
+    def high_pass(self, audio, sr=STT_SAMPLE_RATE):
+        """Butterworth high-pass at STT_HIGHPASS_CUTOFF_HZ: removes rumble and hum, leaves speech alone."""
+        if butter is None:
+            return audio
+        if self._highpass is None or self._highpass[0] != sr:
+            self._highpass = (sr, butter(4, STT_HIGHPASS_CUTOFF_HZ, btype="highpass", fs=sr))
+        b, a = self._highpass[1]
+        return lfilter(b, a, audio).astype(np.float32, copy=False)
+
+    def reduce_noise(self, audio, sr=STT_SAMPLE_RATE):
+        """Spectral gating (noisereduce), the most thorough and most expensive tier."""
+        if nr is None:
+            print("Audio dependencies (noisereduce) missing. Skipping cleanup.")
+            return audio
+        try:
+            return nr.reduce_noise(y=audio, sr=sr, prop_decrease=0.8).astype(np.float32, copy=False)
+        except Exception as e:
+            print(f"Audio Cleanup Error: {e}")
+            return audio
+
+    def denoise(self, audio, sr=STT_SAMPLE_RATE, tier=None):
+        """Cleans up a whole recording with the tier its SNR calls for.
+
+        Runs before VAD trims the pauses: the SNR and spectral gating's noise
+        profile both come from the quiet frames, which trimmed audio lacks.
+        tier forces a tier. Returns (audio, {"tier", "snr", "cpu_seconds",
+        "saved_seconds"}); saved_seconds estimates the CPU time spectral
+        gating would have taken on top.
+        """
+        started = time.process_time()
+        snr = self.estimate_snr(audio, sr)
+        tier = tier or self.denoise_tier(snr)
+        if tier == "spectral":
+            audio = self.reduce_noise(audio, sr)
+        elif tier == "highpass":
+            audio = self.high_pass(audio, sr)
+        cpu_seconds = time.process_time() - started
+
+        seconds = len(audio) / sr
+        if tier == "spectral" and seconds > 0:
+            # Running estimate of what spectral gating costs on this machine
+            self._spectral_cost = 0.8 * self._spectral_cost + 0.2 * cpu_seconds / seconds
+        saved = max(self._spectral_cost * seconds - cpu_seconds, 0.0) if tier != "spectral" else 0.0
+        print(f"Denoise: {tier} (SNR {snr:.1f} dB), {cpu_seconds * 1000:.0f} ms CPU, ~{saved * 1000:.0f} ms saved")
+        return audio, {"tier": tier, "snr": snr, "cpu_seconds": cpu_seconds, "saved_seconds": saved}
+
+    def split_fixed(self, audio, sr=STT_SAMPLE_RATE):
+        """audio cut into consecutive pieces of WHISPER_WINDOW_SECONDS."""
+        step = WHISPER_WINDOW_SECONDS * sr
+        return [audio[i:i + step] for i in range(0, len(audio), step)]
+
+    def speech_timestamps(self, audio, max_speech_seconds=WHISPER_WINDOW_SECONDS - 1, sr=STT_SAMPLE_RATE):
+        """Sample ranges ({"start", "end"}) of the speech in audio found by Silero VAD.
+
+        Pauses shorter than STT_VAD_MIN_SILENCE_MS don't split speech, longer
+        speech than max_speech_seconds is split. None if VAD is unavailable.
+        """
+        if get_speech_timestamps is None:
+            return None
+        try:
+            return get_speech_timestamps(
+                audio,
+                VadOptions(min_silence_duration_ms=STT_VAD_MIN_SILENCE_MS, max_speech_duration_s=max_speech_seconds),
+                sampling_rate=sr
+            )
+        except Exception as e:
+            print(f"VAD Error: {e}")
+            return None
+
+    def split_speech(self, audio, sr=STT_SAMPLE_RATE, chunks=None):
+        """Only the speech in audio (Silero VAD), as pieces of at most
+        WHISPER_WINDOW_SECONDS cut at pauses; [] if there is none.
+
+        chunks are speech_timestamps found earlier, e.g. before denoising.
+        """
+        if chunks is None:
+            chunks = self.speech_timestamps(audio, sr=sr)
+        if chunks is None:
+            return self.split_fixed(audio, sr)
+        if not chunks:
+            return []
+        pieces, _ = collect_chunks(audio, chunks, sampling_rate=sr, max_duration=WHISPER_WINDOW_SECONDS)
+        return [piece for piece in pieces if len(piece)]
+
+    def prepare_audio(self, blob, denoise=True, vad=STT_VAD_ENABLED):
+        """Decodes, cleans up and trims a recording without touching the disk.
+
+        Returns (pieces, audio seconds, denoise info): the audio Whisper
+        should hear, as pieces of at most WHISPER_WINDOW_SECONDS, and what
+        denoise did (None if it didn't run). No pieces if the recording can't
+        be decoded or has no speech.
+
+        VAD finds the speech first, so silent recordings skip denoising, but
+        the pauses are only cut after the whole recording was denoised.
+        """
+        try:
+            audio = self.decode_blob(blob)
+        except Exception as e:
+            print(f"Audio Decode Error: {e}")
+            return [], 0.0, None
+        audio_seconds = len(audio) / STT_SAMPLE_RATE
+        chunks = self.speech_timestamps(audio) if vad else None
+        if chunks == [] or not len(audio):
+            return [], audio_seconds, None
+        info = None
+        if denoise:
+            audio, info = self.denoise(audio)
+        pieces = self.split_speech(audio, chunks=chunks) if chunks is not None else self.split_fixed(audio)
+        return pieces, audio_seconds, info
+
+    def transcribe_blobs(self, blobs, denoise=True, profile=None, vad=STT_VAD_ENABLED):
+        """Transcribes recordings given as bytes, batched when there are several.
+
+        Returns (text, audio seconds, speech seconds, denoise info) per
+        recording; recordings without speech are neither denoised nor transcribed.
+        """
+        prepared = [self.prepare_audio(blob, denoise, vad) for blob in blobs]
+        texts = self.speech_to_text_batch([pieces for pieces, _, _ in prepared], profile)
+        return [
+            (text, audio_seconds, sum(len(piece) for piece in pieces) / STT_SAMPLE_RATE, info)
+            for text, (pieces, audio_seconds, info) in zip(texts, prepared)
+        ]
+
+    def transcribe_blob(self, blob, denoise=True, profile=None, vad=STT_VAD_ENABLED):
+        """transcribe_blobs for a single recording."""
+        return self.transcribe_blobs([blob], denoise, profile, vad)[0]
+
     def save_audio_blob(self, blob, output_path):
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, "wb") as f:
             f.write(blob)
         return output_path
+
+
+# Shared by the routes and the audio job workers, so Whisper is loaded once per process
+audio_service = AudioService(STT_MODEL_SIZE)
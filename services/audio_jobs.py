@@ -0,0 +1,257 @@
+"""Durable queue for asynchronous audio answer evaluation.
+
+POST /interview/audio-jobs stores the recording and an AudioJob row and
+returns immediately. Workers claim queued rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can run, in the web
+process (AUDIO_JOB_WORKERS) or as separate processes
+(scripts/audio_worker.py), sizing STT and LLM capacity independently of the
+web tier. Each stage is written to the row as it completes:
+
+    queued -> transcribing -> transcribed -> evaluated -> done
+                                                       -> failed
+
+Clients poll GET /interview/audio-jobs/{id} or follow its /events SSE
+stream. A job whose worker dies is claimed again once its lease of
+AUDIO_JOB_LEASE_SECONDS runs out; a finished transcription is not redone,
+and the answer is saved in the same transaction that marks the job done, so
+it is never saved twice.
+Workers in other processes need the same assets/audio directory (a shared
+volume) as the web tier. The uploaded file is only kept until the job
+finishes; the answer links to its compressed copy (services/audio_store.py).
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, and_
+from sqlmodel import Session, select
+
+from config.database import engine
+from config.settings import (
+    EVALUATION_MODE, AUDIO_JOB_POLL_SECONDS, AUDIO_JOB_LEASE_SECONDS, AUDIO_JOB_MAX_ATTEMPTS
+)
+from models.db_models import AudioJob
+from services import interview_service, metrics, audio_store
+from services.audio import audio_service
+from services.circuit_breaker import CircuitOpen
+from services.transcription_pool import transcription_pool
+
+AUDIO_DIR = "assets/audio/responses"
+
+# Statuses of a job a worker is holding; past the lease they can be claimed again
+ACTIVE_STATUSES = ("transcribing", "transcribed", "evaluated")
+FINAL_STATUSES = ("done", "failed")
+
+# How often the /events stream re-reads a job
+EVENTS_POLL_SECONDS = 0.5
+
+_busy_workers = 0
+
+
+class TranscriptionFailed(Exception):
+    """The recording produced no text; retrying won't help."""
+
+
+def enqueue(session_id: int, question: str, content: bytes, topic: str = "Audio/Dynamic") -> AudioJob:
+    """Stores the recording and queues it for a worker.
+
+    Blocking (file write and commit); call it from a thread.
+    """
+    audio_path = f"{AUDIO_DIR}/resp_{session_id}_{uuid.uuid4().hex[:8]}.wav"
+    audio_service.save_audio_blob(content, audio_path)
+    job = AudioJob(session_id=session_id, question=question, topic=topic, audio_path=audio_path)
+    with Session(engine) as session:
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+    metrics.counter("audio_jobs.enqueued").inc()
+    return job
+
+
+def job_state(job: AudioJob) -> dict:
+    """Public view of a job; stage results appear as they complete."""
+    state = {"job_id": job.id, "status": job.status}
+    if job.transcription is not None:
+        state["transcription"] = job.transcription
+    if job.feedback is not None:
+        state["feedback"] = job.feedback
+        state["score"] = job.score
+    if job.follow_up_question is not None:
+        state["follow_up_question"] = job.follow_up_question
+        state["evaluation_status"] = job.evaluation_status
+    if job.error is not None:
+        state["error"] = job.error
+    return state
+
+
+def claim_job(worker_id: str) -> Optional[AudioJob]:
+    """Claims the oldest queued job, or one whose worker's lease expired."""
+    now = datetime.utcnow()
+    lease_cutoff = now - timedelta(seconds=AUDIO_JOB_LEASE_SECONDS)
+    with Session(engine) as session:
+        job = session.exec(
+            select(AudioJob)
+            .where(or_(
+                AudioJob.status == "queued",
+                and_(AudioJob.status.in_(ACTIVE_STATUSES), AudioJob.claimed_at < lease_cutoff)
+            ))
+            .order_by(AudioJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if job is None:
+            return None
+        if job.status != "queued":
+            metrics.counter("audio_jobs.lease_expired").inc()
+        # Resume after the transcription if a previous attempt got that far
+        job.status = "transcribing" if job.transcription is None else "transcribed"
+        job.worker_id = worker_id
+        job.claimed_at = now
+        job.updated_at = now
+        job.attempts += 1
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        metrics.histogram("audio_jobs.queue_wait_seconds").observe((now - job.created_at).total_seconds())
+        return job
+
+
+def _update(job_id: int, **fields):
+    """Writes a stage result; also renews the worker's lease. Finished jobs are left as they are."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        job = session.get(AudioJob, job_id)
+        if job.status in FINAL_STATUSES:
+            # Finished by another worker that claimed it after this one's lease ran out
+            return
+        job.updated_at = now
+        job.claimed_at = now
+        for name, value in fields.items():
+            setattr(job, name, value)
+        session.add(job)
+        session.commit()
+
+
+def _transcription_profile(session_id: int) -> Optional[str]:
+    with Session(engine) as session:
+        return interview_service.session_transcription_profile(session, session_id)
+
+
+async def _transcribe(session_id: int, audio_path: str) -> str:
+    profile = await asyncio.to_thread(_transcription_profile, session_id)
+    # The job workers already bound how many recordings are in flight
+    text = await transcription_pool.transcribe(audio_path, bounded=False, profile=profile)
+    if not text:
+        raise TranscriptionFailed("Could not transcribe audio")
+    return text
+
+
+def _finish(claimed: AudioJob, transcription: str, result: dict, audio_sha256: Optional[str]) -> bool:
+    """Saves the answer and marks the job done in one transaction.
+
+    Returns False, saving nothing, if the job already has its answer (another
+    worker claimed it after this one's lease ran out, and finished first).
+    """
+    with Session(engine) as session:
+        # Commits a new question row itself, so it goes before the job row is locked
+        interview_service.get_or_create_question(session, claimed.question, topic=claimed.topic)
+        job = session.exec(select(AudioJob).where(AudioJob.id == claimed.id).with_for_update()).one()
+        if job.response_id is not None:
+            return False
+        response = interview_service.save_interview_response(
+            session, job.session_id, job.question, transcription, result, job.topic, audio_sha256, commit=False
+        )
+        now = datetime.utcnow()
+        job.status = "done"
+        job.feedback = result["feedback"]
+        job.score = result["score"]
+        job.follow_up_question = result["follow_up_question"]
+        job.evaluation_status = result.get("evaluation_status", "done")
+        job.response_id = response.id
+        job.updated_at = job.claimed_at = now
+        session.add(job)
+        session.commit()
+        return True
+
+
+def _discard_upload(audio_path: str):
+    # Finished jobs don't need the uploaded file; its compressed copy is in the audio store
+    try:
+        os.remove(audio_path)
+    except FileNotFoundError:
+        pass
+
+
+async def process_job(job: AudioJob):
+    start = time.perf_counter()
+    try:
+        # Deduplicated if a previous attempt stored it already
+        audio_sha256 = await asyncio.to_thread(audio_store.store_file, job.audio_path)
+        transcription = job.transcription
+        if transcription is None:
+            transcription = await _transcribe(job.session_id, job.audio_path)
+            await asyncio.to_thread(_update, job.id, status="transcribed", transcription=transcription)
+
+        try:
+            async for stage, data in interview_service.aevaluate_answer_stages(job.question, transcription, mode=EVALUATION_MODE):
+                if stage == "evaluated":
+                    await asyncio.to_thread(_update, job.id, status="evaluated", feedback=data["feedback"], score=data["score"])
+                else:
+                    result = data
+        except CircuitOpen:
+            # Model unavailable: the retry queue evaluates it later, the interview goes on
+            result = interview_service.pending_result()
+        if not await asyncio.to_thread(_finish, job, transcription, result, audio_sha256):
+            metrics.counter("audio_jobs.duplicate_saves_skipped").inc()
+        elif result.get("evaluation_status") == "pending":
+            metrics.counter("evaluation_retry.deferred").inc()
+        await asyncio.to_thread(_discard_upload, job.audio_path)
+        metrics.counter("audio_jobs.completed").inc()
+        metrics.histogram("audio_jobs.processing_seconds").observe(time.perf_counter() - start)
+    except TranscriptionFailed as e:
+        await asyncio.to_thread(_update, job.id, status="failed", error=str(e))
+        await asyncio.to_thread(_discard_upload, job.audio_path)
+        metrics.counter("audio_jobs.failed").inc()
+    except Exception as e:
+        print(f"Error processing audio job {job.id}: {e}")
+        if job.attempts >= AUDIO_JOB_MAX_ATTEMPTS:
+            await asyncio.to_thread(_update, job.id, status="failed", error="Evaluation failed")
+            await asyncio.to_thread(_discard_upload, job.audio_path)
+            metrics.counter("audio_jobs.failed").inc()
+        else:
+            # Back to the queue; a finished transcription is kept
+            await asyncio.to_thread(_update, job.id, status="queued", claimed_at=None)
+            metrics.counter("audio_jobs.retried").inc()
+
+
+async def run_audio_worker(worker_id: Optional[str] = None, poll_interval: float = AUDIO_JOB_POLL_SECONDS):
+    """Processes jobs forever, one at a time; start several for more throughput."""
+    global _busy_workers
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    while True:
+        try:
+            job = await asyncio.to_thread(claim_job, worker_id)
+        except Exception as e:
+            print(f"Audio worker {worker_id} claim error: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        _busy_workers += 1
+        try:
+            await process_job(job)
+        finally:
+            _busy_workers -= 1
+
+
+def get_job(job_id: int) -> Optional[AudioJob]:
+    with Session(engine) as session:
+        return session.get(AudioJob, job_id)
+
+
+metrics.register_gauge("audio_jobs.busy_workers", lambda: _busy_workers)
@@ -0,0 +1,300 @@
+"""Content-addressed storage of recorded answers, with a retention sweeper.
+
+Each recording is stored once per content: the SHA-256 of the upload as
+received names both its AudioBlob row and its file,
+AUDIO_STORE_DIR/<first two hex digits>/<sha256>.opus (or .flac), so retried
+and duplicate uploads reuse the stored copy. InterviewResponse.audio_sha256
+links an answer to its recording.
+
+Recordings are transcoded in a background thread, off the request path, to
+16 kHz mono (what Whisper hears) in AUDIO_STORE_CODEC: Opus at
+AUDIO_STORE_OPUS_BITRATE, roughly a tenth of the WAV size, or lossless FLAC.
+
+The retention sweeper removes recordings not used by a session started in
+the last AUDIO_RETENTION_DAYS days: "delete" drops the file and the row and
+unlinks the answers, "archive" moves the file to AUDIO_RETENTION_ARCHIVE_DIR
+and keeps the row pointing at it. Legacy uploads in assets/audio/responses
+are swept by age. Rows are processed AUDIO_RETENTION_BATCH_SIZE at a time,
+each batch in its own transaction, and the bytes reclaimed are reported.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete
+
+from config.database import engine
+from config.settings import (
+    AUDIO_ARCHIVE_ENABLED, AUDIO_STORE_DIR, AUDIO_STORE_CODEC, AUDIO_STORE_OPUS_BITRATE, AUDIO_RETENTION_DAYS,
+    AUDIO_RETENTION_ACTION, AUDIO_RETENTION_ARCHIVE_DIR, AUDIO_RETENTION_BATCH_SIZE,
+    AUDIO_RETENTION_SWEEP_INTERVAL_SECONDS
+)
+from models.db_models import AudioBlob, AudioJob, InterviewResponse, InterviewSession
+from services import metrics
+from services.audio import audio_service, STT_SAMPLE_RATE
+
+# Uploads written before content-addressed storage, and audio job staging files
+LEGACY_DIR = "assets/audio/responses"
+
+# Audio job statuses whose staging file is still needed
+LIVE_JOB_STATUSES = ("queued", "transcribing", "transcribed", "evaluated")
+
+_store_tasks = set()
+
+
+def content_hash(blob: bytes) -> str:
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _encode(audio, codec: str) -> bytes:
+    buffer = io.BytesIO()
+    if codec == "opus":
+        with av.open(buffer, "w", format="ogg") as container:
+            stream = container.add_stream("libopus", rate=STT_SAMPLE_RATE)
+            stream.bit_rate = AUDIO_STORE_OPUS_BITRATE
+            stream.layout = "mono"
+            frame = av.AudioFrame.from_ndarray(audio.reshape(1, -1), format="flt", layout="mono")
+            frame.sample_rate = STT_SAMPLE_RATE
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+    elif sf is not None:
+        sf.write(buffer, audio, STT_SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+    else:
+        with av.open(buffer, "w", format="flac") as container:
+            stream = container.add_stream("flac", rate=STT_SAMPLE_RATE)
+            stream.layout = "mono"
+            pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+            frame = av.AudioFrame.from_ndarray(pcm.reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = STT_SAMPLE_RATE
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+    return buffer.getvalue()
+
+
+def _write(path: str, data: bytes):
+    # Write then rename, so a concurrent reader never sees half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.part"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def store(blob: bytes, sha256: Optional[str] = None) -> Optional[str]:
+    """Stores a recording unless the same content already is; returns its sha256, or None if it can't be decoded.
+
+    Blocking (decode and transcode); call it from a thread.
+    """
+    sha256 = sha256 or content_hash(blob)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        existing = session.exec(select(AudioBlob).where(AudioBlob.sha256 == sha256)).first()
+        if existing is not None and existing.archived_at is None:
+            # Retention counts from the last upload of this content
+            existing.last_used_at = now
+            session.add(existing)
+            session.commit()
+            metrics.counter("audio_store.deduplicated").inc()
+            return sha256
+
+    start = time.perf_counter()
+    codec = AUDIO_STORE_CODEC if AUDIO_STORE_CODEC == "flac" or av is not None else "flac"
+    try:
+        audio = audio_service.decode_blob(blob)
+        data = _encode(audio, codec)
+    except Exception as e:
+        print(f"Audio Store Error: could not transcode recording {sha256[:12]}: {e}")
+        return None
+    path = f"{AUDIO_STORE_DIR}/{sha256[:2]}/{sha256}.{codec}"
+    _write(path, data)
+    metrics.histogram("audio_store.transcode_seconds").observe(time.perf_counter() - start)
+
+    with Session(engine) as session:
+        row = session.exec(select(AudioBlob).where(AudioBlob.sha256 == sha256)).first()
+        if row is None:
+            row = AudioBlob(sha256=sha256, path=path, codec=codec, size_bytes=len(data), original_bytes=len(blob),
+                            duration_seconds=len(audio) / STT_SAMPLE_RATE)
+        else:
+            # Uploaded again after the sweeper archived it: keep a live copy again
+            row.path, row.codec, row.size_bytes, row.archived_at = path, codec, len(data), None
+        row.last_used_at = now
+        session.add(row)
+        try:
+            session.commit()
+        except IntegrityError:
+            # Stored concurrently by another request; its row and ours name the same file
+            session.rollback()
+            metrics.counter("audio_store.deduplicated").inc()
+            return sha256
+    metrics.counter("audio_store.stored").inc()
+    metrics.counter("audio_store.bytes_saved").inc(max(len(blob) - len(data), 0))
+    return sha256
+
+
+def store_file(path: str) -> Optional[str]:
+    """store() for a recording on disk (audio job staging files); None if disabled or missing."""
+    if not AUDIO_ARCHIVE_ENABLED or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return store(f.read())
+
+
+async def store_recording(blob: bytes) -> Optional[str]:
+    """Stores a recording in the background and returns its sha256 once hashed, to link the answer to.
+
+    Returns None with AUDIO_ARCHIVE_ENABLED=false. Hashing runs in a thread
+    too; the AudioBlob row appears once the recording is transcoded, and
+    transcription never reads it.
+    """
+    if not AUDIO_ARCHIVE_ENABLED:
+        return None
+    sha256 = await asyncio.to_thread(content_hash, blob)
+    task = asyncio.create_task(asyncio.to_thread(store, blob, sha256))
+    _store_tasks.add(task)
+    task.add_done_callback(_store_done)
+    return sha256
+
+
+def _store_done(task):
+    _store_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error storing recording: {task.exception()}")
+
+
+# ---------- RETENTION ----------
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _retire_file(path: str, action: str, archive_path: str) -> int:
+    """Deletes or archives a file; returns the bytes freed in the store (0 if it was already gone)."""
+    size = _file_size(path)
+    try:
+        if action == "archive":
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            shutil.move(path, archive_path)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+def _sweep_blob_batch(cutoff: datetime, action: str, batch_size: int) -> tuple:
+    """Retires one batch of expired recordings; returns (recordings, bytes reclaimed)."""
+    with Session(engine) as session:
+        in_use = (
+            select(InterviewResponse.id)
+            .join(InterviewSession, InterviewSession.id == InterviewResponse.session_id)
+            .where(InterviewResponse.audio_sha256 == AudioBlob.sha256, InterviewSession.start_time >= cutoff)
+        )
+        blobs = session.exec(
+            select(AudioBlob)
+            .where(AudioBlob.last_used_at < cutoff, AudioBlob.archived_at.is_(None), ~in_use.exists())
+            .order_by(AudioBlob.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not blobs:
+            return 0, 0
+
+        reclaimed = 0
+        if action == "archive":
+            now = datetime.utcnow()
+            for blob in blobs:
+                archive_path = os.path.join(AUDIO_RETENTION_ARCHIVE_DIR, os.path.relpath(blob.path, AUDIO_STORE_DIR))
+                reclaimed += _retire_file(blob.path, action, archive_path)
+                blob.path, blob.archived_at = archive_path, now
+                session.add(blob)
+            session.commit()
+        else:
+            paths = [blob.path for blob in blobs]
+            hashes = [blob.sha256 for blob in blobs]
+            session.exec(update(InterviewResponse).where(InterviewResponse.audio_sha256.in_(hashes)).values(audio_sha256=None))
+            session.exec(delete(AudioBlob).where(AudioBlob.id.in_([blob.id for blob in blobs])))
+            # Files go once no row points at them any more
+            session.commit()
+            reclaimed = sum(_retire_file(path, action, "") for path in paths)
+        return len(blobs), reclaimed
+
+
+def _sweep_legacy_files(cutoff: datetime, action: str) -> tuple:
+    """Retires uploads kept as loose files in LEGACY_DIR before content-addressed storage."""
+    if not os.path.isdir(LEGACY_DIR):
+        return 0, 0
+    with Session(engine) as session:
+        live = set(session.exec(select(AudioJob.audio_path).where(AudioJob.status.in_(LIVE_JOB_STATUSES))).all())
+    removed = reclaimed = 0
+    cutoff_ts = cutoff.timestamp()
+    with os.scandir(LEGACY_DIR) as entries:
+        for entry in entries:
+            path = f"{LEGACY_DIR}/{entry.name}"
+            if not entry.is_file() or path in live or entry.stat().st_mtime >= cutoff_ts:
+                continue
+            reclaimed += _retire_file(path, action, os.path.join(AUDIO_RETENTION_ARCHIVE_DIR, "responses", entry.name))
+            removed += 1
+    return removed, reclaimed
+
+
+def sweep(days: float = AUDIO_RETENTION_DAYS, action: str = AUDIO_RETENTION_ACTION,
+          batch_size: int = AUDIO_RETENTION_BATCH_SIZE) -> dict:
+    """Deletes or archives recordings of sessions older than days; returns what was reclaimed."""
+    if action not in ("delete", "archive"):
+        raise ValueError(f"Unknown retention action '{action}', expected 'delete' or 'archive'")
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    recordings = reclaimed = batches = 0
+    while True:
+        count, freed = _sweep_blob_batch(cutoff, action, batch_size)
+        recordings += count
+        reclaimed += freed
+        batches += bool(count)
+        if count < batch_size:
+            break
+    legacy, freed = _sweep_legacy_files(cutoff, action)
+    reclaimed += freed
+
+    metrics.counter("audio_retention.recordings").inc(recordings + legacy)
+    metrics.counter("audio_retention.bytes_reclaimed").inc(reclaimed)
+    if recordings or legacy:
+        print(f"Audio retention: {action}d {recordings} recording(s) in {batches} batch(es) and {legacy} legacy "
+              f"file(s), {reclaimed / 1e6:.1f} MB reclaimed")
+    return {"recordings": recordings, "legacy_files": legacy, "batches": batches, "bytes_reclaimed": reclaimed}
+
+
+async def run_retention_sweeper(interval: float = AUDIO_RETENTION_SWEEP_INTERVAL_SECONDS):
+    """Sweeps expired recordings forever; started as a background task on app startup."""
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception as e:
+            print(f"Audio retention sweep error: {e}")
+        await asyncio.sleep(interval)
+
+
+metrics.register_gauge("audio_store.pending", lambda: len(_store_tasks))
@@ -0,0 +1,76 @@
+"""Circuit breaker around the LLM client.
+
+While the model is down every call would otherwise wait for its full
+timeout. After failure_threshold consecutive failures (errors or timeouts)
+the breaker opens and calls fail immediately with CircuitOpen, so callers
+can switch to their fallbacks. Once the cooldown has passed the breaker is
+half-open: calls go through again, the first success closes it and a
+failure opens it for another cooldown.
+"""
+
+import math
+import time
+
+from config.settings import LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_COOLDOWN_SECONDS
+from services import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Calls are short-circuited until the cooldown ends."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Circuit '{name}' is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 cooldown_seconds: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self._opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def retry_after(self) -> int:
+        if self._opened_at is None:
+            return 0
+        remaining = self.cooldown_seconds - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def allow(self):
+        """Raises CircuitOpen while the breaker is open; call before each attempt."""
+        if self.state == OPEN:
+            metrics.counter(f"circuit_breaker.{self.name}.short_circuited").inc()
+            raise CircuitOpen(self.name, self.retry_after())
+
+    def record_success(self):
+        if self._opened_at is not None:
+            print(f"Circuit '{self.name}' closed")
+        self.consecutive_failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (self._opened_at is None and self.consecutive_failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            metrics.counter(f"circuit_breaker.{self.name}.opened").inc()
+            print(f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures")
+
+
+llm_breaker = CircuitBreaker("llm")
+metrics.register_gauge("circuit_breaker.llm.state", lambda: STATE_VALUES[llm_breaker.state])
@@ -0,0 +1,143 @@
+"""Retry queue for evaluations deferred while the LLM was unavailable.
+
+Answers submitted while the circuit breaker is open are stored with
+evaluation_status="pending" (see interview_service.defer_evaluation). This
+worker evaluates them once the breaker lets calls through again, and gives
+up after EVALUATION_RETRY_MAX_ATTEMPTS failures.
+
+Every app worker runs this loop, so a batch is claimed before it is
+evaluated: the rows are locked with SKIP LOCKED and stamped with
+evaluation_claimed_at, and other workers skip them until the claim is
+released or, if its worker died, older than EVALUATION_RETRY_LEASE_SECONDS.
+Database work runs in a thread, off the event loop.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import or_
+from sqlmodel import Session, select
+
+from config.database import engine
+from config.settings import (
+    EVALUATION_MODE, EVALUATION_RETRY_INTERVAL_SECONDS, EVALUATION_RETRY_MAX_ATTEMPTS, EVALUATION_RETRY_LEASE_SECONDS
+)
+from models.db_models import InterviewResponse, InterviewSession, Question
+from services import interview_service, metrics
+from services.circuit_breaker import llm_breaker, OPEN, CircuitOpen
+
+
+def _claim_batch(batch_size: int) -> List[Tuple[int, str, str]]:
+    """Claims up to batch_size pending responses, oldest first; returns (id, question, answer) for each."""
+    now = datetime.utcnow()
+    lease_cutoff = now - timedelta(seconds=EVALUATION_RETRY_LEASE_SECONDS)
+    with Session(engine) as session:
+        rows = session.exec(
+            select(InterviewResponse, Question.content)
+            .join(Question, Question.id == InterviewResponse.question_id)
+            .where(
+                InterviewResponse.evaluation_status == "pending",
+                or_(
+                    InterviewResponse.evaluation_claimed_at.is_(None),
+                    InterviewResponse.evaluation_claimed_at < lease_cutoff,
+                ),
+            )
+            .order_by(InterviewResponse.timestamp)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=InterviewResponse)
+        ).all()
+        claimed = []
+        for response, question in rows:
+            # Counted when claimed, so a row whose worker keeps dying still runs out of attempts
+            response.evaluation_claimed_at = now
+            response.evaluation_attempts += 1
+            session.add(response)
+            claimed.append((response.id, question, response.answer_text))
+        session.commit()
+    return claimed
+
+
+def _release(response_ids: List[int]):
+    """Hands back claims that were never attempted (the breaker opened mid-batch)."""
+    with Session(engine) as session:
+        for response_id in response_ids:
+            response = session.get(InterviewResponse, response_id)
+            if response is None or response.evaluation_status != "pending":
+                continue
+            response.evaluation_claimed_at = None
+            response.evaluation_attempts = max(response.evaluation_attempts - 1, 0)
+            session.add(response)
+        session.commit()
+
+
+def _record_failure(response_id: int):
+    with Session(engine) as session:
+        response = session.get(InterviewResponse, response_id)
+        if response is None:
+            return
+        response.evaluation_claimed_at = None
+        if response.evaluation_attempts >= EVALUATION_RETRY_MAX_ATTEMPTS:
+            response.evaluation_status = "failed"
+            metrics.counter("evaluation_retry.failed").inc()
+        session.add(response)
+        session.commit()
+
+
+def _record_result(response_id: int, result: dict):
+    with Session(engine) as session:
+        response = session.get(InterviewResponse, response_id)
+        if response is None:
+            return
+        response.evaluation_text = result["feedback"]
+        response.score = result["score"]
+        response.model_name = result.get("model")
+        response.evaluation_status = "done"
+        response.evaluation_claimed_at = None
+        session.add(response)
+        _refresh_session_total(session, response.session_id)
+        session.commit()
+
+
+async def retry_pending_evaluations(batch_size: int = 20) -> int:
+    """Claims and evaluates up to batch_size pending responses, oldest first. Returns how many completed."""
+    if llm_breaker.state == OPEN:
+        return 0
+
+    claimed = await asyncio.to_thread(_claim_batch, batch_size)
+    completed = 0
+    for index, (response_id, question, answer) in enumerate(claimed):
+        try:
+            result = await interview_service.aevaluate_answer(question, answer, mode=EVALUATION_MODE)
+        except CircuitOpen:
+            await asyncio.to_thread(_release, [claim[0] for claim in claimed[index:]])
+            break
+        except Exception as e:
+            print(f"Error retrying evaluation {response_id}: {e}")
+            await asyncio.to_thread(_record_failure, response_id)
+            continue
+
+        await asyncio.to_thread(_record_result, response_id, result)
+        metrics.counter("evaluation_retry.completed").inc()
+        completed += 1
+    return completed
+
+
+def _refresh_session_total(session: Session, session_id: int):
+    # Sessions finished while an evaluation was pending got a partial total
+    interview_session = session.get(InterviewSession, session_id)
+    if interview_session is None or interview_session.end_time is None:
+        return
+    scores = session.exec(select(InterviewResponse.score).where(InterviewResponse.session_id == session_id)).all()
+    interview_session.total_score = sum(score for score in scores if score is not None)
+    session.add(interview_session)
+
+
+async def run_evaluation_retries(interval: float = EVALUATION_RETRY_INTERVAL_SECONDS):
+    """Drains the retry queue forever; started as a background task on app startup."""
+    while True:
+        try:
+            await retry_pending_evaluations()
+        except Exception as e:
+            print(f"Evaluation retry loop error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,277 @@
+"""Idempotency-Key handling for answer submission.
+
+A request carrying an Idempotency-Key runs as an execution that outlives
+the connection: retries of a request still in progress attach to it and
+receive its events from the start, and retries after it finished get the
+stored events replayed without re-running Whisper or the LLM.
+
+Finished requests are kept in the IdempotencyKey table for
+IDEMPOTENCY_TTL_SECONDS, so replays work across workers and restarts. A
+retry that reaches another worker while the first attempt is still running
+waits for that worker to store the result. Failed requests release their
+key so the client can retry them for real.
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete
+
+from config.database import engine
+from config.settings import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_SWEEP_INTERVAL_SECONDS
+from models.db_models import IdempotencyKey
+from services import metrics
+
+Event = Tuple[str, Any]
+
+# Interval at which a retry polls for a result another worker is producing
+POLL_INTERVAL_SECONDS = 0.5
+
+# Streamed events that are not replayed; the final result carries the full text
+TRANSIENT_EVENTS = {"token"}
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different body."""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Idempotency-Key '{key}' was already used for a different request")
+
+
+class IdempotencyKeyBusy(Exception):
+    """Another worker is still running the request with this key."""
+
+    def __init__(self, key: str, retry_after: int):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"A request with Idempotency-Key '{key}' is still in progress")
+
+
+def request_hash(*parts) -> str:
+    """Fingerprint of a request body; a key may only be reused with the same one."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class _Execution:
+    """Events of one keyed request, shared by every attempt that carries the key."""
+
+    def __init__(self, request_hash: str):
+        self.request_hash = request_hash
+        self.events: List[Event] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._condition = asyncio.Condition()
+
+    async def emit(self, event: str, data: Any):
+        async with self._condition:
+            self.events.append((event, data))
+            self._condition.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None):
+        async with self._condition:
+            self.finished = True
+            self.error = error
+            self._condition.notify_all()
+
+    async def follow(self) -> AsyncIterator[Event]:
+        """Yields every event from the first one, then raises the execution's error if it failed."""
+        index = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: len(self.events) > index or self.finished)
+                pending = self.events[index:]
+                index = len(self.events)
+                finished = self.finished
+            for event in pending:
+                yield event
+            if finished and index == len(self.events):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS, lock_seconds: int = IDEMPOTENCY_LOCK_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._inflight: Dict[str, _Execution] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def execute(self, scope: str, key: Optional[str], fingerprint: str,
+                produce: Callable[[], AsyncIterator[Event]]) -> AsyncIterator[Event]:
+        """Events of the request identified by key, producing them only if no attempt has yet.
+
+        Without a key the request simply runs. The returned iterator raises
+        whatever the producing attempt raised.
+        """
+        if not key:
+            return produce()
+        scoped_key = f"{scope}:{key}"
+        execution = self._inflight.get(scoped_key)
+        if execution is None:
+            execution = _Execution(fingerprint)
+            self._inflight[scoped_key] = execution
+            # Detached from the request, so a dropped connection doesn't abort the work
+            task = asyncio.create_task(self._run(scoped_key, execution, produce))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif execution.request_hash != fingerprint:
+            return self._raise(IdempotencyKeyReused(key))
+        else:
+            metrics.counter("idempotency.attached").inc()
+        return execution.follow()
+
+    async def result(self, events: AsyncIterator[Event]) -> Any:
+        """Data of the final 'result' event, for endpoints that return plain JSON."""
+        result = None
+        async for event, data in events:
+            if event == "result":
+                result = data
+        return result
+
+    @staticmethod
+    async def _raise(error: Exception) -> AsyncIterator[Event]:
+        raise error
+        yield  # Unreachable; makes this an async generator
+
+    async def _run(self, scoped_key: str, execution: _Execution, produce: Callable[[], AsyncIterator[Event]]):
+        key = scoped_key.split(":", 1)[1]
+        try:
+            while True:
+                status, stored = await asyncio.to_thread(self._claim, scoped_key, execution.request_hash)
+                if status == "reused":
+                    raise IdempotencyKeyReused(key)
+                if status != "busy":
+                    break
+                stored = await self._wait_for_other_worker(scoped_key, key)
+                if stored is not None:
+                    break
+            if stored is not None:
+                metrics.counter("idempotency.replayed").inc()
+                for event, data in stored:
+                    await execution.emit(event, data)
+                await execution.finish()
+                return
+
+            metrics.counter("idempotency.executed").inc()
+            try:
+                async for event, data in produce():
+                    await execution.emit(event, data)
+            except BaseException:
+                await asyncio.to_thread(self._release, scoped_key)
+                raise
+            if any(event == "error" for event, _ in execution.events):
+                # Streams report failures as an 'error' event; let the client retry those
+                await asyncio.to_thread(self._release, scoped_key)
+            else:
+                replay = [[event, data] for event, data in execution.events if event not in TRANSIENT_EVENTS]
+                await asyncio.to_thread(self._store, scoped_key, replay)
+            await execution.finish()
+        except asyncio.CancelledError as e:
+            await execution.finish(e)
+            raise
+        except Exception as e:
+            await execution.finish(e)
+        finally:
+            self._inflight.pop(scoped_key, None)
+
+    async def _wait_for_other_worker(self, scoped_key: str, key: str) -> Optional[List[Event]]:
+        """Polls until the worker running the request stores it; None if that attempt failed and released the key."""
+        waited = 0.0
+        while waited < self.lock_seconds:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            waited += POLL_INTERVAL_SECONDS
+            status, stored = await asyncio.to_thread(self._lookup, scoped_key)
+            if status == "done":
+                return stored
+            if status is None:
+                return None
+        metrics.counter("idempotency.busy").inc()
+        raise IdempotencyKeyBusy(key, retry_after=int(self.lock_seconds))
+
+    # ---------- Postgres ----------
+    def _claim(self, scoped_key: str, fingerprint: str) -> Tuple[str, Optional[List[Event]]]:
+        """Inserts the key as in progress. Returns ("claimed", None), ("done", events), ("busy", None) or ("reused", None)."""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            entry = session.exec(select(IdempotencyKey).where(IdempotencyKey.key == scoped_key)).first()
+            if entry is not None and entry.expires_at <= now:
+                session.delete(entry)
+                session.commit()
+                entry = None
+            if entry is None:
+                session.add(IdempotencyKey(key=scoped_key, request_hash=fingerprint, created_at=now,
+                                           expires_at=now + timedelta(seconds=self.ttl_seconds)))
+                try:
+                    session.commit()
+                    return "claimed", None
+                except IntegrityError:
+                    # Another worker claimed it first
+                    session.rollback()
+                    entry = session.exec(select(IdempotencyKey).where(IdempotencyKey.key == scoped_key)).first()
+                    if entry is None:
+                        return "busy", None
+            if entry.request_hash != fingerprint:
+                return "reused", None
+            if entry.status == "done":
+                return "done", json.loads(entry.response)
+            if entry.created_at < now - timedelta(seconds=self.lock_seconds):
+                # The worker that claimed it died mid-request; take over
+                entry.created_at = now
+                session.add(entry)
+                session.commit()
+                return "claimed", None
+            return "busy", None
+
+    def _lookup(self, scoped_key: str) -> Tuple[Optional[str], Optional[List[Event]]]:
+        with Session(engine) as session:
+            entry = session.exec(select(IdempotencyKey).where(IdempotencyKey.key == scoped_key)).first()
+            if entry is None:
+                return None, None
+            return entry.status, json.loads(entry.response) if entry.response else None
+
+    def _store(self, scoped_key: str, events: List[list]):
+        with Session(engine) as session:
+            entry = session.exec(select(IdempotencyKey).where(IdempotencyKey.key == scoped_key)).first()
+            if entry is None:
+                return
+            entry.status = "done"
+            entry.response = json.dumps(events)
+            entry.expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            session.add(entry)
+            session.commit()
+
+    def _release(self, scoped_key: str):
+        with Session(engine) as session:
+            session.exec(delete(IdempotencyKey).where(IdempotencyKey.key == scoped_key))
+            session.commit()
+
+    def sweep(self) -> int:
+        """Deletes expired keys and returns how many rows were removed."""
+        with Session(engine) as session:
+            result = session.exec(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+            session.commit()
+        metrics.counter("idempotency.swept").inc(result.rowcount)
+        return result.rowcount
+
+    async def run_sweeper(self, interval: float = IDEMPOTENCY_SWEEP_INTERVAL_SECONDS):
+        """Removes expired keys forever; started as a background task on app startup."""
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                print(f"Idempotency sweep error: {e}")
+            await asyncio.sleep(interval)
+
+
+idempotency = IdempotencyStore()
+metrics.register_gauge("idempotency.inflight", lambda: len(idempotency._inflight))
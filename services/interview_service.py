@@ -1,89 +1,720 @@
+import asyncio
 import random
+import re
 import json
-from typing import Dict, Union, Optional
-from sqlmodel import Session, select
-from models.db_models import Question
-from config.settings import local_llm
+import time
+from typing import AsyncIterator, Dict, Union, Optional, Tuple
+from sqlmodel import Session, select, func
+from config.database import engine
+from models.db_models import Question, InterviewResponse, InterviewSession, InterviewRoom
+from config.settings import get_llm, EVALUATION_MODE, CHAIN_MODELS, LLM_CALL_TIMEOUT_SECONDS
 from prompts.interview import interview_prompt
-from prompts.interview import interview_prompt
-from prompts.evaluation import evaluation_prompt, followup_prompt
+from prompts.evaluation import evaluation_prompt, followup_prompt, combined_evaluation_prompt, COMBINED_EVALUATION_SCHEMA
+from services import metrics
+from services.llm_cache import llm_cache
+from services.prescreen import prescreen_answer
+from services.token_budget import apply_budget
+from services.llm_scheduler import llm_scheduler, Priority, DeadlineExceeded
+from services.circuit_breaker import llm_breaker, CircuitOpen
+from services.question_index import question_index
 
 # Constants
 RESUME_TOPICS = ["Data Structures & Algorithms", "System Design", "Database Management", "API Design", "Security", "Scalability", "DevOps"]
+DEFAULT_DIFFICULTY = "Hard"
+
+def _tier_llm(name: str, tier: str = "model", **bind_kwargs):
+    """Chat model for a chain's primary or fallback tier (see CHAIN_MODELS), or None if not configured."""
+    model = CHAIN_MODELS[name][tier]
+    if not model:
+        return None
+    llm = get_llm(model, CHAIN_MODELS[name]["temperature"])
+    return llm.bind(**bind_kwargs) if bind_kwargs else llm
 
 # Chains
-interview_chain = interview_prompt | local_llm
-evaluation_chain = evaluation_prompt | local_llm
-followup_chain = followup_prompt | local_llm
+interview_chain = interview_prompt | _tier_llm("interview")
+evaluation_chain = evaluation_prompt | _tier_llm("evaluation")
+followup_chain = followup_prompt | _tier_llm("followup")
+combined_chain = combined_evaluation_prompt | _tier_llm("combined", format=COMBINED_EVALUATION_SCHEMA)
+custom_llm = _tier_llm("custom")
+
+def _fallback_chain(name: str, prompt=None, **bind_kwargs):
+    llm = _tier_llm(name, "fallback_model", **bind_kwargs)
+    if llm is None or prompt is None:
+        return llm
+    return prompt | llm
+
+# Smaller models used when the primary misses its latency SLO
+FALLBACK_CHAINS = {
+    "interview": _fallback_chain("interview", interview_prompt),
+    "evaluation": _fallback_chain("evaluation", evaluation_prompt),
+    "followup": _fallback_chain("followup", followup_prompt),
+    "combined": _fallback_chain("combined", combined_evaluation_prompt, format=COMBINED_EVALUATION_SCHEMA),
+    "custom": _fallback_chain("custom"),
+}
+
+# Scheduling priority of each chain, see services/llm_scheduler.py
+CHAIN_PRIORITIES = {
+    "evaluation": Priority.EVALUATION,
+    "combined": Priority.EVALUATION,
+    "followup": Priority.FOLLOWUP,
+    "interview": Priority.QUESTION_GENERATION,
+    "custom": Priority.CUSTOM_PROMPT,
+}
+
+FALLBACK_FOLLOWUP = "Can you elaborate on the trade-offs of your approach?"
+PENDING_FEEDBACK = "Your answer has been saved and will be evaluated shortly."
+
+FENCED_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
 
 def generate_resume_question_content(context: str, resume_text: str) -> dict:
     random_topic = random.choice(RESUME_TOPICS)
     full_context = f"User Provided Context: {context}\n\nResume Content: {resume_text}"
     
     try:
-        response = interview_chain.invoke({
+        response = _call_chain("interview", interview_chain, {
             "context": full_context,
-            "topic": random_topic
+            "topic": random_topic,
+            "difficulty": DEFAULT_DIFFICULTY
         })
         question_text = response.content
     except Exception as e:
         print(f"Error generating question: {e}")
         # Fallback if LLM fails
-        question_text = f"Describe a challenging problem you solved related to {random_topic}. (Note: This is a pre-made fallback question)"
+        question_text = _fallback_question(random_topic)
 
     return {
         "question": question_text,
         "topic": random_topic
     }
 
-def evaluate_answer_content(question: str, answer: str) -> Dict[str, Union[str, float]]:
-    response = evaluation_chain.invoke({
-        "question": question,
-        "answer": answer
-    })
-    
+def _fallback_question(topic: str, difficulty: Optional[str] = None) -> str:
+    """Draws a question from the question bank, preferring the topic and difficulty.
+
+    Used whenever generation fails, so it must not touch the LLM.
+    """
+    # Filters from most to least specific
+    if difficulty:
+        attempts = [(Question.topic == topic, Question.difficulty == difficulty), (Question.topic == topic,),
+                    (Question.difficulty == difficulty,), ()]
+    else:
+        attempts = [(Question.topic == topic,), ()]
     try:
-        # Attempt to parse JSON from the LLM response
-        result = json.loads(response.content)
-        # Ensure keys exist
-        if "feedback" not in result:
-             result["feedback"] = str(response.content)
-        if "score" not in result:
-             result["score"] = 0.0
-        return result
-    except json.JSONDecodeError:
+        with Session(engine) as session:
+            for filters in attempts:
+                question = session.exec(select(Question).where(*filters).order_by(func.random()).limit(1)).first()
+                if question:
+                    metrics.counter("question_fallback.bank").inc()
+                    return question.content
+    except Exception as e:
+        print(f"Error loading fallback question: {e}")
+    metrics.counter("question_fallback.canned").inc()
+    return f"Describe a challenging problem you solved related to {topic}. (Note: This is a pre-made fallback question)"
+
+async def agenerate_question(context: str, resume_text: str, topic: str, difficulty: str = DEFAULT_DIFFICULTY,
+                             priority: Optional[Priority] = None) -> str:
+    """Generates one resume-based question for the topic. Raises if the LLM call fails."""
+    full_context = f"User Provided Context: {context}\n\nResume Content: {resume_text}"
+    response = await _acall_chain("interview", interview_chain, {
+        "context": full_context,
+        "topic": topic,
+        "difficulty": difficulty
+    }, priority=priority)
+    return response.content
+
+def _store_generated_question(content: str, topic: str, difficulty: str, digest_id: str, digest_text: str) -> int:
+    with Session(engine) as session:
+        question = get_or_create_question(session, content, topic=topic, difficulty=difficulty, resume_digest_id=digest_id)
+        if question.resume_digest_id is None:
+            # Stored earlier without a digest (e.g. by an answer to it); link it so the index finds it after a restart
+            question.resume_digest_id = digest_id
+            if question.difficulty == "Unknown":
+                question.difficulty = difficulty
+            session.add(question)
+            session.commit()
+            session.refresh(question)
+    if question.resume_digest_id == digest_id:
+        question_index.add(question.id, content, question.topic, question.difficulty, digest_id, digest_text)
+    return question.id
+
+async def aobtain_question(context: str, resume_text: str, topic: str, difficulty: Optional[str] = None,
+                           digest_id: Optional[str] = None, session_id: Optional[int] = None,
+                           priority: Optional[Priority] = None) -> dict:
+    """Serves a stored question generated for a similar resume, or generates a new one.
+
+    New questions generated for a stored digest are saved and indexed for
+    later candidates. priority overrides the scheduling priority of the
+    generation (the question pool prefetches at Priority.QUESTION_PREFETCH).
+    Raises if generation fails.
+    """
+    difficulty = difficulty or DEFAULT_DIFFICULTY
+    reused = await question_index.afind(topic, difficulty, resume_text, session_id)
+    if reused is not None:
+        return reused
+
+    question_text = await agenerate_question(context, resume_text, topic, difficulty, priority)
+    if digest_id is not None:
+        try:
+            question_id = await asyncio.to_thread(_store_generated_question, question_text, topic, difficulty, digest_id, resume_text)
+            question_index.mark_served(session_id, question_id)
+        except Exception as e:
+            print(f"Error storing generated question: {e}")
+    return {
+        "question": question_text,
+        "topic": topic
+    }
+
+async def agenerate_resume_question_content(context: str, resume_text: str, topic: Optional[str] = None,
+                                            difficulty: Optional[str] = None, digest_id: Optional[str] = None,
+                                            session_id: Optional[int] = None) -> dict:
+    """Async variant of generate_resume_question_content.
+
+    Reuses a question generated for a similar resume when one is indexed.
+    While the LLM circuit breaker is open this returns a question-bank
+    question immediately instead of waiting for the model.
+    """
+    topic = topic or random.choice(RESUME_TOPICS)
+    try:
+        return await aobtain_question(context, resume_text, topic, difficulty, digest_id, session_id)
+    except Exception as e:
+        if not isinstance(e, CircuitOpen):
+            print(f"Error generating question: {e}")
+        # Fallback if LLM fails
+        question_text = await asyncio.to_thread(_fallback_question, topic, difficulty)
+
+    return {
+        "question": question_text,
+        "topic": topic
+    }
+
+def extract_json_object(text: str) -> Optional[dict]:
+    """Pulls the first JSON object out of model output.
+
+    Handles plain JSON, JSON inside ``` fences and JSON surrounded by chatty text.
+    """
+    candidates = [text] + FENCED_BLOCK_RE.findall(text)
+    for candidate in candidates:
+        try:
+            result = json.loads(candidate.strip())
+            if isinstance(result, dict):
+                return result
+        except json.JSONDecodeError:
+            pass
+
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            result, _ = decoder.raw_decode(text, start)
+            if isinstance(result, dict):
+                return result
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+def _parse_evaluation(content: str) -> Dict[str, Union[str, float]]:
+    # Attempt to parse JSON from the LLM response
+    result = extract_json_object(content)
+    if result is None:
         # Fallback if LLM fails to return valid JSON
         return {
-            "feedback": response.content,
+            "feedback": content,
             "score": 0.0
         }
+    # Ensure keys exist
+    if "feedback" not in result:
+         result["feedback"] = str(content)
+    if "score" not in result:
+         result["score"] = 0.0
+    return result
+
+def _parse_combined_evaluation(content: str) -> Optional[Dict[str, Union[str, float]]]:
+    """Strict parser for the combined prompt. Returns None if any key is missing or malformed."""
+    result = extract_json_object(content)
+    if result is None:
+        return None
+    try:
+        feedback = result["feedback"]
+        score = float(result["score"])
+        follow_up = result["follow_up_question"]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not isinstance(feedback, str) or not isinstance(follow_up, str) or not follow_up.strip():
+        return None
+    return {
+        "feedback": feedback,
+        "score": min(max(score, 0.0), 10.0),
+        "follow_up_question": follow_up.strip()
+    }
+
+def _total_tokens(response) -> int:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+async def _ainvoke_tiered(name: str, chain, inputs):
+    """Invokes the chain, downgrading to the fallback model if the primary misses its SLO.
+
+    Returns the response and the name of the model that produced it.
+    """
+    tier = CHAIN_MODELS[name]
+    fallback = FALLBACK_CHAINS.get(name)
+    if fallback is None:
+        return await chain.ainvoke(inputs), tier["model"]
+    try:
+        return await asyncio.wait_for(chain.ainvoke(inputs), timeout=tier["slo_seconds"]), tier["model"]
+    except asyncio.TimeoutError:
+        metrics.counter(f"llm.{name}.slo_downgrades").inc()
+        return await fallback.ainvoke(inputs), tier["fallback_model"]
+
+def _record_usage(name: str, model: str, response, elapsed: float, usage: Optional[dict]):
+    tokens = _total_tokens(response)
+    metrics.counter(f"llm.{name}.calls").inc()
+    metrics.counter(f"llm.{name}.tokens").inc(tokens)
+    metrics.histogram(f"llm.{name}.latency_seconds.{model}").observe(elapsed)
+    if usage is not None:
+        usage["tokens"] = usage.get("tokens", 0) + tokens
+        usage.setdefault("models", {})[name] = model
+
+async def _acall_chain(name: str, chain, inputs, usage: Optional[dict] = None, priority: Optional[Priority] = None):
+    """Single entry point for async chain calls.
+
+    Fails fast while the LLM circuit breaker is open, trims inputs to their
+    token budgets, admits the call through the scheduler at the chain's
+    priority (or the given one), bounds it by LLM_CALL_TIMEOUT_SECONDS, applies the chain's model
+    tiers and tracks tokens, latency and the model used.
+    """
+    llm_breaker.allow()
+    inputs = apply_budget(name, inputs)
+    start = time.perf_counter()
+
+    async def call():
+        try:
+            result = await asyncio.wait_for(_ainvoke_tiered(name, chain, inputs), timeout=LLM_CALL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            llm_breaker.record_failure()
+            metrics.counter(f"llm.{name}.timeouts").inc()
+            raise DeadlineExceeded(llm_scheduler.retry_after())
+        except Exception:
+            llm_breaker.record_failure()
+            raise
+        llm_breaker.record_success()
+        return result
+
+    response, model = await llm_scheduler.run(priority if priority is not None else CHAIN_PRIORITIES[name], call)
+    _record_usage(name, model, response, time.perf_counter() - start, usage)
+    return response
+
+def _call_chain(name: str, chain, inputs):
+    """Sync counterpart of _acall_chain for the blocking helpers; timeouts come from the HTTP client."""
+    llm_breaker.allow()
+    inputs = apply_budget(name, inputs)
+    try:
+        response = chain.invoke(inputs)
+    except Exception:
+        llm_breaker.record_failure()
+        raise
+    llm_breaker.record_success()
+    return response
+
+async def _anext_or_none(iterator, timeout: float):
+    try:
+        return await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+    except StopAsyncIteration:
+        return None
+
+async def _astream_chain(name: str, chain, inputs, usage: Optional[dict] = None) -> AsyncIterator[str]:
+    """Streaming counterpart of _acall_chain. Yields content chunks as they arrive.
+
+    For streams the SLO applies to the first chunk: if the primary model
+    hasn't started answering in time, the fallback model takes over. Every
+    later chunk must arrive within LLM_CALL_TIMEOUT_SECONDS.
+    """
+    llm_breaker.allow()
+    inputs = apply_budget(name, inputs)
+    tier = CHAIN_MODELS[name]
+    fallback = FALLBACK_CHAINS.get(name)
+    model = tier["model"]
+    start = time.perf_counter()
+    full = None
+    async with llm_scheduler.slot(CHAIN_PRIORITIES[name]):
+        try:
+            stream = chain.astream(inputs).__aiter__()
+            if fallback is None:
+                chunk = await _anext_or_none(stream, LLM_CALL_TIMEOUT_SECONDS)
+            else:
+                try:
+                    chunk = await _anext_or_none(stream, tier["slo_seconds"])
+                except asyncio.TimeoutError:
+                    await stream.aclose()
+                    metrics.counter(f"llm.{name}.slo_downgrades").inc()
+                    model = tier["fallback_model"]
+                    stream = fallback.astream(inputs).__aiter__()
+                    chunk = await _anext_or_none(stream, LLM_CALL_TIMEOUT_SECONDS)
+
+            while chunk is not None:
+                full = chunk if full is None else full + chunk
+                if chunk.content:
+                    yield chunk.content
+                chunk = await _anext_or_none(stream, LLM_CALL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            llm_breaker.record_failure()
+            metrics.counter(f"llm.{name}.timeouts").inc()
+            raise DeadlineExceeded(llm_scheduler.retry_after())
+        except Exception:
+            llm_breaker.record_failure()
+            raise
+    llm_breaker.record_success()
+    _record_usage(name, model, full, time.perf_counter() - start, usage)
+
+class FeedbackStreamExtractor:
+    """Incrementally decodes the "feedback" string value out of streamed JSON output.
+
+    feed() takes raw model chunks and returns only the newly available
+    feedback text, so the JSON scaffolding never reaches the candidate.
+    """
+    KEY_RE = re.compile(r'"feedback"\s*:\s*"')
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = self.KEY_RE.search(self.buffer)
+            if not match:
+                return ""
+            self.pos = match.end()
+
+        out = []
+        i = self.pos
+        while i < len(self.buffer):
+            c = self.buffer[i]
+            if c == "\\":
+                # Wait for the rest of the escape sequence before decoding it
+                if i + 1 >= len(self.buffer):
+                    break
+                escaped = self.buffer[i + 1]
+                if escaped == "u":
+                    if i + 6 > len(self.buffer):
+                        break
+                    try:
+                        out.append(chr(int(self.buffer[i + 2:i + 6], 16)))
+                    except ValueError:
+                        pass
+                    i += 6
+                    continue
+                out.append(JSON_ESCAPES.get(escaped, escaped))
+                i += 2
+                continue
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            out.append(c)
+            i += 1
+        self.pos = i
+        return "".join(out)
+
+def _screened(question: str, answer: str, llm_calls: int) -> Optional[dict]:
+    """Templated result when the pre-screen can judge the answer without the LLM."""
+    result = prescreen_answer(question, answer)
+    if result is not None:
+        metrics.counter(f"prescreen.{result['prescreen']}").inc()
+        metrics.counter("prescreen.llm_calls_avoided").inc(llm_calls)
+    return result
+
+def evaluate_answer_content(question: str, answer: str) -> Dict[str, Union[str, float]]:
+    screened = _screened(question, answer, llm_calls=1)
+    if screened is not None:
+        return {"feedback": screened["feedback"], "score": screened["score"]}
+    response = _call_chain("evaluation", evaluation_chain, {
+        "question": question,
+        "answer": answer
+    })
+    return _parse_evaluation(response.content)
+
+async def aevaluate_answer_content(question: str, answer: str, usage: Optional[dict] = None) -> Dict[str, Union[str, float]]:
+    """Async variant of evaluate_answer_content that does not block the event loop."""
+    response = await _acall_chain("evaluation", evaluation_chain, {
+        "question": question,
+        "answer": answer
+    }, usage)
+    return _parse_evaluation(response.content)
 
 
 def generate_followup_question(question: str, answer: str) -> str:
     """Generates a follow-up question based on the answer."""
     try:
-        response = followup_chain.invoke({
+        response = _call_chain("followup", followup_chain, {
             "question": question,
             "answer": answer
         })
         return response.content
     except Exception as e:
         print(f"Error generating follow-up: {e}")
-        return "Can you elaborate on the trade-offs of your approach?"
+        return FALLBACK_FOLLOWUP
+
+async def agenerate_followup_question(question: str, answer: str, usage: Optional[dict] = None) -> str:
+    """Async variant of generate_followup_question."""
+    try:
+        response = await _acall_chain("followup", followup_chain, {
+            "question": question,
+            "answer": answer
+        }, usage)
+        return response.content
+    except Exception as e:
+        print(f"Error generating follow-up: {e}")
+        return FALLBACK_FOLLOWUP
+
+async def aevaluate_answer_with_followup(question: str, answer: str, usage: Optional[dict] = None) -> Tuple[Dict[str, Union[str, float]], str]:
+    """Runs evaluation and follow-up generation concurrently.
+
+    Both chains only depend on the question and answer, so the request takes
+    as long as the slower of the two calls instead of their sum.
+    """
+    evaluation_result, follow_up = await asyncio.gather(
+        aevaluate_answer_content(question, answer, usage),
+        agenerate_followup_question(question, answer, usage)
+    )
+    return evaluation_result, follow_up
+
+async def aevaluate_combined(question: str, answer: str, usage: Optional[dict] = None) -> Optional[Dict[str, Union[str, float]]]:
+    """One structured call returning feedback, score and follow-up. None if the output is unusable."""
+    try:
+        response = await _acall_chain("combined", combined_chain, {
+            "question": question,
+            "answer": answer
+        }, usage)
+    except Exception as e:
+        print(f"Error in combined evaluation: {e}")
+        return None
+    return _parse_combined_evaluation(response.content)
+
+def _finalize_evaluation(result: dict, usage: dict) -> bool:
+    """Records which model produced the feedback on the result.
+
+    Returns False when any chain was downgraded to its fallback model, so
+    the lower-quality result isn't cached.
+    """
+    models = usage.get("models", {})
+    result["model"] = models.get("combined") or models.get("evaluation")
+    return all(model == CHAIN_MODELS[name]["model"] for name, model in models.items())
+
+async def aevaluate_answer(question: str, answer: str, mode: Optional[str] = None) -> Dict[str, Union[str, float]]:
+    """Evaluates an answer and generates a follow-up using the configured mode.
 
-def get_or_create_question(session: Session, content: str, topic: str = "General", difficulty: str = "Unknown") -> Question:
+    Returns a dict with 'feedback', 'score' and 'follow_up_question'. Empty,
+    "I don't know" and trivial answers are scored by the local pre-screen
+    without calling the LLM. Latency and tokens are recorded per mode under
+    evaluation_mode.<mode>.* metrics.
+    """
+    result = None
+    async for _, result in aevaluate_answer_stages(question, answer, mode):
+        pass
+    return result
+
+async def aevaluate_answer_stages(question: str, answer: str, mode: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """aevaluate_answer in stages, for callers that publish progress.
+
+    Yields ("evaluated", dict) with 'feedback' and 'score' as soon as they are
+    known, then ("result", dict) once the follow-up question is ready too.
+    """
+    mode = mode or EVALUATION_MODE
+    screened = _screened(question, answer, llm_calls=1 if mode == "combined" else 2)
+    if screened is not None:
+        yield "evaluated", screened
+        yield "result", screened
+        return
+    cached = await llm_cache.aget(f"answer:{mode}", question, answer)
+    if cached is not None:
+        yield "evaluated", cached
+        yield "result", cached
+        return
+
+    usage = {"tokens": 0}
+    start = time.perf_counter()
+
+    result = None
+    if mode == "combined":
+        result = await aevaluate_combined(question, answer, usage)
+        if result is None:
+            metrics.counter("evaluation_mode.combined.fallbacks").inc()
+        else:
+            yield "evaluated", result
+
+    if result is None:
+        # Both chains only depend on the question and answer, so they run concurrently
+        followup_task = asyncio.create_task(agenerate_followup_question(question, answer, usage))
+        try:
+            evaluation_result = await aevaluate_answer_content(question, answer, usage)
+        except BaseException:
+            followup_task.cancel()
+            raise
+        yield "evaluated", evaluation_result
+        result = {
+            "feedback": evaluation_result["feedback"],
+            "score": evaluation_result["score"],
+            "follow_up_question": await followup_task
+        }
+
+    metrics.counter(f"evaluation_mode.{mode}.requests").inc()
+    metrics.counter(f"evaluation_mode.{mode}.tokens").inc(usage["tokens"])
+    metrics.histogram(f"evaluation_mode.{mode}.latency_seconds").observe(time.perf_counter() - start)
+    if _finalize_evaluation(result, usage):
+        await llm_cache.aset(f"answer:{mode}", question, answer, result)
+    yield "result", result
+
+async def astream_evaluation(question: str, answer: str, mode: Optional[str] = None) -> AsyncIterator[Tuple[str, Union[str, dict]]]:
+    """Streaming variant of aevaluate_answer.
+
+    Yields ("token", text) events with feedback text as the model produces it,
+    then a single ("result", dict) event with the parsed feedback, score and
+    follow_up_question. In separate mode the follow-up is generated
+    concurrently while the feedback streams.
+    """
+    mode = mode or EVALUATION_MODE
+    screened = _screened(question, answer, llm_calls=1 if mode == "combined" else 2)
+    if screened is not None:
+        yield "token", screened["feedback"]
+        yield "result", screened
+        return
+    cached = await llm_cache.aget(f"answer:{mode}", question, answer)
+    if cached is not None:
+        yield "token", cached["feedback"]
+        yield "result", cached
+        return
+
+    usage = {"tokens": 0}
+    start = time.perf_counter()
+    first_token_at = None
+    inputs = {"question": question, "answer": answer}
+
+    followup_task = None
+    if mode == "combined":
+        chain_name, chain = "combined", combined_chain
+    else:
+        chain_name, chain = "evaluation", evaluation_chain
+        followup_task = asyncio.create_task(agenerate_followup_question(question, answer, usage))
+
+    extractor = FeedbackStreamExtractor()
+    try:
+        async for chunk in _astream_chain(chain_name, chain, inputs, usage):
+            text = extractor.feed(chunk)
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    metrics.histogram("evaluation_stream.ttft_seconds").observe(first_token_at - start)
+                yield "token", text
+    except Exception:
+        if followup_task is not None:
+            followup_task.cancel()
+        raise
+
+    if mode == "combined":
+        result = _parse_combined_evaluation(extractor.buffer)
+        if result is None:
+            metrics.counter("evaluation_mode.combined.fallbacks").inc()
+            evaluation_result, follow_up = await aevaluate_answer_with_followup(question, answer, usage)
+            result = {
+                "feedback": evaluation_result["feedback"],
+                "score": evaluation_result["score"],
+                "follow_up_question": follow_up
+            }
+    else:
+        evaluation_result = _parse_evaluation(extractor.buffer)
+        result = {
+            "feedback": evaluation_result["feedback"],
+            "score": evaluation_result["score"],
+            "follow_up_question": await followup_task
+        }
+
+    metrics.counter(f"evaluation_mode.{mode}.requests").inc()
+    metrics.counter(f"evaluation_mode.{mode}.tokens").inc(usage["tokens"])
+    metrics.histogram(f"evaluation_mode.{mode}.latency_seconds").observe(time.perf_counter() - start)
+    if _finalize_evaluation(result, usage):
+        await llm_cache.aset(f"answer:{mode}", question, answer, result)
+    yield "result", result
+
+def get_or_create_question(session: Session, content: str, topic: str = "General", difficulty: str = "Unknown",
+                           resume_digest_id: Optional[str] = None) -> Question:
     """Finds a question by content or creates a new one."""
     stmt = select(Question).where(Question.content == content)
     question = session.exec(stmt).first()
     
     if not question:
-        question = Question(content=content, topic=topic, difficulty=difficulty)
+        question = Question(content=content, topic=topic, difficulty=difficulty, resume_digest_id=resume_digest_id)
         session.add(question)
         session.commit()
         session.refresh(question)
         
     return question
 
+def save_interview_response(session: Session, session_id: int, question: str, answer: str, result: dict, topic: str,
+                            audio_sha256: Optional[str] = None, commit: bool = True) -> InterviewResponse:
+    """Stores an evaluated answer, creating the question row if needed.
+
+    audio_sha256 links a spoken answer to its stored recording (services/audio_store.py).
+    With commit=False the response is only flushed, for callers that write
+    more in the same transaction.
+    """
+    db_question = get_or_create_question(session, question, topic=topic)
+
+    new_response = InterviewResponse(
+        session_id=session_id,
+        question_id=db_question.id,
+        answer_text=answer,
+        evaluation_text=result["feedback"],
+        score=result["score"],
+        model_name=result.get("model"),
+        evaluation_status=result.get("evaluation_status", "done"),
+        audio_sha256=audio_sha256
+    )
+    session.add(new_response)
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return new_response
+
+def pending_result() -> dict:
+    """Placeholder result for an answer whose evaluation is deferred to the retry worker."""
+    return {
+        "feedback": PENDING_FEEDBACK,
+        "score": None,
+        "follow_up_question": FALLBACK_FOLLOWUP,
+        "evaluation_status": "pending"
+    }
+
+def defer_evaluation(session: Session, session_id: int, question: str, answer: str, topic: str,
+                     audio_sha256: Optional[str] = None) -> dict:
+    """Stores the answer unevaluated for the retry worker (services/evaluation_retry.py).
+
+    Used while the LLM circuit breaker is open. Returns a placeholder result
+    with a generic follow-up so the interview can continue.
+    """
+    result = pending_result()
+    save_interview_response(session, session_id, question, answer, result, topic, audio_sha256)
+    metrics.counter("evaluation_retry.deferred").inc()
+    return result
+
+def session_transcription_profile(session: Session, session_id: int) -> Optional[str]:
+    """Transcription profile chosen for the session's room; None if it uses the default."""
+    return session.exec(
+        select(InterviewRoom.transcription_profile)
+        .join(InterviewSession, InterviewSession.room_id == InterviewRoom.id)
+        .where(InterviewSession.id == session_id)
+    ).first()
+
 def get_custom_response(prompt: str) -> str:
-    response = local_llm.invoke(prompt)
+    response = _call_chain("custom", custom_llm, prompt)
+    return response.content
+
+async def aget_custom_response(prompt: str) -> str:
+    """Async variant of get_custom_response, scheduled after every other interactive call."""
+    response = await _acall_chain("custom", custom_llm, prompt)
     return response.content
@@ -0,0 +1,227 @@
+"""Chat model backends selected by LLM_BACKEND.
+
+- "ollama": RoutedChatOllama across the configured Ollama hosts (default)
+- "fake": deterministic canned replies with a simulated latency and token
+  rate, so the app can be load-tested without a model
+- "record": Ollama, appending every reply to a JSONL recordings file
+- "replay": serves replies from a recordings file, keyed by model and prompt
+
+This module must not import config.settings; settings builds the models
+through build_chat_model.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field, PrivateAttr
+
+from services.llm_router import RoutedChatOllama
+
+BACKENDS = ("ollama", "fake", "record", "replay")
+
+
+class RecordingNotFound(LookupError):
+    pass
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _usage(prompt: str, content: str) -> dict:
+    input_tokens = max(1, len(prompt) // 4)
+    output_tokens = max(1, len(content) // 4)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+def recording_key(model: str, messages: List[BaseMessage]) -> str:
+    payload = json.dumps([model, [(m.type, str(m.content)) for m in messages]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FakeChatModel(BaseChatModel):
+    """Canned replies shaped like what each prompt asks for.
+
+    The score is derived from a hash of the prompt, so the same answer
+    always gets the same evaluation. Each call waits latency seconds plus
+    one word per 1/tokens_per_second (0 disables the token delay).
+    """
+
+    model: str = "fake"
+    latency: float = 0.2
+    tokens_per_second: float = 40.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "latency": self.latency, "tokens_per_second": self.tokens_per_second}
+
+    def _reply(self, prompt: str) -> str:
+        score = 4 + int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16) % 6
+        feedback = "The answer covers the main idea; add a concrete example and discuss the trade-offs."
+        follow_up = "How would your approach change under ten times the load?"
+        if "'follow_up_question'" in prompt:
+            return json.dumps({"feedback": feedback, "score": score, "follow_up_question": follow_up})
+        if "JSON" in prompt:
+            return json.dumps({"feedback": feedback, "score": score})
+        if "follow-up question" in prompt:
+            return follow_up
+        if "Focus Topic:" in prompt:
+            topic = prompt.split("Focus Topic:", 1)[1].splitlines()[0].strip()
+            return f"How would you apply {topic} to design a rate limiter for a public API used by thousands of clients?"
+        return "This is a canned reply from the fake LLM backend."
+
+    def _duration(self, content: str) -> float:
+        if self.tokens_per_second <= 0:
+            return self.latency
+        return self.latency + len(content.split()) / self.tokens_per_second
+
+    def _result(self, prompt: str, content: str) -> ChatResult:
+        message = AIMessage(content=content, usage_metadata=_usage(prompt, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        content = self._reply(prompt)
+        time.sleep(self._duration(content))
+        return self._result(prompt, content)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        content = self._reply(prompt)
+        await asyncio.sleep(self._duration(content))
+        return self._result(prompt, content)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        content = self._reply(prompt)
+        await asyncio.sleep(self.latency)
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            last = i == len(words) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=_usage(prompt, content) if last else None
+            ))
+
+
+class RecordingChatModel(BaseChatModel):
+    """Forwards calls to inner and appends each reply to a JSONL file."""
+
+    model: str
+    inner: Any = Field(exclude=True)
+    path: str
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "path": self.path}
+
+    def _record(self, messages: List[BaseMessage], message: BaseMessage):
+        entry = {
+            "key": recording_key(self.model, messages),
+            "model": self.model,
+            "prompt": _prompt_text(messages)[-200:],
+            "content": message.content,
+            "usage": getattr(message, "usage_metadata", None),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(messages, result.generations[0].message)
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(messages, result.generations[0].message)
+        return result
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        full = None
+        async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            full = chunk.message if full is None else full + chunk.message
+            yield chunk
+        if full is not None:
+            self._record(messages, full)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves replies captured by RecordingChatModel; unknown prompts raise RecordingNotFound."""
+
+    model: str
+    path: str
+    latency: float = 0.0
+    _recordings: Optional[Dict[str, dict]] = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "path": self.path}
+
+    def _lookup(self, messages: List[BaseMessage]) -> dict:
+        if self._recordings is None:
+            recordings = {}
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # Later recordings of the same prompt win
+                        recordings[entry["key"]] = entry
+            self._recordings = recordings
+        entry = self._recordings.get(recording_key(self.model, messages))
+        if entry is None:
+            raise RecordingNotFound(f"No recording for this {self.model} prompt in {self.path}")
+        return entry
+
+    def _result(self, entry: dict) -> ChatResult:
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        entry = self._lookup(messages)
+        time.sleep(self.latency)
+        return self._result(entry)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        entry = self._lookup(messages)
+        await asyncio.sleep(self.latency)
+        return self._result(entry)
+
+
+def build_chat_model(backend: str, model: str, temperature: float, router=None, fake_latency: float = 0.2,
+                     fake_tokens_per_second: float = 40.0, recordings_path: str = "recordings/llm.jsonl") -> BaseChatModel:
+    """Chat model for the configured backend (see BACKENDS)."""
+    if backend == "fake":
+        return FakeChatModel(model=model, latency=fake_latency, tokens_per_second=fake_tokens_per_second)
+    if backend == "replay":
+        return ReplayChatModel(model=model, path=recordings_path)
+    ollama = RoutedChatOllama(model=model, temperature=temperature, router=router)
+    if backend == "record":
+        return RecordingChatModel(model=model, inner=ollama, path=recordings_path)
+    if backend != "ollama":
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+    return ollama
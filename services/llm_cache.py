@@ -0,0 +1,185 @@
+"""Two-level cache for LLM evaluation results.
+
+An in-process LRU with TTL sits in front of the LLMCacheEntry table, so hits
+survive restarts and are shared between workers. Keys combine a hash of the
+normalized question and answer with the model name and prompt version.
+
+The table is the source of truth: a worker keeps an entry in memory for at
+most LLM_CACHE_MEMORY_TTL_SECONDS before reading it again, so an
+invalidation reaches every worker within that time.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete
+
+from config.database import engine
+from config.settings import (
+    CHAIN_MODELS, LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MEMORY_TTL_SECONDS
+)
+from models.db_models import LLMCacheEntry
+from prompts.evaluation import PROMPT_VERSION
+from services import metrics
+
+TRAILING_PUNCTUATION_RE = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation."""
+    text = " ".join(text.lower().split())
+    return TRAILING_PUNCTUATION_RE.sub("", text)
+
+
+# Cached answers depend on every model that can produce them
+EVALUATION_MODELS = "+".join(CHAIN_MODELS[name]["model"] for name in ("evaluation", "followup", "combined"))
+
+
+class LLMCache:
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 model: str = EVALUATION_MODELS, prompt_version: str = PROMPT_VERSION, enabled: bool = LLM_CACHE_ENABLED,
+                 memory_ttl_seconds: int = LLM_CACHE_MEMORY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.model = model
+        self.prompt_version = prompt_version
+        self.enabled = enabled
+        # key -> (expires_at monotonic seconds, payload)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def make_key(self, kind: str, question: str, answer: str) -> str:
+        content = "\x1f".join([kind, self.model, self.prompt_version, normalize_text(question), normalize_text(answer)])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    # ---------- In-process LRU ----------
+    def _memory_get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def _memory_set(self, key: str, payload: dict, ttl_seconds: float):
+        self._entries[key] = (time.monotonic() + min(ttl_seconds, self.memory_ttl_seconds), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.counter("llm_cache.evictions").inc()
+
+    # ---------- Postgres ----------
+    def _db_get(self, key: str) -> Optional[tuple]:
+        with Session(engine) as session:
+            entry = session.exec(select(LLMCacheEntry).where(LLMCacheEntry.cache_key == key)).first()
+            if entry is None:
+                return None
+            remaining = (entry.expires_at - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                session.delete(entry)
+                session.commit()
+                return None
+            return json.loads(entry.payload), remaining
+
+    def _db_set(self, key: str, kind: str, payload: dict):
+        with Session(engine) as session:
+            entry = session.exec(select(LLMCacheEntry).where(LLMCacheEntry.cache_key == key)).first()
+            if entry is None:
+                entry = LLMCacheEntry(cache_key=key, kind=kind, model=self.model, prompt_version=self.prompt_version,
+                                      payload="", expires_at=datetime.utcnow())
+            entry.payload = json.dumps(payload)
+            entry.created_at = datetime.utcnow()
+            entry.expires_at = entry.created_at + timedelta(seconds=self.ttl_seconds)
+            session.add(entry)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker stored the same key first
+                session.rollback()
+
+    # ---------- Public API ----------
+    async def aget(self, kind: str, question: str, answer: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        key = self.make_key(kind, question, answer)
+
+        payload = self._memory_get(key)
+        if payload is not None:
+            metrics.counter("llm_cache.memory_hits").inc()
+            return payload
+
+        try:
+            found = await asyncio.to_thread(self._db_get, key)
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            found = None
+        if found is not None:
+            payload, remaining = found
+            self._memory_set(key, payload, remaining)
+            metrics.counter("llm_cache.db_hits").inc()
+            return payload
+
+        metrics.counter("llm_cache.misses").inc()
+        return None
+
+    async def aset(self, kind: str, question: str, answer: str, payload: dict):
+        if not self.enabled:
+            return
+        key = self.make_key(kind, question, answer)
+        self._memory_set(key, payload, self.ttl_seconds)
+        try:
+            await asyncio.to_thread(self._db_set, key, kind, payload)
+            metrics.counter("llm_cache.stores").inc()
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+
+    def invalidate(self, prompt_version: Optional[str] = None, stale_only: bool = False) -> int:
+        """Deletes cached entries and returns how many rows were removed.
+
+        prompt_version removes only that version; stale_only removes every
+        version except the current one; neither removes everything. The
+        in-process LRU of this worker is always cleared, other workers drop
+        their copies within LLM_CACHE_MEMORY_TTL_SECONDS. Blocking; call it
+        from a thread.
+        """
+        self._entries.clear()
+        statement = delete(LLMCacheEntry)
+        if prompt_version is not None:
+            statement = statement.where(LLMCacheEntry.prompt_version == prompt_version)
+        elif stale_only:
+            statement = statement.where(LLMCacheEntry.prompt_version != self.prompt_version)
+        with Session(engine) as session:
+            result = session.exec(statement)
+            session.commit()
+            metrics.counter("llm_cache.invalidated").inc(result.rowcount)
+            return result.rowcount
+
+    def stats(self) -> dict:
+        hits = metrics.counter("llm_cache.memory_hits").value + metrics.counter("llm_cache.db_hits").value
+        misses = metrics.counter("llm_cache.misses").value
+        return {
+            "enabled": self.enabled,
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "memory_ttl_seconds": self.memory_ttl_seconds,
+            "memory_hits": metrics.counter("llm_cache.memory_hits").value,
+            "db_hits": metrics.counter("llm_cache.db_hits").value,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,193 @@
+"""Routing of chat calls across several Ollama hosts.
+
+RoutedChatOllama is a drop-in chat model for the chains: each call goes to
+the healthy backend with the fewest outstanding requests. A background probe
+ejects backends that stop answering and re-admits them once they recover.
+Generations have no side effects, so a call that fails before producing
+output is retried on another backend.
+"""
+
+import asyncio
+import itertools
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_ollama import ChatOllama
+from pydantic import Field
+
+from services import metrics
+
+
+class NoBackendAvailable(Exception):
+    pass
+
+
+class OllamaBackend:
+    def __init__(self, base_url: str, request_timeout: Optional[float] = None):
+        self.base_url = base_url.rstrip("/")
+        self.request_timeout = request_timeout
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self._clients: Dict[tuple, ChatOllama] = {}
+
+    def client(self, model: str, temperature: float) -> ChatOllama:
+        key = (model, temperature)
+        if key not in self._clients:
+            # The timeout bounds each HTTP request so a hung host can't pin a worker
+            self._clients[key] = ChatOllama(model=model, temperature=temperature, base_url=self.base_url,
+                                            client_kwargs={"timeout": self.request_timeout})
+        return self._clients[key]
+
+
+class OllamaRouter:
+    def __init__(self, base_urls: List[str], failure_threshold: int = 3, probe_interval: float = 10.0,
+                 probe_timeout: float = 2.0, request_timeout: Optional[float] = None):
+        if not base_urls:
+            raise ValueError("At least one Ollama base URL is required")
+        self.backends = [OllamaBackend(url, request_timeout) for url in base_urls]
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self._rotation = itertools.count()
+        for backend in self.backends:
+            metrics.register_gauge(f"llm_router.outstanding.{backend.base_url}", lambda b=backend: b.outstanding)
+            metrics.register_gauge(f"llm_router.healthy.{backend.base_url}", lambda b=backend: int(b.healthy))
+
+    def pick(self, exclude: Optional[Set[OllamaBackend]] = None) -> OllamaBackend:
+        """Least-outstanding healthy backend; unhealthy ones only if nothing else is left."""
+        exclude = exclude or set()
+        candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            raise NoBackendAvailable("All Ollama backends failed for this call")
+        pool = [b for b in candidates if b.healthy] or candidates
+        # Rotate the starting point so ties don't always land on the first backend
+        start = next(self._rotation) % len(pool)
+        pool = pool[start:] + pool[:start]
+        return min(pool, key=lambda b: b.outstanding)
+
+    def record_success(self, backend: OllamaBackend):
+        backend.consecutive_failures = 0
+        backend.healthy = True
+
+    def record_failure(self, backend: OllamaBackend):
+        backend.consecutive_failures += 1
+        metrics.counter(f"llm_router.failures.{backend.base_url}").inc()
+        if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+            backend.healthy = False
+            metrics.counter("llm_router.ejections").inc()
+            print(f"Ejecting Ollama backend {backend.base_url} after {backend.consecutive_failures} failures")
+
+    async def probe(self, backend: OllamaBackend, client: httpx.AsyncClient):
+        try:
+            response = await client.get(f"{backend.base_url}/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+        except Exception:
+            self.record_failure(backend)
+            return
+        if not backend.healthy:
+            print(f"Ollama backend {backend.base_url} is healthy again")
+        self.record_success(backend)
+
+    async def probe_all(self):
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*(self.probe(b, client) for b in self.backends))
+
+    async def run_health_checks(self):
+        """Probes all backends forever; started as a background task on app startup."""
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.probe_interval)
+
+
+class RoutedChatOllama(BaseChatModel):
+    """Chat model that forwards each call to a backend chosen by an OllamaRouter."""
+
+    model: str
+    temperature: float = 0.0
+    router: Any = Field(default=None, exclude=True)
+    max_attempts: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-ollama"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature}
+
+    def _attempts(self) -> int:
+        return min(self.max_attempts, len(self.router.backends))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tried: Set[OllamaBackend] = set()
+        for attempt in range(self._attempts()):
+            backend = self.router.pick(tried)
+            backend.outstanding += 1
+            try:
+                result = backend.client(self.model, self.temperature)._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                self.router.record_success(backend)
+                return result
+            except Exception:
+                self.router.record_failure(backend)
+                tried.add(backend)
+                if attempt + 1 >= self._attempts():
+                    raise
+                metrics.counter("llm_router.retries").inc()
+            finally:
+                backend.outstanding -= 1
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tried: Set[OllamaBackend] = set()
+        for attempt in range(self._attempts()):
+            backend = self.router.pick(tried)
+            backend.outstanding += 1
+            try:
+                result = await backend.client(self.model, self.temperature)._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                self.router.record_success(backend)
+                return result
+            except Exception:
+                self.router.record_failure(backend)
+                tried.add(backend)
+                if attempt + 1 >= self._attempts():
+                    raise
+                metrics.counter("llm_router.retries").inc()
+            finally:
+                backend.outstanding -= 1
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        backend = self.router.pick()
+        backend.outstanding += 1
+        try:
+            yield from backend.client(self.model, self.temperature)._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            self.router.record_success(backend)
+        except Exception:
+            self.router.record_failure(backend)
+            raise
+        finally:
+            backend.outstanding -= 1
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Only retried while nothing has been yielded; a half-streamed answer can't be replayed
+        tried: Set[OllamaBackend] = set()
+        for attempt in range(self._attempts()):
+            backend = self.router.pick(tried)
+            backend.outstanding += 1
+            started = False
+            try:
+                async for chunk in backend.client(self.model, self.temperature)._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    yield chunk
+                self.router.record_success(backend)
+                return
+            except Exception:
+                self.router.record_failure(backend)
+                tried.add(backend)
+                if started or attempt + 1 >= self._attempts():
+                    raise
+                metrics.counter("llm_router.retries").inc()
+            finally:
+                backend.outstanding -= 1
@@ -0,0 +1,138 @@
+"""Admission control between the chains and the model.
+
+Every LLM call takes a slot from the scheduler first. At most
+LLM_MAX_CONCURRENCY calls run at once; the rest wait in a priority queue so
+interactive evaluations are served before follow-ups, question generation
+and free-form custom prompts, and questions pre-generated in the background
+come last. When the queue is full callers are rejected
+immediately, and calls that cannot finish within their deadline are
+abandoned, both with a Retry-After hint.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from config.settings import LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_DEADLINE_SECONDS
+from services import metrics
+
+T = TypeVar("T")
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class Priority(IntEnum):
+    # Lower value is served first
+    EVALUATION = 0
+    FOLLOWUP = 1
+    QUESTION_GENERATION = 2
+    CUSTOM_PROMPT = 3
+    # Background pre-generation (services/question_pool.py), behind every request a user waits on
+    QUESTION_PREFETCH = 4
+
+
+class SchedulerOverloaded(Exception):
+    """The wait queue is full; the caller should retry later."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("LLM queue is full")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """The call could not be completed before its deadline."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("LLM call exceeded its deadline")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+                 default_deadline: float = LLM_DEADLINE_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+        self.active = 0
+        self._queue: List[tuple] = []  # (priority, sequence, future)
+        self._sequence = itertools.count()
+        # Moving average of slot hold time, used for Retry-After estimates
+        self._avg_service_time = 1.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    def retry_after(self) -> int:
+        waves = (self.queue_depth + self.active) / max(self.max_concurrency, 1)
+        return max(1, int(round(waves * self._avg_service_time)))
+
+    async def _acquire(self, priority: Priority, timeout: float):
+        metrics.histogram("llm_scheduler.queue_depth_on_arrival", DEPTH_BUCKETS).observe(self.queue_depth)
+        if self.active < self.max_concurrency and self.queue_depth == 0:
+            self.active += 1
+            metrics.histogram(f"llm_scheduler.wait_seconds.{priority.name.lower()}", WAIT_BUCKETS).observe(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            metrics.counter("llm_scheduler.rejected").inc()
+            raise SchedulerOverloaded(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                self._release()
+            metrics.counter("llm_scheduler.deadline_exceeded").inc()
+            raise DeadlineExceeded(self.retry_after())
+        except asyncio.CancelledError:
+            # Slot may have been handed over just before the cancellation landed
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        metrics.histogram(f"llm_scheduler.wait_seconds.{priority.name.lower()}", WAIT_BUCKETS).observe(time.perf_counter() - start)
+
+    def _release(self):
+        # Hand the slot straight to the highest-priority live waiter
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, deadline: Optional[float] = None):
+        """Holds a concurrency slot for the body. deadline bounds the queue wait."""
+        await self._acquire(priority, deadline if deadline is not None else self.default_deadline)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * (time.perf_counter() - start)
+            self._release()
+
+    async def run(self, priority: Priority, call: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        """Runs call() in a slot. deadline bounds queue wait plus execution."""
+        deadline = deadline if deadline is not None else self.default_deadline
+        start = time.perf_counter()
+        async with self.slot(priority, deadline):
+            remaining = deadline - (time.perf_counter() - start)
+            try:
+                return await asyncio.wait_for(call(), timeout=max(remaining, 0))
+            except asyncio.TimeoutError:
+                metrics.counter("llm_scheduler.deadline_exceeded").inc()
+                raise DeadlineExceeded(self.retry_after())
+
+
+llm_scheduler = LLMScheduler()
+metrics.register_gauge("llm_scheduler.queue_depth", lambda: llm_scheduler.queue_depth)
+metrics.register_gauge("llm_scheduler.active", lambda: llm_scheduler.active)
@@ -0,0 +1,85 @@
+"""In-process metrics shared by the services and exposed on /admin/metrics."""
+
+import threading
+from typing import Callable, Dict, Optional, Sequence
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters: Dict[str, "Counter"] = {}
+_histograms: Dict[str, "Histogram"] = {}
+_gauges: Dict[str, Callable[[], float]] = {}
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 4),
+                "avg": round(self._sum / self._count, 4) if self._count else 0.0,
+                "buckets": {f"le_{b:g}": c for b, c in zip(self.buckets, self._counts)},
+            }
+
+
+def counter(name: str) -> Counter:
+    """Returns the counter registered under name, creating it on first use."""
+    with _lock:
+        if name not in _counters:
+            _counters[name] = Counter()
+        return _counters[name]
+
+
+def histogram(name: str, buckets: Optional[Sequence[float]] = None) -> Histogram:
+    """Returns the histogram registered under name, creating it on first use."""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(buckets or DEFAULT_BUCKETS)
+        return _histograms[name]
+
+
+def register_gauge(name: str, fn: Callable[[], float]):
+    """Registers a callable that is sampled every time a snapshot is taken."""
+    with _lock:
+        _gauges[name] = fn
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        histograms = dict(_histograms)
+        gauges = dict(_gauges)
+    return {
+        "counters": {name: c.value for name, c in sorted(counters.items())},
+        "gauges": {name: fn() for name, fn in sorted(gauges.items())},
+        "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())},
+    }
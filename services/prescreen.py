@@ -0,0 +1,123 @@
+"""Local pre-screen for answers that don't need the LLM.
+
+Empty transcriptions, hesitations only ("um", "uh") and explicit "I don't know" answers
+get a fixed low score and templated feedback instead of a full evaluation
+plus follow-up. Anything else goes to the model, however short: "404",
+"O(log n)" or "Dijkstra" can be complete answers.
+
+With PRESCREEN_HEURISTICS, answers without a single meaningful word are
+also screened as too short, and long answers that share no keyword with the
+question as off topic.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from config.settings import (
+    PRESCREEN_ENABLED, PRESCREEN_MAX_DONT_KNOW_WORDS, PRESCREEN_HEURISTICS, PRESCREEN_MIN_CONTENT_WORDS,
+    PRESCREEN_OFFTOPIC_MIN_WORDS
+)
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+DONT_KNOW_RE = re.compile(
+    r"\b(i\s+do\s*n[o']?t\s+know|no\s+idea|not\s+sure|no\s+clue|(?:can't|cannot|cant)\s+remember|never\s+heard\s+of\s+it)\b"
+)
+SKIP_ANSWERS = {"pass", "skip", "next", "next question"}
+
+# Sounds that are never an answer on their own
+DISFLUENCIES = {"um", "umm", "uh", "uhm", "erm", "er", "ah", "hmm", "mm"}
+
+# Ignored when looking for meaningful words; "sort" or "mean" alone may still answer a question
+FILLER_WORDS = DISFLUENCIES | {
+    "like", "so", "well", "okay", "ok", "yeah", "basically", "actually", "just", "you", "know", "i", "mean",
+    "kind", "of", "sort",
+}
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "then", "of", "to", "in", "on", "at", "for", "with", "by",
+    "from", "as", "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "what", "which", "who", "how", "why", "when", "where", "do", "does", "did", "can", "could", "would",
+    "should", "will", "your", "you", "we", "they", "he", "she", "my", "me", "our", "their", "there",
+    "about", "into", "than", "some", "any", "all", "not", "have", "has", "had", "describe", "explain",
+}
+
+TEMPLATES = {
+    "empty": {
+        "feedback": "No answer was detected. Please try answering the question, even partially.",
+        "score": 0.0,
+        "follow_up_question": "Could you share your first thoughts on how you would approach this question?",
+    },
+    "dont_know": {
+        "feedback": "You indicated you don't know the answer. Talking through what you do know, or how you would find out, still earns credit.",
+        "score": 0.0,
+        "follow_up_question": "Which related concept are you familiar with, and how might it apply here?",
+    },
+    "too_short": {
+        "feedback": "The answer is too brief to evaluate. Explain your reasoning and give a concrete example.",
+        "score": 1.0,
+        "follow_up_question": "Can you expand on that with the key steps of your approach?",
+    },
+    "off_topic": {
+        "feedback": "The answer does not appear to address the question. Focus on what the question asks.",
+        "score": 1.0,
+        "follow_up_question": "Could you restate the question in your own words and then answer it?",
+    },
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def content_words(text: str) -> list:
+    """Lowercased, lightly stemmed words without filler and stop words."""
+    words = WORD_RE.findall(text.lower())
+    return [_stem(w) for w in words if w not in FILLER_WORDS and w not in STOP_WORDS and len(w) > 1]
+
+
+def keyword_similarity(question: str, answer: str) -> float:
+    """Cosine similarity of the question's and answer's content-word counts."""
+    q, a = Counter(content_words(question)), Counter(content_words(answer))
+    if not q or not a:
+        return 0.0
+    dot = sum(count * a[word] for word, count in q.items())
+    norm = math.sqrt(sum(c * c for c in q.values())) * math.sqrt(sum(c * c for c in a.values()))
+    return dot / norm
+
+
+def classify(question: str, answer: str, heuristics: bool = PRESCREEN_HEURISTICS) -> Optional[str]:
+    """Returns the reason an answer can skip the LLM, or None if it needs a real evaluation."""
+    words = WORD_RE.findall(answer.lower())
+    if all(w in DISFLUENCIES for w in words):
+        return "empty"
+    text = " ".join(words)
+    if text in SKIP_ANSWERS:
+        return "dont_know"
+    # Hedged answers ("not sure, maybe a hash table") still go to the model
+    if len(words) <= PRESCREEN_MAX_DONT_KNOW_WORDS and DONT_KNOW_RE.search(text) \
+            and not content_words(DONT_KNOW_RE.sub(" ", text)):
+        return "dont_know"
+    if not heuristics:
+        return None
+    content = content_words(answer)
+    if len(content) < PRESCREEN_MIN_CONTENT_WORDS:
+        return "too_short"
+    if len(content) >= PRESCREEN_OFFTOPIC_MIN_WORDS and keyword_similarity(question, answer) == 0:
+        return "off_topic"
+    return None
+
+
+def prescreen_answer(question: str, answer: str) -> Optional[Dict]:
+    """Templated evaluation for answers that don't need the model, else None."""
+    if not PRESCREEN_ENABLED:
+        return None
+    reason = classify(question, answer or "")
+    if reason is None:
+        return None
+    return {**TEMPLATES[reason], "model": "prescreen", "prescreen": reason}
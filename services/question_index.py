@@ -0,0 +1,196 @@
+"""Similarity index over previously generated resume questions.
+
+Generated questions are stored with the topic, difficulty and resume digest
+they were generated for. Before calling the LLM, the question endpoint looks
+for a stored question of the same topic and difficulty whose resume digest
+is close enough to the candidate's, and serves it instead.
+
+Only questions that are generic for the candidate are served: every word a
+question takes from its own resume must be in the candidate's digest too.
+Questions about a specific employer, project or product therefore only go
+to candidates whose resume mentions it, such as the same resume again.
+
+Digests are compared as L2-normalized bags of content words and word
+bigrams with sublinear term frequency, through an inverted index so a lookup
+only touches digests that share a term with the query. The index is loaded
+from the Question table in the background and updated as questions are
+inserted; rows inserted by other workers are picked up every
+QUESTION_INDEX_REFRESH_SECONDS.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from config.database import engine
+from config.settings import (
+    QUESTION_REUSE_ENABLED, QUESTION_REUSE_THRESHOLD, QUESTION_REUSE_RATE, QUESTION_INDEX_REFRESH_SECONDS
+)
+from models.db_models import Question, ResumeDigest
+from services import metrics
+from services.prescreen import content_words
+
+# Digest section titles (see services/resume_service.py) carry no signal
+DIGEST_STOP_WORDS = {"skill", "role", "project", "summary"}
+
+# A hit is drawn at random from this many of the closest questions, so
+# similar candidates don't all get the same question
+TOP_CANDIDATES = 5
+
+# Sessions whose served questions are remembered, least recently used first out
+MAX_TRACKED_SESSIONS = 10000
+
+SIMILARITY_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def vectorize(text: str) -> Dict[str, float]:
+    """Normalized sublinear term frequencies of the content words and bigrams of text."""
+    words = [w for w in content_words(text) if w not in DIGEST_STOP_WORDS]
+    terms = Counter(words)
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    weights = {term: 1 + math.log(count) for term, count in terms.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {term: w / norm for term, w in weights.items()} if norm else {}
+
+
+class QuestionIndex:
+    def __init__(self, threshold: float = QUESTION_REUSE_THRESHOLD, reuse_rate: float = QUESTION_REUSE_RATE,
+                 refresh_seconds: float = QUESTION_INDEX_REFRESH_SECONDS, enabled: bool = QUESTION_REUSE_ENABLED):
+        self.threshold = threshold
+        self.reuse_rate = reuse_rate
+        self.refresh_seconds = refresh_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # term -> {digest id: weight}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._digests: Set[str] = set()
+        # digest id -> its terms, to find the resume words in its questions
+        self._digest_terms: Dict[str, Set[str]] = {}
+        # (topic, difficulty) -> digest id -> [(question id, content, words taken from the resume)]
+        self._questions: Dict[Tuple[str, str], Dict[str, List[Tuple[int, str, Set[str]]]]] = defaultdict(lambda: defaultdict(list))
+        self._question_ids: Set[int] = set()
+        # session id -> ids of questions already served to it
+        self._served: "OrderedDict[int, Set[int]]" = OrderedDict()
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._syncing = False
+
+    @property
+    def size(self) -> int:
+        return len(self._question_ids)
+
+    def add(self, question_id: int, content: str, topic: str, difficulty: str, digest_id: str, digest_text: str):
+        """Indexes one question; adding an already indexed question is a no-op."""
+        with self._lock:
+            if question_id in self._question_ids:
+                return
+            if digest_id not in self._digests:
+                vector = vectorize(digest_text)
+                for term, weight in vector.items():
+                    self._postings[term][digest_id] = weight
+                self._digests.add(digest_id)
+                self._digest_terms[digest_id] = set(vector)
+            resume_words = set(content_words(content)) & self._digest_terms[digest_id]
+            self._questions[(topic, difficulty)][digest_id].append((question_id, content, resume_words))
+            self._question_ids.add(question_id)
+
+    def sync(self):
+        """Loads questions inserted since the last sync (by any worker)."""
+        try:
+            with Session(engine) as session:
+                rows = session.exec(
+                    select(Question.id, Question.content, Question.topic, Question.difficulty,
+                           ResumeDigest.id, ResumeDigest.digest)
+                    .join(ResumeDigest, ResumeDigest.id == Question.resume_digest_id)
+                    .where(Question.id > self._last_id)
+                    .order_by(Question.id)
+                ).all()
+            for row in rows:
+                self.add(*row)
+            if rows:
+                self._last_id = rows[-1][0]
+        except Exception as e:
+            print(f"Error syncing question index: {e}")
+        finally:
+            self._synced_at = time.monotonic()
+            self._syncing = False
+
+    async def _refresh_if_stale(self):
+        if self._syncing or time.monotonic() - self._synced_at < self.refresh_seconds:
+            return
+        self._syncing = True
+        await asyncio.to_thread(self.sync)
+
+    def _search(self, topic: str, difficulty: str, digest_text: str, exclude: Set[int]) -> List[Tuple[float, int, str]]:
+        """(similarity, question id, content) of matching questions, closest first."""
+        with self._lock:
+            candidates = self._questions.get((topic, difficulty))
+            if not candidates:
+                return []
+            query = vectorize(digest_text)
+            scores: Dict[str, float] = defaultdict(float)
+            for term, weight in query.items():
+                for digest_id, digest_weight in self._postings.get(term, {}).items():
+                    if digest_id in candidates:
+                        scores[digest_id] += weight * digest_weight
+            matches = []
+            for digest_id, score in scores.items():
+                if score < self.threshold:
+                    continue
+                matches.extend(
+                    (score, qid, content) for qid, content, resume_words in candidates[digest_id]
+                    if qid not in exclude and resume_words <= query.keys()
+                )
+        return sorted(matches, reverse=True)
+
+    async def afind(self, topic: str, difficulty: str, digest_text: str, session_id: Optional[int] = None) -> Optional[dict]:
+        """Returns a stored question for a similar resume, or None if the LLM should generate one.
+
+        Questions already served to the session are skipped. A share
+        (1 - QUESTION_REUSE_RATE) of lookups always misses so the bank keeps growing.
+        """
+        if not self.enabled or not digest_text:
+            return None
+        await self._refresh_if_stale()
+        if random.random() >= self.reuse_rate:
+            metrics.counter("question_index.bypassed").inc()
+            return None
+
+        matches = self._search(topic, difficulty, digest_text, self._served.get(session_id, set()))
+        if not matches:
+            metrics.counter("question_index.misses").inc()
+            return None
+        similarity, question_id, content = random.choice(matches[:TOP_CANDIDATES])
+        metrics.counter("question_index.hits").inc()
+        metrics.histogram("question_index.similarity", SIMILARITY_BUCKETS).observe(similarity)
+        self.mark_served(session_id, question_id)
+        return {"question": content, "topic": topic}
+
+    def mark_served(self, session_id: Optional[int], question_id: int):
+        if session_id is None:
+            return
+        served = self._served.pop(session_id, set())
+        served.add(question_id)
+        self._served[session_id] = served
+        while len(self._served) > MAX_TRACKED_SESSIONS:
+            self._served.popitem(last=False)
+
+    def forget_session(self, session_id: int):
+        self._served.pop(session_id, None)
+
+    def hit_rate(self) -> float:
+        hits = metrics.counter("question_index.hits").value
+        misses = metrics.counter("question_index.misses").value + metrics.counter("question_index.bypassed").value
+        return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+
+question_index = QuestionIndex()
+metrics.register_gauge("question_index.hit_rate", question_index.hit_rate)
+metrics.register_gauge("question_index.questions", lambda: question_index.size)
+metrics.register_gauge("question_index.digests", lambda: len(question_index._digests))
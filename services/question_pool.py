@@ -0,0 +1,127 @@
+"""Background pre-generation of resume-based questions.
+
+Once a session's resume is known, a producer keeps up to QUESTION_POOL_SIZE
+questions buffered for it, cycling through RESUME_TOPICS. The question
+endpoint pops from the buffer and only generates synchronously when it is
+empty. Producers reuse indexed questions from similar resumes where they
+can (see services/question_index.py). A global semaphore caps in-flight generations across all sessions so
+pre-generation cannot starve interactive LLM calls, and pre-generations are
+scheduled at Priority.QUESTION_PREFETCH: a synchronous generation after a
+miss is served before the session's own prefetches instead of queueing
+behind them.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from config.settings import QUESTION_POOL_SIZE, QUESTION_POOL_MAX_INFLIGHT, QUESTION_POOL_IDLE_SECONDS
+from services import interview_service, metrics
+from services.llm_scheduler import Priority
+
+
+class _SessionBuffer:
+    def __init__(self, context: str, resume_text: str, digest_id: Optional[str]):
+        self.context = context
+        self.resume_text = resume_text
+        self.digest_id = digest_id
+        self.questions: Deque[dict] = deque()
+        self.pending = 0
+        self.topics: List[str] = []
+        self.last_used = time.monotonic()
+
+    def next_topic(self) -> str:
+        # Shuffle a full round of topics so consecutive questions don't repeat one
+        if not self.topics:
+            self.topics = random.sample(interview_service.RESUME_TOPICS, len(interview_service.RESUME_TOPICS))
+        return self.topics.pop()
+
+
+class QuestionPool:
+    def __init__(self, size: int = QUESTION_POOL_SIZE, max_inflight: int = QUESTION_POOL_MAX_INFLIGHT,
+                 idle_seconds: int = QUESTION_POOL_IDLE_SECONDS):
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self._sessions: Dict[int, _SessionBuffer] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.inflight = 0
+
+    def has_session(self, session_id: int) -> bool:
+        return session_id in self._sessions
+
+    def start(self, session_id: int, context: str, resume_text: str, digest_id: Optional[str] = None):
+        """Registers (or refreshes) a session and starts filling its buffer."""
+        self._evict_idle()
+        buffer = self._sessions.get(session_id)
+        if buffer is None or buffer.context != context or buffer.resume_text != resume_text:
+            self._sessions[session_id] = _SessionBuffer(context, resume_text, digest_id)
+        self._refill(session_id)
+
+    def pop(self, session_id: int) -> Optional[dict]:
+        """Returns a pre-generated question, or None if the buffer is empty."""
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            return None
+        buffer.last_used = time.monotonic()
+        question = buffer.questions.popleft() if buffer.questions else None
+        if question is None:
+            metrics.counter("question_pool.misses").inc()
+        else:
+            metrics.counter("question_pool.hits").inc()
+        self._refill(session_id)
+        return question
+
+    def stop(self, session_id: int):
+        # In-flight producers notice the session is gone and drop their result
+        self._sessions.pop(session_id, None)
+
+    def hit_rate(self) -> float:
+        hits = metrics.counter("question_pool.hits").value
+        misses = metrics.counter("question_pool.misses").value
+        return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for session_id in [sid for sid, b in self._sessions.items() if b.last_used < cutoff]:
+            self.stop(session_id)
+
+    def _refill(self, session_id: int):
+        buffer = self._sessions[session_id]
+        missing = self.size - len(buffer.questions) - buffer.pending
+        for _ in range(max(missing, 0)):
+            buffer.pending += 1
+            task = asyncio.create_task(self._produce(session_id, buffer, buffer.next_topic()))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _produce(self, session_id: int, buffer: _SessionBuffer, topic: str):
+        try:
+            async with self._semaphore:
+                if self._sessions.get(session_id) is not buffer:
+                    return
+                self.inflight += 1
+                try:
+                    question = await interview_service.aobtain_question(
+                        buffer.context, buffer.resume_text, topic, digest_id=buffer.digest_id, session_id=session_id,
+                        priority=Priority.QUESTION_PREFETCH
+                    )
+                finally:
+                    self.inflight -= 1
+            if self._sessions.get(session_id) is buffer:
+                buffer.questions.append(question)
+                metrics.counter("question_pool.generated").inc()
+        except Exception as e:
+            # Leave the slot empty; the endpoint falls back to synchronous generation
+            print(f"Error pre-generating question: {e}")
+            metrics.counter("question_pool.errors").inc()
+        finally:
+            buffer.pending -= 1
+
+
+question_pool = QuestionPool()
+metrics.register_gauge("question_pool.hit_rate", question_pool.hit_rate)
+metrics.register_gauge("question_pool.inflight", lambda: question_pool.inflight)
+metrics.register_gauge("question_pool.sessions", lambda: len(question_pool._sessions))
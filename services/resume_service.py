@@ -1,5 +1,35 @@
+import hashlib
+import re
+from typing import Dict, List, Optional
+
 import fitz
 from fastapi import UploadFile
+from sqlmodel import Session
+
+from config.settings import RESUME_DIGEST_TOKEN_BUDGET
+from models.db_models import ResumeDigest
+from services.token_budget import count_tokens, truncate_to_tokens
+
+# Heading keywords -> digest section. Order matters: first match wins.
+SECTION_KEYWORDS = [
+    ("skills", ("skill", "technolog", "tech stack", "tools", "languages", "competenc", "expertise")),
+    ("projects", ("project", "portfolio", "open source")),
+    ("roles", ("experience", "employment", "work history", "career", "positions", "professional background")),
+    ("summary", ("summary", "profile", "objective", "about")),
+    ("other", ("education", "certification", "award", "achievement", "publication", "interests", "hobbies")),
+]
+
+TRUNCATION_MARK = " ..."
+
+# A line cut to fewer tokens than this is dropped rather than kept as a stub
+MIN_TRUNCATED_TOKENS = 10
+
+# Share of the token budget per section; budget a section doesn't use goes to the next ones
+SECTION_BUDGET_SHARES = {"skills": 0.25, "roles": 0.4, "projects": 0.3, "summary": 0.05}
+SECTION_TITLES = {"skills": "Skills", "roles": "Roles", "projects": "Projects", "summary": "Summary"}
+
+BULLET_RE = re.compile(r"^[\s•●▪–—*\-·]+")
+
 
 async def extract_text_from_pdf(resume: UploadFile) -> str:
     extracted_text = ""
@@ -9,3 +39,85 @@ async def extract_text_from_pdf(resume: UploadFile) -> str:
             for page in doc:
                 extracted_text += page.get_text()
     return extracted_text
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with the model's tokenizer (~4 characters per token if unavailable)."""
+    return count_tokens(text)
+
+
+def _heading_section(line: str) -> Optional[str]:
+    if len(line) > 40:
+        return None
+    lowered = line.lower().rstrip(":")
+    for section, keywords in SECTION_KEYWORDS:
+        if any(k in lowered for k in keywords):
+            return section
+    return None
+
+
+def split_sections(resume_text: str) -> Dict[str, List[str]]:
+    """Groups resume lines under the section of the closest heading above them."""
+    sections: Dict[str, List[str]] = {}
+    current = "summary"
+    for raw_line in resume_text.splitlines():
+        line = " ".join(BULLET_RE.sub("", raw_line).split())
+        if not line:
+            continue
+        heading = _heading_section(line)
+        if heading is not None:
+            current = heading
+            continue
+        sections.setdefault(current, []).append(line)
+    return sections
+
+
+def build_resume_digest(resume_text: str, token_budget: int = RESUME_DIGEST_TOKEN_BUDGET) -> str:
+    """Builds a bounded, sectioned summary (skills, roles, projects) of a resume.
+
+    Lines are kept in their original order until a section's share of the
+    token budget runs out, so the prompt size no longer grows with the CV.
+    """
+    sections = split_sections(resume_text)
+    parts = []
+    carry = 0
+    for section in ("skills", "roles", "projects", "summary"):
+        lines = sections.get(section, [])
+        budget = int(token_budget * SECTION_BUDGET_SHARES[section]) + carry
+        kept = []
+        used = 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                remaining = budget - used - 1 - estimate_tokens(TRUNCATION_MARK)
+                if remaining >= MIN_TRUNCATED_TOKENS:
+                    kept.append(truncate_to_tokens(line, remaining) + TRUNCATION_MARK)
+                    used = budget
+                break
+            kept.append(line)
+            used += cost
+        carry = budget - used
+        if not kept:
+            continue
+        if section == "skills":
+            parts.append(f"{SECTION_TITLES[section]}: " + "; ".join(kept))
+        else:
+            parts.append(f"{SECTION_TITLES[section]}:\n" + "\n".join(f"- {line}" for line in kept))
+    return "\n\n".join(parts)
+
+
+def resume_hash(resume_text: str) -> str:
+    return hashlib.sha256(resume_text.strip().encode("utf-8")).hexdigest()
+
+
+def get_or_create_digest(session: Session, resume_text: str) -> ResumeDigest:
+    """Returns the stored digest for this resume content, building it on first use."""
+    digest_id = resume_hash(resume_text)
+    digest = session.get(ResumeDigest, digest_id)
+    if digest is None:
+        digest_text = build_resume_digest(resume_text)
+        digest = ResumeDigest(id=digest_id, digest=digest_text, token_count=estimate_tokens(digest_text))
+        session.add(digest)
+        session.commit()
+        session.refresh(digest)
+    return digest
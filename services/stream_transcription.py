@@ -0,0 +1,175 @@
+"""Incremental transcription of answers streamed while the candidate speaks.
+
+WS /interview/audio-stream feeds 16 kHz mono PCM16 chunks into a
+StreamingTranscription. Every STT_STREAM_CHECK_SECONDS of new audio, Silero
+VAD looks at the audio not yet transcribed: speech followed by a pause of
+STT_VAD_MIN_SILENCE_MS (or longer than STT_STREAM_MAX_SEGMENT_SECONDS) closes
+a segment, which goes to the transcription pool right away while the
+candidate keeps talking. The unfinished segment is transcribed for a
+"partial" preview, at most one at a time per stream and only while the pool
+has spare capacity. When the candidate stops, only the last segment is left
+to transcribe before evaluation starts.
+
+A stream takes a place in the transcription pool when it opens and gives it
+back when it finishes or is cancelled; a new stream is refused with
+TranscriptionOverloaded while the pool is saturated.
+"""
+
+import asyncio
+import io
+import time
+import wave
+from typing import List, Optional
+
+import numpy as np
+
+from config.settings import (
+    STT_VAD_MIN_SILENCE_MS, STT_STREAM_CHECK_SECONDS, STT_STREAM_PARTIALS_ENABLED,
+    STT_STREAM_MAX_SEGMENT_SECONDS, STT_STREAM_MAX_SECONDS, AUDIO_ARCHIVE_ENABLED
+)
+from services import metrics
+from services.audio import audio_service, STT_SAMPLE_RATE
+from services.transcription_pool import transcription_pool
+
+# Silence kept ahead of the first speech, so VAD sees the onset
+LEAD_IN_SECONDS = 1.0
+
+_open_streams = 0
+
+
+class StreamTooLong(Exception):
+    """The answer went on for longer than STT_STREAM_MAX_SECONDS."""
+
+
+class StreamingTranscription:
+    def __init__(self, profile: Optional[str] = None):
+        global _open_streams
+        # Raises TranscriptionOverloaded before anything is allocated
+        transcription_pool.open_stream()
+        self.profile = profile
+        # ("partial" | "segment", data) as transcripts become available
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.received_seconds = 0.0
+        self._buffer = np.zeros(0, dtype=np.float32)  # Audio not yet in a closed segment
+        self._unchecked = 0
+        self._pcm: List[bytes] = []  # Everything received, for the archive copy
+        self._check: Optional[asyncio.Task] = None
+        self._partial: Optional[asyncio.Task] = None
+        self._segments: List[asyncio.Task] = []
+        self._closed = False
+        self._open = True
+        _open_streams += 1
+
+    def feed(self, pcm: bytes):
+        """Adds a chunk of 16 kHz mono 16-bit little-endian PCM."""
+        samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % 2], dtype="<i2").astype(np.float32) / 32768
+        self.received_seconds += len(samples) / STT_SAMPLE_RATE
+        if self.received_seconds > STT_STREAM_MAX_SECONDS:
+            raise StreamTooLong(f"Answers are limited to {int(STT_STREAM_MAX_SECONDS)} seconds")
+        if AUDIO_ARCHIVE_ENABLED:
+            self._pcm.append(pcm)
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._unchecked += len(samples)
+        if self._unchecked >= STT_STREAM_CHECK_SECONDS * STT_SAMPLE_RATE and (self._check is None or self._check.done()):
+            self._unchecked = 0
+            self._check = asyncio.create_task(self._check_segments())
+
+    async def _check_segments(self):
+        snapshot = self._buffer
+        chunks = await asyncio.to_thread(audio_service.speech_timestamps, snapshot, STT_STREAM_MAX_SEGMENT_SECONDS)
+        if chunks is None:
+            # No VAD: cut fixed-length segments instead
+            step = int(STT_STREAM_MAX_SEGMENT_SECONDS * STT_SAMPLE_RATE)
+            if len(snapshot) >= step:
+                self._close_segment(step)
+            return
+        if not chunks:
+            # Only silence so far
+            self._buffer = self._buffer[max(len(snapshot) - int(LEAD_IN_SECONDS * STT_SAMPLE_RATE), 0):]
+            return
+
+        # VAD merges pauses shorter than STT_VAD_MIN_SILENCE_MS, so every
+        # chunk but the last is followed by a full pause
+        closed_end = chunks[-2]["end"] if len(chunks) > 1 else None
+        if len(snapshot) - chunks[-1]["end"] >= STT_VAD_MIN_SILENCE_MS * STT_SAMPLE_RATE / 1000:
+            closed_end = chunks[-1]["end"]
+        if closed_end is not None:
+            self._close_segment(closed_end)
+        if closed_end != chunks[-1]["end"]:
+            self._start_partial(snapshot[chunks[-1]["start"]:])
+
+    def _close_segment(self, end: int):
+        segment, self._buffer = self._buffer[:end], self._buffer[end:]
+        index = len(self._segments)
+        self._segments.append(asyncio.create_task(self._transcribe_segment(index, segment)))
+        metrics.counter("stt.stream.segments").inc()
+
+    async def _transcribe_segment(self, index: int, audio: np.ndarray) -> str:
+        # Covered by the place the stream took in the pool; a segment must not be dropped halfway through an answer
+        text = await transcription_pool.transcribe(audio, bounded=False, profile=self.profile)
+        await self.events.put(("segment", {"index": index, "text": text}))
+        return text
+
+    def _start_partial(self, audio: np.ndarray):
+        if not STT_STREAM_PARTIALS_ENABLED or transcription_pool.saturated:
+            return
+        if self._partial is not None and not self._partial.done():
+            return
+        self._partial = asyncio.create_task(self._transcribe_partial(len(self._segments), audio))
+
+    async def _transcribe_partial(self, index: int, audio: np.ndarray):
+        try:
+            text = await transcription_pool.transcribe(audio, denoise=False, profile=self.profile)
+        except Exception:
+            # Previews are best effort (e.g. TranscriptionOverloaded); the segment itself is transcribed when it closes
+            return
+        metrics.counter("stt.stream.partials").inc()
+        if text and not self._closed:
+            await self.events.put(("partial", {"index": index, "text": text}))
+
+    async def finish(self) -> str:
+        """Transcribes what is left after the candidate stopped and returns the whole answer."""
+        started = time.perf_counter()
+        if self._check is not None:
+            await self._check
+        self._closed = True
+        if self._partial is not None:
+            self._partial.cancel()
+        if len(self._buffer):
+            self._close_segment(len(self._buffer))
+        texts = await asyncio.gather(*self._segments)
+        metrics.histogram("stt.stream.finish_seconds").observe(time.perf_counter() - started)
+        metrics.counter("stt.stream.audio_seconds").inc(self.received_seconds)
+        self._release()
+        return " ".join(text for text in texts if text).strip()
+
+    def cancel(self):
+        """Stops all work for a stream whose connection dropped."""
+        self._closed = True
+        for task in [self._check, self._partial, *self._segments]:
+            if task is not None:
+                task.cancel()
+        self._release()
+
+    def _release(self):
+        global _open_streams
+        if self._open:
+            self._open = False
+            _open_streams -= 1
+            transcription_pool.close_stream()
+
+    def recording(self) -> bytes:
+        """The whole answer as a WAV file, for the archive copy; empty with AUDIO_ARCHIVE_ENABLED=false."""
+        pcm = b"".join(self._pcm)
+        if not pcm:
+            return b""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(STT_SAMPLE_RATE)
+            f.writeframes(pcm)
+        return buffer.getvalue()
+
+
+metrics.register_gauge("stt.stream.open", lambda: _open_streams)
@@ -0,0 +1,181 @@
+"""Token budgets for chain inputs.
+
+Every chain call passes its inputs through apply_budget before reaching the
+model. Inputs over their budget keep their start and end, and the middle is
+filled with the sentences most related to the question, so a rambling
+five-minute answer costs about as much prefill as a concise one.
+
+Tokens are counted with the model's tokenizer (LLM_TOKENIZER, a
+tokenizer.json path or a Hugging Face repo id). Only the background load on
+startup may download it, with a LLM_TOKENIZER_TIMEOUT_SECONDS timeout;
+loads on first use read a local file or the Hugging Face cache and nothing
+else. Until a tokenizer is loaded the count falls back to ~4 characters per
+token.
+"""
+
+import math
+import os
+import re
+from typing import List, Optional, Tuple, Union
+
+from config.settings import (
+    LLM_TOKENIZER, LLM_TOKENIZER_TIMEOUT_SECONDS, ANSWER_TOKEN_BUDGET, QUESTION_TOKEN_BUDGET, CONTEXT_TOKEN_BUDGET, CUSTOM_PROMPT_TOKEN_BUDGET
+)
+from services import metrics
+from services.prescreen import keyword_similarity
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+# Budget per prompt variable; variables not listed here are passed through
+INPUT_BUDGETS = {
+    "answer": ANSWER_TOKEN_BUDGET,
+    "question": QUESTION_TOKEN_BUDGET,
+    "context": CONTEXT_TOKEN_BUDGET,
+}
+
+# Share of an over-budget input kept from its start and its end; the rest
+# goes to the most relevant sentences in between
+HEAD_SHARE = 0.4
+TAIL_SHARE = 0.3
+
+ELISION = " [...] "
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]*")
+
+_tokenizer = None
+_attempted = set()  # "local", "download"
+
+
+def _tokenizer_file(download: bool) -> str:
+    """Path of LLM_TOKENIZER's tokenizer.json, from the Hugging Face cache unless download."""
+    if os.path.exists(LLM_TOKENIZER):
+        return LLM_TOKENIZER
+    from huggingface_hub import get_hf_file_metadata, hf_hub_download, hf_hub_url
+    try:
+        return hf_hub_download(LLM_TOKENIZER, "tokenizer.json", local_files_only=True)
+    except Exception:
+        if not download:
+            raise
+    # hf_hub_download retries for ~20s when the Hub is unreachable; one probe without retries fails fast
+    get_hf_file_metadata(hf_hub_url(LLM_TOKENIZER, "tokenizer.json"), timeout=LLM_TOKENIZER_TIMEOUT_SECONDS)
+    return hf_hub_download(LLM_TOKENIZER, "tokenizer.json", etag_timeout=LLM_TOKENIZER_TIMEOUT_SECONDS)
+
+
+def load_tokenizer(download: bool = False):
+    """Loads LLM_TOKENIZER once; None if it isn't available.
+
+    The startup task passes download=True. Lazy loads on first use don't
+    touch the network, so a missing tokenizer falls back to estimates at
+    once instead of waiting on Hugging Face retries.
+    """
+    global _tokenizer
+    mode = "download" if download else "local"
+    if _tokenizer is not None or mode in _attempted or "download" in _attempted:
+        return _tokenizer
+    _attempted.add(mode)
+    if Tokenizer is None:
+        print("tokenizers package missing, estimating token counts")
+        return None
+    try:
+        _tokenizer = Tokenizer.from_file(_tokenizer_file(download))
+    except Exception as e:
+        if download:
+            print(f"Could not load tokenizer '{LLM_TOKENIZER}', estimating token counts: {e}")
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = load_tokenizer()
+    if tokenizer is None:
+        return math.ceil(len(text) / 4)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def _token_offsets(text: str) -> List[Tuple[int, int]]:
+    """Character span of each token."""
+    tokenizer = load_tokenizer()
+    if tokenizer is None:
+        return [(i, min(i + 4, len(text))) for i in range(0, len(text), 4)]
+    return tokenizer.encode(text, add_special_tokens=False).offsets
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The start of text up to max_tokens tokens, cut at a word boundary."""
+    offsets = _token_offsets(text)
+    if len(offsets) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    end = offsets[max_tokens - 1][1]
+    if end < len(text) and not text[end].isspace():
+        end = max(text.rfind(" ", 0, end), 0)
+    return text[:end].rstrip()
+
+
+def _relevant_middle(middle: str, question: Optional[str], budget: int) -> str:
+    """Sentences from the middle, most related to the question first, kept in their original order."""
+    if budget <= 0 or not question:
+        return ""
+    sentences = [s.strip() for s in SENTENCE_RE.findall(middle) if s.strip()]
+    ranked = sorted(range(len(sentences)), key=lambda i: keyword_similarity(question, sentences[i]), reverse=True)
+    chosen, used = [], 0
+    for i in ranked:
+        if keyword_similarity(question, sentences[i]) <= 0:
+            break
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def fit_to_budget(text: str, budget: int, question: Optional[str] = None) -> Tuple[str, bool]:
+    """Returns the text cut down to about budget tokens, and whether it was truncated."""
+    offsets = _token_offsets(text)
+    if len(offsets) <= budget:
+        return text, False
+
+    head_tokens = int(budget * HEAD_SHARE)
+    tail_tokens = int(budget * TAIL_SHARE)
+    head_end = offsets[head_tokens - 1][1] if head_tokens else 0
+    tail_start = offsets[len(offsets) - tail_tokens][0] if tail_tokens else len(text)
+
+    # Cut at word boundaries so no half words reach the model
+    if head_end < len(text) and not text[head_end].isspace():
+        head_end = max(text.rfind(" ", 0, head_end), 0)
+    if tail_start > 0 and not text[tail_start - 1].isspace():
+        next_space = text.find(" ", tail_start)
+        tail_start = next_space if next_space != -1 else len(text)
+
+    middle_budget = budget - head_tokens - tail_tokens - 2 * count_tokens(ELISION)
+    middle = _relevant_middle(text[head_end:tail_start], question, middle_budget)
+    parts = [text[:head_end].rstrip()]
+    if middle:
+        parts.append(middle)
+    parts.append(text[tail_start:].lstrip())
+    return ELISION.join(part for part in parts if part), True
+
+
+def apply_budget(chain_name: str, inputs: Union[dict, str]) -> Union[dict, str]:
+    """Trims over-budget chain inputs. Custom prompts are a plain string with their own budget."""
+    if isinstance(inputs, str):
+        return _fit_input(chain_name, "prompt", inputs, CUSTOM_PROMPT_TOKEN_BUDGET, None)
+    if not isinstance(inputs, dict):
+        return inputs
+    question = inputs.get("question")
+    budgeted = dict(inputs)
+    for key, budget in INPUT_BUDGETS.items():
+        if isinstance(budgeted.get(key), str):
+            budgeted[key] = _fit_input(chain_name, key, budgeted[key], budget, question if key != "question" else None)
+    return budgeted
+
+
+def _fit_input(chain_name: str, key: str, text: str, budget: int, question: Optional[str]) -> str:
+    fitted, truncated = fit_to_budget(text, budget, question)
+    if truncated:
+        metrics.counter(f"token_budget.truncations.{chain_name}.{key}").inc()
+        metrics.counter("token_budget.tokens_trimmed").inc(max(0, count_tokens(text) - count_tokens(fitted)))
+    return fitted
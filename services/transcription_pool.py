@@ -0,0 +1,284 @@
+"""Process pool for Whisper transcription.
+
+faster-whisper is CPU bound and synchronous, so running it in a request
+handler froze every other request on the worker. Recordings now go to
+STT_WORKERS processes, each with its own CTranslate2 model pinned to its
+share of the available cores; handlers await the result.
+
+Recordings that arrive together are micro-batched: the first one waits up
+to STT_BATCH_WINDOW_MS for others with the same transcription profile, and
+up to STT_BATCH_SIZE of them go to a process as one batch, which CTranslate2
+decodes with much better throughput than one at a time. Each request gets
+its own text back.
+
+Beyond STT_MAX_QUEUE recordings waiting for a free process, new uploads are
+rejected with Retry-After instead of piling up. Each open answer stream
+(WS /interview/audio-stream) holds one of those places for as long as it is
+open, since its segments are transcribed whatever the queue looks like. A recording that isn't
+transcribed within STT_TIMEOUT_SECONDS (queue wait included) fails the
+request; its process finishes the batch and picks up the next one.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from config.settings import (
+    STT_MODEL_SIZE, STT_WORKERS, STT_CPU_THREADS, STT_MAX_QUEUE, STT_TIMEOUT_SECONDS, STT_PROFILE, TRANSCRIPTION_PROFILES,
+    STT_BATCH_SIZE, STT_BATCH_WINDOW_MS
+)
+from services import metrics
+from services.audio import resolve_profile
+
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0)
+BATCH_SIZE_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+DENOISE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Set in each worker process by _init_worker; in-process (STT_WORKERS=0) uses the shared instance
+_service = None
+
+
+class TranscriptionOverloaded(Exception):
+    """Too many recordings are waiting for a transcription worker."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Transcription queue is full")
+
+
+class TranscriptionTimeout(Exception):
+    """The recording was not transcribed within STT_TIMEOUT_SECONDS."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Transcription took too long")
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model_size: str, cpu_threads: int):
+    global _service
+    # Keep OpenMP from spawning a thread per core in every worker
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    from services.audio import AudioService
+    _service = AudioService(model_size, cpu_threads=cpu_threads)
+    try:
+        # Load the default profile's model now rather than on the first recording;
+        # other profiles load theirs on first use
+        _service.get_stt_model(TRANSCRIPTION_PROFILES[STT_PROFILE]["model_size"])
+    except Exception as e:
+        # Leave it to the first job to retry, instead of breaking the whole pool
+        print(f"Could not load Whisper model in transcription worker: {e}")
+
+
+def _read(audio: Union[bytes, str, np.ndarray]) -> Union[bytes, np.ndarray]:
+    if not isinstance(audio, str):
+        return audio
+    if not os.path.exists(audio):
+        return b""
+    with open(audio, "rb") as f:
+        return f.read()
+
+
+def _run_batch(audios: List[Union[bytes, str, np.ndarray]], denoise: bool, profile: str,
+               submitted_at: List[float]) -> Tuple[List[Tuple[str, float, float, float, Optional[dict]]], float]:
+    """Decodes, cleans up and transcribes recordings given as bytes or file paths, in one Whisper batch.
+
+    Returns ((text, queue wait, audio seconds, speech seconds, denoise info)
+    per recording, batch seconds). Wall clock times, because the batch was
+    submitted from another process.
+    """
+    started_at = time.time()
+    service = _service
+    if service is None:
+        from services.audio import audio_service as service
+    results = service.transcribe_blobs([_read(audio) for audio in audios], denoise, profile)
+    return [
+        (text, started_at - submitted, audio_seconds, speech_seconds, denoise_info)
+        for (text, audio_seconds, speech_seconds, denoise_info), submitted in zip(results, submitted_at)
+    ], time.time() - started_at
+
+
+class TranscriptionPool:
+    def __init__(self, workers: int = STT_WORKERS, max_queue: int = STT_MAX_QUEUE,
+                 timeout: float = STT_TIMEOUT_SECONDS, model_size: str = STT_MODEL_SIZE,
+                 cpu_threads: int = STT_CPU_THREADS, batch_size: int = STT_BATCH_SIZE,
+                 batch_window: float = STT_BATCH_WINDOW_MS / 1000):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.model_size = model_size
+        self.cpu_threads = cpu_threads or max(1, available_cores() // max(workers, 1))
+        self.batch_size = max(batch_size, 1)
+        self.batch_window = batch_window
+        self.pending = 0
+        self.streams = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (profile, denoise) -> recordings gathering for the next batch: (audio, submitted at, future)
+        self._batches: Dict[Tuple[str, bool], List[Tuple[Union[bytes, str, np.ndarray], float, asyncio.Future]]] = {}
+        self._batch_timers: Dict[Tuple[str, bool], asyncio.TimerHandle] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads and an event loop isn't safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_size, self.cpu_threads),
+            )
+        return self._executor
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) * self.batch_size + self.max_queue
+
+    @property
+    def saturated(self) -> bool:
+        """True once new bounded requests and streams would be rejected."""
+        return self.pending + self.streams >= self.capacity
+
+    def _overloaded(self) -> TranscriptionOverloaded:
+        metrics.counter("stt.rejected").inc()
+        return TranscriptionOverloaded(retry_after=max(1, int(self.timeout / self.capacity)))
+
+    def open_stream(self):
+        """Reserves a place for an answer stream; raises TranscriptionOverloaded if the pool is full."""
+        if self.saturated:
+            raise self._overloaded()
+        self.streams += 1
+
+    def close_stream(self):
+        self.streams -= 1
+
+    def start(self):
+        """Starts the worker processes and loads their models ahead of the first recording."""
+        if self.workers > 0:
+            executor = self._get_executor()
+            for _ in range(self.workers):
+                executor.submit(time.sleep, 0)
+
+    async def transcribe(self, audio: Union[bytes, str, np.ndarray], denoise: bool = True, bounded: bool = True,
+                         profile: Optional[str] = None) -> str:
+        """Transcribes a recording without blocking the event loop; "" if nothing was recognised.
+
+        audio is the uploaded bytes, decoded once in memory by the worker,
+        the path of a stored recording or an already decoded 16 kHz float32
+        array (streamed answers). profile is a TRANSCRIPTION_PROFILES
+        name, usually the room's; None or unknown names use STT_PROFILE.
+
+        The recording waits up to STT_BATCH_WINDOW_MS for others with the
+        same profile, and up to STT_BATCH_SIZE of them are decoded together.
+
+        bounded=False skips the queue limit, for callers that bound their
+        own concurrency (the audio job workers, and answer streams through
+        open_stream).
+        """
+        if bounded and self.saturated:
+            raise self._overloaded()
+
+        profile = resolve_profile(profile)
+        self.pending += 1
+        try:
+            future = self._add_to_batch((profile, denoise), audio)
+            text, queue_wait, audio_seconds, speech_seconds, denoise_info, batch_seconds = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            metrics.counter("stt.timeouts").inc()
+            raise TranscriptionTimeout(retry_after=int(self.timeout))
+        finally:
+            self.pending -= 1
+
+        metrics.counter("stt.jobs").inc()
+        metrics.counter(f"stt.jobs.{profile}").inc()
+        metrics.histogram("stt.queue_wait_seconds").observe(max(queue_wait, 0.0))
+        metrics.histogram("stt.transcribe_seconds").observe(batch_seconds)
+        metrics.counter("stt.audio_seconds").inc(audio_seconds)
+        metrics.counter("stt.speech_seconds").inc(speech_seconds)
+        if denoise_info is not None:
+            # Decided and timed in the worker, see AudioService.denoise
+            metrics.counter(f"stt.denoise.{denoise_info['tier']}").inc()
+            metrics.histogram("stt.denoise_cpu_seconds", DENOISE_BUCKETS).observe(denoise_info["cpu_seconds"])
+            metrics.counter("stt.denoise_saved_seconds").inc(denoise_info["saved_seconds"])
+        return text
+
+    def _add_to_batch(self, key: Tuple[str, bool], audio: Union[bytes, str, np.ndarray]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.setdefault(key, [])
+        batch.append((audio, time.time(), future))
+        if len(batch) >= self.batch_size or self.batch_window <= 0:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._batch_timers[key] = loop.call_later(self.batch_window, self._flush, key)
+        return future
+
+    def _flush(self, key: Tuple[str, bool]):
+        """Sends the recordings gathered for key to a worker as one batch."""
+        timer = self._batch_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(key, None)
+        if not batch:
+            return
+        profile, denoise = key
+        args = ([audio for audio, _, _ in batch], denoise, profile, [submitted for _, submitted, _ in batch])
+        loop = asyncio.get_running_loop()
+        try:
+            if self.workers > 0:
+                running = loop.run_in_executor(self._get_executor(), _run_batch, *args)
+            else:
+                running = asyncio.ensure_future(asyncio.to_thread(_run_batch, *args))
+        except BrokenProcessPool as e:
+            self._worker_crashed()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        metrics.histogram("stt.batch_size", BATCH_SIZE_BUCKETS).observe(len(batch))
+        running.add_done_callback(lambda done: self._scatter(batch, profile, done))
+
+    def _scatter(self, batch: list, profile: str, done: asyncio.Future):
+        """Hands each waiting request its own result; requests that timed out are skipped."""
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        if error is not None:
+            if isinstance(error, BrokenProcessPool):
+                self._worker_crashed()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        results, batch_seconds = done.result()
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result((*result, batch_seconds))
+        audio_seconds = sum(result[2] for result in results)
+        if audio_seconds > 0:
+            # Per batch: seconds of compute per second of audio across its recordings
+            metrics.histogram("stt.real_time_factor", RTF_BUCKETS).observe(batch_seconds / audio_seconds)
+            metrics.histogram(f"stt.real_time_factor.{profile}", RTF_BUCKETS).observe(batch_seconds / audio_seconds)
+
+    def _worker_crashed(self):
+        # A worker died (e.g. out of memory); start fresh processes for the next batch
+        metrics.counter("stt.worker_crashes").inc()
+        self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+transcription_pool = TranscriptionPool()
+metrics.register_gauge("stt.pending", lambda: transcription_pool.pending)
+metrics.register_gauge("stt.workers", lambda: transcription_pool.workers)
@@ -0,0 +1,350 @@
+"""Text-to-speech for interviewer questions, streamed and cached on disk.
+
+Synthesizers, selected by TTS_BACKEND:
+
+- "edge": Microsoft Edge's online voices through edge-tts, MP3 (default)
+- "fake": a short tone per word as WAV, generated locally, so tests and load
+  tests don't depend on the network service
+
+Results are cached under TTS_CACHE_DIR, named by a hash of the synthesizer,
+voice, format and text, so a question is synthesized once however many
+candidates hear it. Playing a cached file touches its modification time, and
+once the cache grows past TTS_CACHE_MAX_MB the least recently played files
+are evicted; the directory itself is the index, so workers sharing it agree.
+
+A miss is streamed to the client chunk by chunk as the synthesizer produces
+it. Requests for text that is already being synthesized in this process
+follow the same synthesis instead of starting another. On startup, questions
+from the Question table are synthesized in the background, seeded ones first.
+
+The endpoint only speaks questions: stored Question rows, or generated
+questions carrying the question_token they were issued with for the session.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import struct
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from auth.security import SECRET_KEY
+from config.database import engine
+from config.settings import (
+    TTS_BACKEND, TTS_VOICE, TTS_CACHE_DIR, TTS_CACHE_MAX_MB, TTS_PREWARM_LIMIT, TTS_PREWARM_CONCURRENCY
+)
+from models.db_models import Question
+from services import metrics
+
+BACKENDS = ("edge", "fake")
+
+# Chunk size when streaming a cached file
+READ_CHUNK_BYTES = 64 * 1024
+
+# The directory is re-scanned for eviction at least this often, to count files other workers added
+SCAN_INTERVAL_SECONDS = 60
+
+# Pre-warming stops after this many failures in a row (e.g. the TTS service is unreachable)
+PREWARM_MAX_FAILURES = 3
+
+
+class EdgeSynthesizer:
+    """Microsoft Edge's online text-to-speech (edge-tts)."""
+
+    name = "edge"
+    media_type = "audio/mpeg"
+    extension = "mp3"
+
+    async def stream(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        import edge_tts
+        async for chunk in edge_tts.Communicate(text, voice).stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+
+class FakeSynthesizer:
+    """Local stand-in for EdgeSynthesizer: a tone per word, pitched by the word, as 16-bit WAV.
+
+    Deterministic, so the same text always gives the same bytes. Each word
+    is a separate chunk and waits word_seconds (0 disables the delay), to
+    exercise streaming like a real service.
+    """
+
+    name = "fake"
+    media_type = "audio/wav"
+    extension = "wav"
+    sample_rate = 24000
+
+    def __init__(self, word_seconds: float = 0.0):
+        self.word_seconds = word_seconds
+
+    def _word(self, word: str) -> bytes:
+        pitch = 200 + int(hashlib.sha256(word.encode("utf-8")).hexdigest(), 16) % 400
+        t = np.arange(int(0.25 * self.sample_rate)) / self.sample_rate
+        tone = 0.3 * np.sin(2 * np.pi * pitch * t)
+        gap = np.zeros(int(0.05 * self.sample_rate))
+        return (np.concatenate([tone, gap]) * 32767).astype("<i2").tobytes()
+
+    async def stream(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        words = [self._word(word) for word in text.split()]
+        size = sum(len(word) for word in words)
+        # The header needs the length up front; the words are cheap to generate first
+        yield (b"RIFF" + struct.pack("<I", 36 + size) + b"WAVEfmt "
+               + struct.pack("<IHHIIHH", 16, 1, 1, self.sample_rate, 2 * self.sample_rate, 2, 16)
+               + b"data" + struct.pack("<I", size))
+        for word in words:
+            if self.word_seconds:
+                await asyncio.sleep(self.word_seconds)
+            yield word
+
+
+def build_synthesizer(backend: str):
+    """Synthesizer for the configured backend (see BACKENDS)."""
+    if backend == "edge":
+        return EdgeSynthesizer()
+    if backend == "fake":
+        return FakeSynthesizer()
+    raise ValueError(f"Unknown TTS_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_token(session_id: int, text: str) -> str:
+    """Proves a generated question was issued to the session, so it may be spoken without being stored."""
+    message = f"tts\x1f{session_id}\x1f{normalize_text(text)}".encode("utf-8")
+    return hmac.new(SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def valid_question_token(session_id: int, text: str, token: Optional[str]) -> bool:
+    return token is not None and hmac.compare_digest(question_token(session_id, text), token)
+
+
+class _Synthesis:
+    """A synthesis in progress, which any number of requests can follow from the start."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def add(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[bytes]:
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class TextToSpeech:
+    def __init__(self, synthesizer=None, cache_dir: str = TTS_CACHE_DIR,
+                 max_bytes: float = TTS_CACHE_MAX_MB * 1024 * 1024, voice: str = TTS_VOICE):
+        self.synthesizer = synthesizer or build_synthesizer(TTS_BACKEND)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.voice = voice
+        self._inflight: Dict[str, _Synthesis] = {}
+        self._tasks = set()
+        # Cache size as of the last scan plus what this process added since
+        self._cache_bytes = 0
+        self._scanned_at = float("-inf")
+
+    @property
+    def media_type(self) -> str:
+        return self.synthesizer.media_type
+
+    def cache_key(self, text: str, voice: str) -> str:
+        payload = json.dumps([self.synthesizer.name, voice, self.synthesizer.extension, normalize_text(text)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return f"{self.cache_dir}/{key[:2]}/{key}.{self.synthesizer.extension}"
+
+    def _open_cached(self, key: str):
+        """Opens a cached file and marks it as recently played; None on a miss."""
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return f
+
+    async def stream(self, text: str, voice: Optional[str] = None) -> Tuple[AsyncIterator[bytes], bool]:
+        """Audio of text as chunks, and whether it came from the cache.
+
+        On a miss the synthesis runs in its own task, so it is cached even if
+        the client goes away before it finishes.
+        """
+        voice = voice or self.voice
+        key = self.cache_key(text, voice)
+        f = await asyncio.to_thread(self._open_cached, key)
+        if f is not None:
+            metrics.counter("tts.cache_hits").inc()
+            return self._read(f), True
+
+        metrics.counter("tts.cache_misses").inc()
+        synthesis = self._inflight.get(key)
+        if synthesis is None:
+            synthesis = self._inflight[key] = _Synthesis()
+            task = asyncio.create_task(self._synthesize(key, normalize_text(text), voice, synthesis))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            metrics.counter("tts.joined").inc()
+        return synthesis.follow(), False
+
+    async def _read(self, f) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, READ_CHUNK_BYTES)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            f.close()
+
+    async def _synthesize(self, key: str, text: str, voice: str, synthesis: _Synthesis):
+        start = time.perf_counter()
+        try:
+            async for chunk in self.synthesizer.stream(text, voice):
+                if not synthesis.chunks:
+                    metrics.histogram("tts.first_chunk_seconds").observe(time.perf_counter() - start)
+                synthesis.add(chunk)
+            if not synthesis.chunks:
+                raise RuntimeError("The synthesizer returned no audio")
+            await asyncio.to_thread(self._store, key, b"".join(synthesis.chunks))
+            metrics.histogram("tts.synthesis_seconds").observe(time.perf_counter() - start)
+            synthesis.finish()
+        except Exception as e:
+            print(f"TTS Error: {e}")
+            metrics.counter("tts.errors").inc()
+            synthesis.finish(e)
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.part"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+        self._cache_bytes += len(data)
+        if self._cache_bytes > self.max_bytes or time.monotonic() - self._scanned_at > SCAN_INTERVAL_SECONDS:
+            self._evict()
+
+    def _evict(self):
+        """Deletes the least recently played files until the cache fits in max_bytes."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir():
+                for f in os.scandir(entry.path):
+                    if f.is_file() and not f.name.endswith(".part"):
+                        stat = f.stat()
+                        files.append((stat.st_mtime, stat.st_size, f.path))
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += size
+        self._cache_bytes = total
+        self._scanned_at = time.monotonic()
+        if evicted:
+            metrics.counter("tts.evicted_bytes").inc(evicted)
+
+    async def synthesize(self, text: str, voice: Optional[str] = None) -> bytes:
+        """The whole audio of text, from the cache when possible."""
+        chunks, _ = await self.stream(text, voice)
+        return b"".join([chunk async for chunk in chunks])
+
+    async def prewarm(self, limit: int = TTS_PREWARM_LIMIT, concurrency: int = TTS_PREWARM_CONCURRENCY):
+        """Synthesizes questions from the Question table that aren't cached yet, seeded ones first.
+
+        Started as a background task on app startup.
+        """
+        def load() -> List[str]:
+            with Session(engine) as session:
+                rows = session.exec(
+                    select(Question.content, Question.seeded).order_by(Question.seeded.desc(), Question.id).limit(limit)
+                ).all()
+            seeded = [content for content, is_seeded in rows if is_seeded]
+            generated = [content for content, is_seeded in rows if not is_seeded]
+            # Every worker pre-warms on startup; shuffled, they mostly pick different questions
+            random.shuffle(seeded)
+            random.shuffle(generated)
+            return seeded + generated
+
+        try:
+            texts = await asyncio.to_thread(load)
+        except Exception as e:
+            print(f"TTS pre-warm error: {e}")
+            return
+        texts.reverse()  # Popped from the end
+        counts = {"synthesized": 0, "cached": 0, "failed": 0}
+        failures_in_a_row = 0
+
+        async def warm():
+            nonlocal failures_in_a_row
+            while texts and failures_in_a_row < PREWARM_MAX_FAILURES:
+                text = texts.pop()
+                if not normalize_text(text):
+                    continue
+                try:
+                    chunks, cached = await self.stream(text)
+                    async for _ in chunks:
+                        pass
+                except Exception:
+                    counts["failed"] += 1
+                    failures_in_a_row += 1
+                    continue
+                counts["cached" if cached else "synthesized"] += 1
+                failures_in_a_row = 0
+
+        start = time.perf_counter()
+        await asyncio.gather(*(warm() for _ in range(max(concurrency, 1))))
+        if failures_in_a_row >= PREWARM_MAX_FAILURES:
+            print(f"TTS pre-warm stopped after {PREWARM_MAX_FAILURES} failures in a row")
+        print(f"TTS pre-warm: {counts['synthesized']} synthesized, {counts['cached']} already cached, "
+              f"{counts['failed']} failed in {time.perf_counter() - start:.1f}s")
+
+
+tts = TextToSpeech()
+metrics.register_gauge("tts.inflight", lambda: len(tts._inflight))